@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Earthquake merge benchmark
+Compares the indexed cross-source matcher against the previous linear scan
+on synthetic USGS/EMSC-like feeds, checks both produce identical output and
+times the three-source clustering / deduplication pass.
+
+Run with: python bench_earthquake_merge.py [base_count] [incoming_count]
+"""
+import copy
+import random
+import sys
+import time
+from typing import Any
+
+from services.earthquake_cache import CacheEntry, EarthquakeCache
+from services.earthquake_event import Event, EventCollection
+from services.earthquake_index import EventMatchIndex
+
+DEFAULT_COUNT = 10_000
+SEED = 42
+WINDOW_MS = 7 * 24 * 60 * 60 * 1000
+
+
+def make_features(base_count: int, incoming_count: int) -> tuple[list, list]:
+    """Base feed over Turkey/Eastern Med; about half of incoming are near-duplicates."""
+    rng = random.Random(SEED)
+    start_ms = 1_700_000_000_000
+
+    base = []
+    for i in range(base_count):
+        base.append({
+            "type": "Feature",
+            "id": f"us{i}",
+            "properties": {
+                "mag": round(rng.uniform(1.0, 6.5), 1),
+                "time": start_ms + rng.randrange(WINDOW_MS),
+                "source": "USGS",
+            },
+            "geometry": {
+                "type": "Point",
+                "coordinates": [round(rng.uniform(25.0, 45.0), 4), round(rng.uniform(35.0, 42.5), 4), 10.0],
+            },
+        })
+
+    incoming = []
+    for i in range(incoming_count):
+        if i % 2 == 0 and base:
+            src = rng.choice(base)
+            lon, lat, depth = src["geometry"]["coordinates"]
+            props = {
+                "mag": round(src["properties"]["mag"] + rng.uniform(-0.4, 0.4), 1),
+                "time": src["properties"]["time"] + rng.randrange(-6 * 60_000, 6 * 60_000),
+                "source": "EMSC",
+            }
+            coords = [lon + rng.uniform(-0.25, 0.25), lat + rng.uniform(-0.25, 0.25), depth]
+        else:
+            props = {
+                "mag": round(rng.uniform(1.0, 6.5), 1),
+                "time": start_ms + rng.randrange(WINDOW_MS),
+                "source": "EMSC",
+            }
+            coords = [rng.uniform(25.0, 45.0), rng.uniform(35.0, 42.5), 10.0]
+        # A few share an upstream id with USGS
+        feature_id = f"us{rng.randrange(base_count)}" if base and i % 97 == 0 else f"emsc{i}"
+        incoming.append({
+            "type": "Feature",
+            "id": feature_id,
+            "properties": props,
+            "geometry": {"type": "Point", "coordinates": coords},
+        })
+    return base, incoming
+
+
+def greedy_merge(base: list, incoming: list, find_match) -> list[dict[str, Any]]:
+    """First-match grouping used before clustering; ``find_match(feature, merged)``."""
+    merged = list(base)
+    group_counter = 1
+    for feature in incoming:
+        match = find_match(feature, merged)
+        if match is not None:
+            group_id = match["properties"].get("match_group")
+            if not group_id:
+                group_id = f"match-{group_counter}"
+                match["properties"]["match_group"] = group_id
+                group_counter += 1
+            feature["properties"]["match_group"] = group_id
+        merged.append(feature)
+    return merged
+
+
+def linear_find_match(candidate: dict[str, Any], existing: list) -> dict[str, Any] | None:
+    """Previous O(n) scan, kept here as the reference implementation."""
+    candidate_id = candidate.get("id")
+    if candidate_id:
+        for item in existing:
+            if item.get("id") == candidate_id:
+                return item
+
+    cand_props = candidate["properties"]
+    cand_time, cand_mag = cand_props.get("time"), cand_props.get("mag")
+    cand_lon, cand_lat = candidate["geometry"]["coordinates"][:2]
+    for item in existing:
+        props = item["properties"]
+        item_lon, item_lat = item["geometry"]["coordinates"][:2]
+        if abs(props["time"] - cand_time) > EarthquakeCache.TIME_TOLERANCE_MS:
+            continue
+        if abs(props["mag"] - cand_mag) > EarthquakeCache.MAG_TOLERANCE:
+            continue
+        if abs(item_lat - cand_lat) > EarthquakeCache.COORD_TOLERANCE_DEG:
+            continue
+        if abs(item_lon - cand_lon) > EarthquakeCache.COORD_TOLERANCE_DEG:
+            continue
+        return item
+    return None
+
+
+class FirstMatchIndex(EventMatchIndex):
+    """The grid index answering the linear scan's question: first same-id item, else first within tolerance."""
+
+    def find_match_position(self, candidate: Event) -> int | None:
+        positions = self._ids.get(candidate.id) if candidate.id else None
+        if positions:
+            return positions[0]
+        # No id match, so every match is a tolerance match; the earliest one wins
+        return min(self.find_matches(candidate), default=None)
+
+
+def indexed_find_match_factory():
+    index = FirstMatchIndex(
+        EarthquakeCache.TIME_TOLERANCE_MS,
+        EarthquakeCache.COORD_TOLERANCE_DEG,
+        EarthquakeCache.MAG_TOLERANCE,
+    )
+
+    def find_match(candidate: dict[str, Any], merged: list) -> dict[str, Any] | None:
+        # Catch up with features appended since the last call
+        while len(index) < len(merged):
+            index.add(Event.from_feature(merged[len(index)]))
+        position = index.find_match_position(Event.from_feature(candidate))
+        return merged[position] if position is not None else None
+
+    return find_match
+
+
+def timed(func, *args) -> tuple[float, Any]:
+    args = copy.deepcopy(args)
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def main() -> int:
+    base_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT
+    incoming_count = int(sys.argv[2]) if len(sys.argv) > 2 else base_count
+
+    print("\n⏱️  Earthquake Merge Benchmark")
+    print("=" * 60)
+    print(f"base={base_count}  incoming={incoming_count}")
+
+    base, incoming = make_features(base_count, incoming_count)
+
+    indexed_s, indexed = timed(greedy_merge, base, incoming, indexed_find_match_factory())
+    print(f"indexed match: {indexed_s * 1000:8.1f} ms")
+    linear_s, linear = timed(greedy_merge, base, incoming, linear_find_match)
+    print(f"linear match:  {linear_s * 1000:8.1f} ms  ({linear_s / indexed_s:.0f}x)")
+    if indexed != linear:
+        print("❌ FAIL - indexed matching differs from linear matching")
+        return 1
+    print("✅ identical first-match output")
+
+    cache = EarthquakeCache(store_path="")
+    base_events = [Event.from_feature(feature) for feature in base]
+    incoming_events = [Event.from_feature(feature) for feature in incoming]
+    cluster_s, (merged, match_groups) = timed(
+        cache._merge_sources,
+        base_events,
+        incoming_events[: incoming_count // 2],
+        incoming_events[incoming_count // 2:],
+    )
+    entry = CacheEntry(EventCollection({}, merged, match_groups), fresh_for=cache.DEFAULT_TTL)
+    canonical_s, canonical = timed(cache._canonical, entry.data)
+    render_s, deduplicated = timed(cache._view, entry, True)
+    groups = len({group for group in match_groups if group})
+    print(f"cluster (3 sources): {cluster_s * 1000:8.1f} ms  groups={groups}")
+    print(f"canonical:           {canonical_s * 1000:8.1f} ms  {len(merged)} -> {len(canonical)} events")
+    print(f"render deduplicated: {render_s * 1000:8.1f} ms  {len(deduplicated['features'])} features")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Security middleware benchmark
+Measures the per-request overhead of SecurityMiddleware (headers, rate
+limiting, admission control and size limiting) by driving the ASGI app
+directly: a trivial JSON route and a 16 MiB StreamingResponse, with and
+without the middleware.
+
+Run with: python bench_security_middleware.py [requests]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from security_middleware import SecurityMiddleware
+
+DEFAULT_REQUESTS = 2000
+STREAM_CHUNK = b"x" * (64 * 1024)
+STREAM_CHUNKS = 256  # 16 MiB
+ROUNDS = 5
+
+app = FastAPI()
+
+
+@app.get("/json")
+async def json_route() -> dict:
+    return {"status": "ok"}
+
+
+@app.get("/stream")
+async def stream_route() -> StreamingResponse:
+    async def chunks():
+        for _ in range(STREAM_CHUNKS):
+            yield STREAM_CHUNK
+
+    return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+
+def configurations() -> dict:
+    return {
+        "no middleware": app,
+        "SecurityMiddleware": SecurityMiddleware(
+            app,
+            # Never exhausted during the run
+            requests_per_minute=10 ** 9,
+            concurrency_limits={"/stream": 8},
+        ),
+    }
+
+
+async def request(asgi, path: str) -> None:
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("10.0.0.1", 1234), "server": ("bench", 80),
+        "scheme": "http", "http_version": "1.1", "root_path": "",
+    }
+
+    received = False
+
+    async def receive() -> dict:
+        nonlocal received
+        if received:
+            # Like a server: nothing more until the client disconnects
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        pass
+
+    await asgi(scope, receive, send)
+
+
+async def per_request_ms(asgi, path: str, count: int) -> float:
+    """Median over ROUNDS of the mean time per request."""
+    rounds = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(count):
+            await request(asgi, path)
+        rounds.append((time.perf_counter() - started) * 1000 / count)
+    return statistics.median(rounds)
+
+
+async def run(count: int) -> None:
+    for asgi in configurations().values():
+        await request(asgi, "/json")  # warm up routing and validation
+    for name, asgi in configurations().items():
+        json_ms = await per_request_ms(asgi, "/json", count)
+        stream_ms = await per_request_ms(asgi, "/stream", max(1, count // 200))
+        print(f"{name:<20} json: {json_ms:7.3f} ms   16 MiB stream: {stream_ms:7.2f} ms")
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_REQUESTS
+
+    print("\n⏱️  Security Middleware Benchmark")
+    print("=" * 60)
+    print(f"requests={count}  rounds={ROUNDS}")
+    asyncio.run(run(count))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
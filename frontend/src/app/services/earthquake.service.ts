@@ -1,5 +1,6 @@
 import { Injectable, signal, computed, inject } from '@angular/core';
-import { HttpClient, HttpParams } from '@angular/common/http';
+import { HttpClient, HttpHeaders, HttpParams, HttpResponse } from '@angular/common/http';
+import { EMPTY, expand, reduce } from 'rxjs';
 import { environment } from '../../environments/environment';
 
 /**
@@ -90,6 +91,10 @@ export interface EarthquakeResponse {
     api: string;
     count: number;
     sources?: Record<string, { ok: boolean; error?: string }>;
+    /** Total events across pages (only when paginated) */
+    total?: number;
+    /** Pass as `cursor` to get the next page; absent on the last page */
+    next_cursor?: string;
   };
   features: EarthquakeFeature[];
   bbox?: number[];
@@ -103,9 +108,23 @@ export interface EarthquakeQueryParams {
   end_time?: string;
   min_magnitude?: number;
   max_magnitude?: number;
+  /** Page size; further pages are followed through metadata.next_cursor */
   limit?: number;
 }
 
+/** Upper bound on pages followed per fetch (5000 × 20 = 100k events) */
+const MAX_PAGES = 20;
+
+/** Queries whose last response (ETag + data) is kept for conditional requests */
+const MAX_CACHED_QUERIES = 4;
+
+/** Last response of a query; a 304 means it is still current */
+interface CachedResponse {
+  etag: string;
+  features: EarthquakeFeature[];
+  sources: Record<string, { ok: boolean; error?: string }>;
+}
+
 /**
  * Preset time ranges
  */
@@ -133,6 +152,9 @@ export class EarthquakeService {
   // Auto-refresh
   private refreshInterval: ReturnType<typeof setInterval> | null = null;
 
+  // Last response per query (see queryKey); unchanged data is answered with 304 and no body
+  private readonly responses = new Map<string, CachedResponse>();
+
   // Public readonly signals
   readonly earthquakes = this._earthquakes.asReadonly();
   readonly loading = this._loading.asReadonly();
@@ -190,15 +212,61 @@ export class EarthquakeService {
       httpParams = httpParams.set('limit', params.limit.toString());
     }
 
-    this.http.get<EarthquakeResponse>(`${this.apiUrl}/earthquakes`, { params: httpParams })
+    // Only the first page is conditional: a 304 means the whole event set is unchanged
+    const key = this.queryKey(params);
+    const cached = this.responses.get(key);
+    const headers = cached ? new HttpHeaders({ 'If-None-Match': cached.etag }) : undefined;
+    const url = `${this.apiUrl}/earthquakes`;
+    let pages = 1;
+
+    this.http.get<EarthquakeResponse>(url, { params: httpParams, headers, observe: 'response' })
+      .pipe(
+        expand((response: HttpResponse<EarthquakeResponse>) => {
+          const cursor = response.body?.metadata?.next_cursor;
+          if (!cursor || pages >= MAX_PAGES) {
+            return EMPTY;
+          }
+          pages++;
+          return this.http.get<EarthquakeResponse>(url, {
+            params: httpParams.set('cursor', cursor),
+            observe: 'response',
+          });
+        }),
+        reduce(
+          (acc, response) => ({
+            first: acc.first ?? response,
+            features: acc.features.concat(response.body?.features ?? []),
+          }),
+          { first: null as HttpResponse<EarthquakeResponse> | null, features: [] as EarthquakeFeature[] },
+        ),
+      )
       .subscribe({
-        next: (response) => {
-          this._earthquakes.set(response.features);
+        next: ({ first, features }) => {
+          const sources = first?.body?.metadata?.sources ?? {};
+          const etag = first?.headers.get('ETag');
+          this.responses.delete(key);
+          if (etag) {
+            this.responses.set(key, { etag, features, sources });
+            if (this.responses.size > MAX_CACHED_QUERIES) {
+              this.responses.delete(this.responses.keys().next().value!);
+            }
+          }
+          this._earthquakes.set(features);
           this._lastUpdated.set(new Date());
-          this._sourceStatus.set(response.metadata?.sources ?? {});
+          this._sourceStatus.set(sources);
           this._loading.set(false);
         },
         error: (err) => {
+          if (err.status === 304 && cached) {
+            // Same event set as this query's last response
+            this.responses.delete(key);
+            this.responses.set(key, cached);
+            this._earthquakes.set(cached.features);
+            this._sourceStatus.set(cached.sources);
+            this._lastUpdated.set(new Date());
+            this._loading.set(false);
+            return;
+          }
           console.error('Earthquake fetch error:', err);
           this._error.set(err.message || 'Deprem verileri alınamadı');
           this._loading.set(false);
@@ -206,6 +274,23 @@ export class EarthquakeService {
       });
   }
 
+  /**
+   * Cache key of a query. Rolling windows move with every refresh, so they
+   * are keyed by their length rather than their bounds; a 304 still only
+   * comes back when the server holds the same events as the cached ETag.
+   */
+  private queryKey(params: EarthquakeQueryParams): string {
+    const window = params.start_time && params.end_time
+      ? Date.parse(params.end_time) - Date.parse(params.start_time)
+      : params.start_time ?? null;
+    return JSON.stringify([
+      window,
+      params.min_magnitude ?? null,
+      params.max_magnitude ?? null,
+      params.limit ?? null,
+    ]);
+  }
+
   /**
    * Fetch using preset time ranges
    */
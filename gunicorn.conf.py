@@ -0,0 +1,36 @@
+"""
+Gunicorn configuration for the Metin Analiz API.
+
+Usage:
+    gunicorn main:app
+
+Set GUNICORN_PRELOAD=true to import the application and the heavy optional
+libraries once in the master process before forking, so workers start
+instantly and share those pages copy-on-write.
+"""
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "uvicorn.workers.UvicornWorker")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+# Fork-friendly preload mode
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() == "true"
+
+
+def when_ready(server):
+    """Runs in the master right before the first workers are forked."""
+    if not preload_app:
+        return
+
+    from services.warmup import preload_heavy_modules
+
+    loaded = preload_heavy_modules()
+    server.log.info("Preloaded modules: %s", ", ".join(loaded) or "none")
+
+    # Move everything imported so far out of the GC's tracked generations so
+    # collections in the workers do not touch (and un-share) these pages.
+    gc.collect()
+    gc.freeze()
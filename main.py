@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import csv
 import io
 import math
@@ -12,16 +13,19 @@ from typing import AsyncIterator, Dict, List, Protocol
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import PlainTextResponse, Response
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
-from routers import earthquake, pdf
+# Load environment variables before the modules below read them at import time
+# (ADMIN_TOKEN, SLOW_REQUEST_SECONDS, EARTHQUAKE_*, WARMUP_MODE)
+load_dotenv()
+
+from routers import debug, earthquake, pdf
 from services.earthquake_cache import earthquake_cache
+from services.metrics import MetricsMiddleware, registry, stage
 from services.pdf_service import pdf_service
-
-# Load environment variables
-load_dotenv()
+from services.warmup import start_background_warmup
 
 # Security middleware imports
 from security_middleware import sanitize_text_input, validate_text_content
@@ -155,7 +159,8 @@ def analyze_text(text: str, analysis_type: AnalysisType = AnalysisType.yod) -> A
     if not cleaned:
         raise ValueError("text cannot be empty")
 
-    sentences_raw = split_sentences(cleaned)
+    with stage("split"):
+        sentences_raw = split_sentences(cleaned)
     total_sentences = len(sentences_raw)
     total_words = 0
     total_syllables = 0
@@ -163,80 +168,82 @@ def analyze_text(text: str, analysis_type: AnalysisType = AnalysisType.yod) -> A
 
     sentences: List[SentenceInfo] = []
 
-    for idx, sentence in enumerate(sentences_raw, start=1):
-        words_raw = extract_words(sentence)
-        words: List[WordInfo] = []
-        for word in words_raw:
-            syllables = count_syllables(word)
-            total_words += 1
-            total_syllables += syllables
-            syllable_counts[syllables] = syllable_counts.get(syllables, 0) + 1
-            words.append(WordInfo(word=word, syllable_count=syllables))
-
-        sentences.append(
-            SentenceInfo(
-                sentence_index=idx,
-                sentence_text=sentence,
-                words=words,
+    with stage("tokenize"):
+        for idx, sentence in enumerate(sentences_raw, start=1):
+            words_raw = extract_words(sentence)
+            words: List[WordInfo] = []
+            for word in words_raw:
+                syllables = count_syllables(word)
+                total_words += 1
+                total_syllables += syllables
+                syllable_counts[syllables] = syllable_counts.get(syllables, 0) + 1
+                words.append(WordInfo(word=word, syllable_count=syllables))
+
+            sentences.append(
+                SentenceInfo(
+                    sentence_index=idx,
+                    sentence_text=sentence,
+                    words=words,
+                )
             )
-        )
 
-    if total_sentences == 0:
-        oks = 0.0
-    else:
-        oks = total_words / total_sentences
-
-    def ratio_for(count: int) -> float:
+    with stage("score"):
         if total_sentences == 0:
-            return 0.0
-        return syllable_counts.get(count, 0) / total_sentences
-
-    def ratio_for_min(min_count: int) -> float:
-        if total_sentences == 0:
-            return 0.0
-        return sum(
-            count for syllables, count in syllable_counts.items() if syllables >= min_count
-        ) / total_sentences
-
-    h3 = ratio_for(3)
-    h4 = ratio_for(4)
-    h5 = ratio_for(5)
-    h6 = ratio_for_min(6)
-
-    # Calculate readability score based on analysis type
-    if analysis_type == AnalysisType.yod:
-        readability_score = calculate_yod(oks, h3, h4, h5, h6)
-    elif analysis_type == AnalysisType.atesman:
-        readability_score = calculate_atesman(total_words, total_sentences, total_syllables)
-    elif analysis_type == AnalysisType.cetinkaya:
-        readability_score = calculate_cetinkaya_uzun(total_words, total_sentences, total_syllables)
-    else:
-        readability_score = calculate_yod(oks, h3, h4, h5, h6)
-
-    # Keep yod_value for backward compatibility (always calculate it)
-    yod_value = calculate_yod(oks, h3, h4, h5, h6)
-
-    stats = Statistics(
-        total_sentences=total_sentences,
-        total_words=total_words,
-        total_syllables=total_syllables,
-        oks_value=oks,
-        syllable_counts={
-            3: syllable_counts.get(3, 0),
-            4: syllable_counts.get(4, 0),
-            5: syllable_counts.get(5, 0),
-            6: sum(count for s, count in syllable_counts.items() if s >= 6),
-        },
-        syllable_distribution={
-            3: h3,
-            4: h4,
-            5: h5,
-            6: h6,
-        },
-        yod_value=yod_value,
-        readability_score=readability_score,
-        analysis_type=analysis_type.value,
-    )
+            oks = 0.0
+        else:
+            oks = total_words / total_sentences
+
+        def ratio_for(count: int) -> float:
+            if total_sentences == 0:
+                return 0.0
+            return syllable_counts.get(count, 0) / total_sentences
+
+        def ratio_for_min(min_count: int) -> float:
+            if total_sentences == 0:
+                return 0.0
+            return sum(
+                count for syllables, count in syllable_counts.items() if syllables >= min_count
+            ) / total_sentences
+
+        h3 = ratio_for(3)
+        h4 = ratio_for(4)
+        h5 = ratio_for(5)
+        h6 = ratio_for_min(6)
+
+        # Calculate readability score based on analysis type
+        if analysis_type == AnalysisType.yod:
+            readability_score = calculate_yod(oks, h3, h4, h5, h6)
+        elif analysis_type == AnalysisType.atesman:
+            readability_score = calculate_atesman(total_words, total_sentences, total_syllables)
+        elif analysis_type == AnalysisType.cetinkaya:
+            readability_score = calculate_cetinkaya_uzun(total_words, total_sentences, total_syllables)
+        else:
+            readability_score = calculate_yod(oks, h3, h4, h5, h6)
+
+        # Keep yod_value for backward compatibility (always calculate it)
+        yod_value = calculate_yod(oks, h3, h4, h5, h6)
+
+        stats = Statistics(
+            total_sentences=total_sentences,
+            total_words=total_words,
+            total_syllables=total_syllables,
+            oks_value=oks,
+            syllable_counts={
+                3: syllable_counts.get(3, 0),
+                4: syllable_counts.get(4, 0),
+                5: syllable_counts.get(5, 0),
+                6: sum(count for s, count in syllable_counts.items() if s >= 6),
+            },
+            syllable_distribution={
+                3: h3,
+                4: h4,
+                5: h5,
+                6: h6,
+            },
+            yod_value=yod_value,
+            readability_score=readability_score,
+            analysis_type=analysis_type.value,
+        )
 
     return AnalyzeResponse(sentences=sentences, statistics=stats)
 
@@ -381,8 +388,18 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Application lifespan handler."""
     # Startup
     await pdf_service.initialize()
+    # Heavy optional libraries (httpx, pypdf, pdf2docx, reportlab) are not
+    # imported by this module; load them off the startup path
+    app.state.warmup_task = start_background_warmup()
+    # Keeps USGS/EMSC windows current with updatedafter deltas (EARTHQUAKE_POLL_SECONDS)
+    earthquake_cache.start_polling()
     yield
     # Shutdown - cleanup resources
+    warmup_task = app.state.warmup_task
+    if warmup_task is not None:
+        # An import already running in its thread still finishes; nothing waits on it
+        warmup_task.cancel()
+        await asyncio.gather(warmup_task, return_exceptions=True)
     await pdf_service.shutdown()
     await earthquake_cache.close()
 
@@ -392,6 +409,7 @@ app = FastAPI(title="Metin Analiz API", lifespan=lifespan)
 # Include routers
 app.include_router(earthquake.router)
 app.include_router(pdf.router)
+app.include_router(debug.router)
 
 # Configure CORS - Controls which domains can access the API
 app.add_middleware(
@@ -399,34 +417,53 @@ app.add_middleware(
     allow_origins=ALLOWED_ORIGINS,  # Domains allowed to access the API
     allow_credentials=True,
     allow_methods=["GET", "POST"],  # Only allow GET and POST methods
-    allow_headers=["Content-Type", "Authorization"],
+    allow_headers=["Content-Type", "Authorization", "If-None-Match"],
+    expose_headers=["ETag", "Last-Modified"],  # Earthquake polling revalidates with ETag
     max_age=3600,  # Cache preflight requests for 1 hour
 )
 
+# Request latency histograms, Server-Timing headers and slow-request log
+app.add_middleware(MetricsMiddleware)
+
 
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint() -> PlainTextResponse:
+    """Prometheus text format latency histograms and counters."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/analyze", response_model=AnalyzeResponse)
-def analyze_endpoint(payload: AnalyzeRequest) -> AnalyzeResponse:
+def analyze_endpoint(payload: AnalyzeRequest) -> Response:
     try:
         # Sanitize and validate input to prevent XSS and injection attacks
-        sanitized_text = sanitize_text_input(payload.text, max_length=MAX_TEXT_LENGTH)
-        validate_text_content(sanitized_text)
+        with stage("sanitize"):
+            sanitized_text = sanitize_text_input(payload.text, max_length=MAX_TEXT_LENGTH)
+        with stage("validate"):
+            validate_text_content(sanitized_text)
 
-        return analyze_text(sanitized_text, payload.analysis_type)
+        analysis = analyze_text(sanitized_text, payload.analysis_type)
     except ValueError as exc:
         raise HTTPException(status_code=422, detail=str(exc)) from exc
 
+    # Serialize here (instead of in FastAPI) so the cost shows up as a stage
+    with stage("serialize"):
+        content = analysis.model_dump_json()
+    return Response(content=content, media_type="application/json")
+
 
 @app.post("/export")
 def export_endpoint(payload: ExportRequest):
     try:
         # Sanitize and validate input to prevent XSS and injection attacks
-        sanitized_text = sanitize_text_input(payload.text, max_length=MAX_TEXT_LENGTH)
-        validate_text_content(sanitized_text)
+        with stage("sanitize"):
+            sanitized_text = sanitize_text_input(payload.text, max_length=MAX_TEXT_LENGTH)
+        with stage("validate"):
+            validate_text_content(sanitized_text)
 
         analysis = analyze_text(sanitized_text, payload.analysis_type)
     except ValueError as exc:
@@ -437,7 +474,8 @@ def export_endpoint(payload: ExportRequest):
         raise HTTPException(status_code=400, detail="unsupported export format")
 
     try:
-        content = exporter.export(analysis)
+        with stage(f"export_{exporter.extension}"):
+            content = exporter.export(analysis)
     except RuntimeError as exc:
         raise HTTPException(status_code=501, detail=str(exc)) from exc
 
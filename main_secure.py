@@ -26,9 +26,7 @@ from dotenv import load_dotenv
 
 # Import security middleware
 from security_middleware import (
-    RateLimitMiddleware,
-    SecurityHeadersMiddleware,
-    RequestSizeLimitMiddleware,
+    SecurityMiddleware,
     sanitize_text_input,
     validate_text_content,
 )
@@ -387,16 +385,17 @@ app = FastAPI(
 )
 
 # Add security middleware (ORDER MATTERS!)
-# 1. Security headers (first to apply to all responses)
-app.add_middleware(SecurityHeadersMiddleware)
-
-# 2. Rate limiting
-app.add_middleware(RateLimitMiddleware, requests_per_minute=60)
-
-# 3. Request size limiting
-app.add_middleware(RequestSizeLimitMiddleware, max_size=1024 * 1024)  # 1MB
+# 1. Security headers, cost-weighted rate limiting, per-endpoint admission
+#    control (503 + Retry-After) and streaming request size limiting in a
+#    single ASGI middleware
+app.add_middleware(
+    SecurityMiddleware,
+    requests_per_minute=int(os.getenv("RATE_LIMIT", "60")),
+    max_size=1024 * 1024,  # 1MB
+    concurrency_limits={"/analyze": 8, "/export": 4, "/pdf": 2},
+)
 
-# 4. CORS (configure based on environment)
+# 2. CORS (configure based on environment)
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:4200").split(",")
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,72 @@
+"""
+Debug Router
+Üretimde teşhis için admin korumalı endpoint'ler.
+"""
+from __future__ import annotations
+
+import os
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from services.profiler import (
+    PROFILE_DEFAULT_INTERVAL_MS,
+    PROFILE_MAX_SECONDS,
+    ProfilerBusyError,
+    sampling_profiler,
+)
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin(authorization: str | None = Header(default=None)) -> None:
+    """
+    ``Authorization: Bearer <ADMIN_TOKEN>`` başlığını doğrular.
+
+    ADMIN_TOKEN tanımlı değilse debug endpoint'leri tamamen kapalıdır.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+router = APIRouter(prefix="/debug", tags=["debug"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(
+        default=10,
+        gt=0,
+        le=PROFILE_MAX_SECONDS,
+        description=f"Örnekleme süresi (max: {PROFILE_MAX_SECONDS} sn)",
+    ),
+    interval_ms: int = Query(
+        default=PROFILE_DEFAULT_INTERVAL_MS,
+        ge=1,
+        le=1000,
+        description="Örnekleme aralığı (ms)",
+    ),
+    include_idle: bool = Query(
+        default=False,
+        description="Boşta bekleyen thread'leri de dahil et",
+    ),
+) -> PlainTextResponse:
+    """
+    Bu worker'ı ``seconds`` süre boyunca örnekler.
+
+    Event loop thread'i ve thread pool'lar dahil tüm thread'lerin stack'leri
+    toplanır. Çıktı collapsed stack formatındadır; doğrudan flamegraph.pl
+    veya speedscope ile açılabilir.
+    """
+    try:
+        collapsed = await run_in_threadpool(
+            sampling_profiler.profile, seconds, interval_ms, include_idle
+        )
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return PlainTextResponse(collapsed)
@@ -5,17 +5,81 @@ Deprem verileri için API endpoint'leri.
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from typing import Any
 
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Request, Response
 
 from services.earthquake_cache import earthquake_cache
+from services.earthquake_clusters import MAX_ZOOM
+from services.response_encoding import (
+    IDENTITY,
+    EncodedPayload,
+    format_http_date,
+    is_not_modified,
+    negotiate_encoding,
+)
 
 router = APIRouter(prefix="/earthquakes", tags=["earthquakes"])
 
+SOURCES_DESCRIPTION = "Virgülle ayrılmış kaynaklar: usgs,kandilli,emsc (default: hepsi)"
+CURSOR_DESCRIPTION = "Sonraki sayfa için önceki yanıtın metadata.next_cursor değeri"
+
+
+def _parse_sources(value: str | None) -> list[str] | None:
+    return value.split(",") if value else None
+
+
+def _parse_bbox(value: str | None) -> list[float] | None:
+    if not value:
+        return None
+    try:
+        return [float(part) for part in value.split(",")]
+    except ValueError as e:
+        raise ValueError("bbox must be four numbers: west,south,east,north") from e
+
+
+async def _payload_response(request: Request, payload: EncodedPayload) -> Response:
+    """
+    Cache'teki hazır baytları istemcinin kabul ettiği kodlamayla gönderir.
+
+    İstemcinin kopyası güncelse (``If-None-Match`` / ``If-Modified-Since``)
+    gövde olmadan 304 döner; ``If-None-Match`` eşleşmesi gövde üretilmeden
+    karar verilir. ``no-cache`` tarayıcının her seferinde ETag ile yeniden
+    doğrulamasını sağlar.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if payload.validator is not None:
+        if_none_match = request.headers.get("if-none-match")
+        validators = {}
+        if payload.last_modified is not None:
+            validators["Last-Modified"] = format_http_date(payload.last_modified)
+        matched = None
+        if if_none_match is not None:
+            matched = next(
+                (tag for tag in payload.etags(encoding) if is_not_modified(if_none_match, None, tag, None)),
+                None,
+            )
+        if matched is not None:
+            return Response(status_code=304, headers={**headers, "ETag": matched, **validators})
+
+        encoding = payload.content_encoding(encoding)
+        validators["ETag"] = payload.etag(encoding)
+        if if_none_match is None and is_not_modified(
+            None, request.headers.get("if-modified-since"), validators["ETag"], payload.last_modified,
+        ):
+            return Response(status_code=304, headers={**headers, **validators})
+        if not payload.revalidate_only:
+            headers.update(validators)
+
+    body, encoding = await payload.body(encoding)
+    if encoding != IDENTITY:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 @router.get("")
 async def get_earthquakes(
+    request: Request,
     start_time: datetime | None = Query(
         default=None,
         description="Başlangıç zamanı (ISO8601 format). Default: 24 saat önce"
@@ -37,30 +101,213 @@ async def get_earthquakes(
         description="Maximum büyüklük (0-10)"
     ),
     limit: int = Query(
-        default=1000,
+        default=earthquake_cache.DEFAULT_PAGE_SIZE,
         ge=1,
-        le=5000,
-        description="Sonuç limiti (max: 5000)"
+        le=earthquake_cache.MAX_PAGE_SIZE,
+        description=f"Sayfa boyutu (max: {earthquake_cache.MAX_PAGE_SIZE}); devamı metadata.next_cursor ile"
+    ),
+    deduplicate: bool = Query(
+        default=False,
+        description="Birden fazla kaynakta görülen depremleri tek kanonik kayıtta birleştir"
     ),
-) -> dict[str, Any]:
+    sources: str | None = Query(default=None, description=SOURCES_DESCRIPTION),
+    bbox: str | None = Query(
+        default=None,
+        description="Alan: batı,güney,doğu,kuzey (derece; batı > doğu 180. meridyeni geçer)"
+    ),
+    lat: float | None = Query(default=None, ge=-90, le=90, description="Alan merkezi enlemi"),
+    lon: float | None = Query(default=None, ge=-180, le=180, description="Alan merkezi boylamı"),
+    radius_km: float | None = Query(
+        default=None,
+        gt=0,
+        le=20000,
+        description="Merkezden yarıçap (km); lat ve lon ile birlikte, bbox yerine"
+    ),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
+) -> Response:
     """
     USGS'ten deprem verilerini getirir.
 
     Veriler GeoJSON formatında döner ve USGS Earthquake Catalog'dan alınır.
-    Sonuçlar 60 saniye süreyle cache'lenir.
+    Sonuçlar 60 saniye süreyle cache'lenir. Süresi geçmiş kayıtlar arka planda
+    yenilenirken, upstream hatalarında ise bayat veri ``metadata.stale`` ile döner.
+    ``deduplicate=true`` ile her deprem bir kez döner; diğer kaynakların
+    kayıtları ``properties.source_events`` altında yer alır.
+
+    Kaynaklar paralel ve ortak bir süre sınırıyla sorgulanır; geç kalan ya da
+    hata veren kaynaklar ``metadata.sources`` içinde raporlanır ve sonuç
+    ``metadata.partial`` ile eldeki kaynaklardan döner.
+
+    Yanıt gövdesi cache kaydıyla birlikte bir kez serileştirilir ve
+    ``Accept-Encoding``'e göre brotli / gzip sıkıştırılmış gönderilir.
+    Yanıtlar event kümesinden türetilen bir ETag taşır; ``If-None-Match``
+    eşleşirse 304 döner.
+
+    ``bbox`` ya da ``lat``/``lon``/``radius_km`` ile sonuç bir alanla
+    sınırlanır: USGS ve EMSC'ye kendi parametreleriyle iletilir, Kandilli
+    listesi konum indeksiyle süzülür. Daha geniş (ör. tüm dünya) taze bir
+    sorgunun kapsadığı alanlar upstream'e gitmeden cevaplanır.
+
+    Sonuç ``limit`` boyutlu sayfalar halinde döner; devamı varsa
+    ``metadata.next_cursor`` ``cursor`` parametresiyle istenir
+    (``metadata.total`` toplam kayıt sayısıdır). Upstream üst sınırına
+    takılan pencerelerin kalanı paralel zaman parçalarıyla çekilir.
 
     Returns:
         GeoJSON FeatureCollection with earthquake data
     """
     try:
-        data = await earthquake_cache.get_earthquakes(
+        payload = await earthquake_cache.get_earthquakes_payload(
             start_time=start_time,
             end_time=end_time,
             min_magnitude=min_magnitude,
             max_magnitude=max_magnitude,
             limit=limit,
+            deduplicate=deduplicate,
+            sources=_parse_sources(sources),
+            bbox=_parse_bbox(bbox),
+            lat=lat,
+            lon=lon,
+            radius_km=radius_km,
+            cursor=cursor,
         )
-        return data
+        return await _payload_response(request, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {e}") from e
+
+
+@router.get("/clusters")
+async def get_earthquake_clusters(
+    request: Request,
+    zoom: int = Query(
+        ge=0,
+        le=MAX_ZOOM,
+        description=f"Harita zoom seviyesi (0-{MAX_ZOOM})"
+    ),
+    bbox: str | None = Query(
+        default=None,
+        description="Görünen alan: batı,güney,doğu,kuzey (derece). Default: tüm dünya"
+    ),
+    start_time: datetime | None = Query(
+        default=None,
+        description="Başlangıç zamanı (ISO8601 format). Default: 24 saat önce"
+    ),
+    end_time: datetime | None = Query(
+        default=None,
+        description="Bitiş zamanı (ISO8601 format). Default: şimdi"
+    ),
+    min_magnitude: float = Query(
+        default=2.5,
+        ge=0,
+        le=10,
+        description="Minimum büyüklük (0-10)"
+    ),
+    max_magnitude: float | None = Query(
+        default=None,
+        ge=0,
+        le=10,
+        description="Maximum büyüklük (0-10)"
+    ),
+    deduplicate: bool = Query(
+        default=True,
+        description="Birden fazla kaynakta görülen depremleri tek say"
+    ),
+    sources: str | None = Query(default=None, description=SOURCES_DESCRIPTION),
+) -> Response:
+    """
+    Harita için ızgara hücrelerinde toplanmış depremler.
+
+    Her feature bir hücredir (256 px karoda 64 px): konumu hücredeki
+    depremlerin ağırlık merkezi, ``properties.count`` deprem sayısı,
+    ``properties.max_mag`` en büyük büyüklüktür. Sorgu parametreleri
+    ``/earthquakes`` ile aynıdır ve aynı cache kaydını kullanır; hücreler
+    kayıt ve zoom başına bir kez hesaplanır.
+
+    Returns:
+        GeoJSON FeatureCollection of cluster points
+    """
+    try:
+        data = await earthquake_cache.get_earthquake_clusters(
+            zoom,
+            bbox=_parse_bbox(bbox),
+            deduplicate=deduplicate,
+            start_time=start_time,
+            end_time=end_time,
+            min_magnitude=min_magnitude,
+            max_magnitude=max_magnitude,
+            sources=_parse_sources(sources),
+        )
+        return await _payload_response(request, EncodedPayload(lambda: data))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {e}") from e
+
+
+@router.get("/near")
+async def get_nearest_earthquakes(
+    request: Request,
+    lat: float = Query(ge=-90, le=90, description="Referans noktanın enlemi"),
+    lon: float = Query(ge=-180, le=180, description="Referans noktanın boylamı"),
+    k: int = Query(default=10, ge=1, le=100, description="Dönülecek en yakın deprem sayısı (max: 100)"),
+    start_time: datetime | None = Query(
+        default=None,
+        description="Başlangıç zamanı (ISO8601 format). Default: 24 saat önce"
+    ),
+    end_time: datetime | None = Query(
+        default=None,
+        description="Bitiş zamanı (ISO8601 format). Default: şimdi"
+    ),
+    min_magnitude: float = Query(
+        default=2.5,
+        ge=0,
+        le=10,
+        description="Minimum büyüklük (0-10)"
+    ),
+    max_magnitude: float | None = Query(
+        default=None,
+        ge=0,
+        le=10,
+        description="Maximum büyüklük (0-10)"
+    ),
+    deduplicate: bool = Query(
+        default=True,
+        description="Birden fazla kaynakta görülen depremleri tek say"
+    ),
+    sources: str | None = Query(default=None, description=SOURCES_DESCRIPTION),
+) -> Response:
+    """
+    Bir noktaya en yakın depremler.
+
+    Sorgu parametreleri ``/earthquakes`` ile aynıdır ve aynı cache kaydını
+    kullanır; kayıt başına bir kez kurulan KD-tree ile en yakın ``k`` deprem
+    döner. Her feature ``properties.distance_km`` (büyük daire uzaklığı)
+    taşır; sıralama en yakından uzağa doğrudur.
+
+    Returns:
+        GeoJSON FeatureCollection of the nearest earthquakes
+    """
+    try:
+        data = await earthquake_cache.get_nearest_earthquakes(
+            lat,
+            lon,
+            k=k,
+            deduplicate=deduplicate,
+            start_time=start_time,
+            end_time=end_time,
+            min_magnitude=min_magnitude,
+            max_magnitude=max_magnitude,
+            sources=_parse_sources(sources),
+        )
+        return await _payload_response(request, EncodedPayload(lambda: data))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except RuntimeError as e:
         raise HTTPException(status_code=503, detail=str(e)) from e
     except Exception as e:
@@ -69,53 +316,72 @@ async def get_earthquakes(
 
 @router.get("/presets/today")
 async def get_earthquakes_today(
+    request: Request,
     min_magnitude: float = Query(default=2.5, ge=0, le=10),
-) -> dict[str, Any]:
+    deduplicate: bool = Query(default=False),
+    sources: str | None = Query(default=None, description=SOURCES_DESCRIPTION),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
+) -> Response:
     """Son 24 saatteki depremler."""
-    end_time = datetime.utcnow()
-    start_time = end_time - timedelta(hours=24)
-
     try:
-        return await earthquake_cache.get_earthquakes(
-            start_time=start_time,
-            end_time=end_time,
+        # Relative window: cache key does not depend on the current time
+        payload = await earthquake_cache.get_earthquakes_payload(
+            window=timedelta(hours=24),
             min_magnitude=min_magnitude,
+            deduplicate=deduplicate,
+            sources=_parse_sources(sources),
+            cursor=cursor,
         )
+        return await _payload_response(request, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except RuntimeError as e:
         raise HTTPException(status_code=503, detail=str(e)) from e
 
 
 @router.get("/presets/week")
 async def get_earthquakes_week(
+    request: Request,
     min_magnitude: float = Query(default=4.0, ge=0, le=10),
-) -> dict[str, Any]:
+    deduplicate: bool = Query(default=False),
+    sources: str | None = Query(default=None, description=SOURCES_DESCRIPTION),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
+) -> Response:
     """Son 7 gündeki depremler (default min mag: 4.0)."""
-    end_time = datetime.utcnow()
-    start_time = end_time - timedelta(days=7)
-
     try:
-        return await earthquake_cache.get_earthquakes(
-            start_time=start_time,
-            end_time=end_time,
+        payload = await earthquake_cache.get_earthquakes_payload(
+            window=timedelta(days=7),
             min_magnitude=min_magnitude,
+            deduplicate=deduplicate,
+            sources=_parse_sources(sources),
+            cursor=cursor,
         )
+        return await _payload_response(request, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except RuntimeError as e:
         raise HTTPException(status_code=503, detail=str(e)) from e
 
 
 @router.get("/presets/month")
 async def get_earthquakes_month(
+    request: Request,
     min_magnitude: float = Query(default=5.0, ge=0, le=10),
-) -> dict[str, Any]:
+    deduplicate: bool = Query(default=False),
+    sources: str | None = Query(default=None, description=SOURCES_DESCRIPTION),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
+) -> Response:
     """Son 30 gündeki depremler (default min mag: 5.0)."""
-    end_time = datetime.utcnow()
-    start_time = end_time - timedelta(days=30)
-
     try:
-        return await earthquake_cache.get_earthquakes(
-            start_time=start_time,
-            end_time=end_time,
+        payload = await earthquake_cache.get_earthquakes_payload(
+            window=timedelta(days=30),
             min_magnitude=min_magnitude,
+            deduplicate=deduplicate,
+            sources=_parse_sources(sources),
+            cursor=cursor,
         )
+        return await _payload_response(request, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except RuntimeError as e:
         raise HTTPException(status_code=503, detail=str(e)) from e
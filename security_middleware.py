@@ -2,12 +2,23 @@
 Security middleware and utilities for MetinAnaliz API
 Provides protection against common web vulnerabilities
 """
+import asyncio
+import json
+import math
 import re
-from fastapi import HTTPException, Request
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+import time
+from fastapi import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import html
-from typing import Optional
+from typing import Dict, Optional
+
+from services.metrics import registry, stage
+
+SECURITY_REJECTIONS = registry.counter(
+    "security_rejections_total",
+    "Requests rejected by SecurityMiddleware.",
+    ("reason",),
+)
 
 
 # ============================================
@@ -81,114 +92,398 @@ def validate_text_content(text: str) -> None:
 
 
 # ============================================
-# 2. RATE LIMITING MIDDLEWARE
+# 2. RATE LIMITING
 # ============================================
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class TokenBucketLimiter:
     """
-    Simple in-memory rate limiting middleware.
+    Simple in-memory, cost-weighted rate limiter.
     For production, use Redis-based rate limiting.
+
+    Every client gets a token bucket holding ``requests_per_minute`` tokens
+    that refills continuously. A request costs one token plus one token per
+    ``bytes_per_token`` of declared body size; once the response starts the
+    handler's CPU time is charged as well (one token per ``seconds_per_token``,
+    at most ``max_charge_seconds`` per request), so heavy uploads and
+    CPU-bound endpoints drain the budget faster than pings.
     """
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
+    def __init__(
+        self,
+        requests_per_minute: int = 60,
+        bytes_per_token: int = 64 * 1024,
+        seconds_per_token: float = 0.25,
+        max_charge_seconds: float = 2.0,
+    ):
         self.requests_per_minute = requests_per_minute
-        self.request_counts: dict = {}
-
-    async def dispatch(self, request: Request, call_next):
-        # Get client IP
-        client_ip = request.client.host if request.client else "unknown"
+        self.bytes_per_token = bytes_per_token
+        self.seconds_per_token = seconds_per_token
+        self.max_charge_seconds = max_charge_seconds
+        self.refill_per_second = requests_per_minute / 60
+        self.buckets: dict = {}  # client_ip -> [tokens, last_refill]
+        self._last_prune = time.monotonic()
+
+    def request_cost(self, content_length: Optional[int]) -> float:
+        """Upfront token cost of a request based on its declared body size."""
+        cost = 1.0
+        if content_length:
+            cost += content_length / self.bytes_per_token
+        return min(cost, float(self.requests_per_minute))
+
+    def acquire(self, client_ip: str, cost: float) -> Optional[int]:
+        """
+        Take ``cost`` tokens from the client's bucket.
+
+        Returns None when the request is admitted, otherwise the number of
+        seconds the client should wait (for the Retry-After header).
+        """
+        now = time.monotonic()
+        self._prune(now)
+        bucket = self._refill(client_ip, now)
+        if bucket[0] < cost:
+            retry_after = math.ceil((cost - bucket[0]) / self.refill_per_second)
+            return max(1, retry_after)
+        bucket[0] -= cost
+        return None
+
+    def charge(self, client_ip: str, seconds: float) -> None:
+        """
+        Charge handler time after the fact (capped at ``max_charge_seconds``);
+        the bucket may go negative, which delays the client's next request
+        accordingly.
+        """
+        bucket = self.buckets.get(client_ip)
+        if bucket is not None:
+            bucket[0] -= min(seconds, self.max_charge_seconds) / self.seconds_per_token
+
+    def _refill(self, client_ip: str, now: float) -> list:
+        bucket = self.buckets.get(client_ip)
+        if bucket is None:
+            bucket = [float(self.requests_per_minute), now]
+            self.buckets[client_ip] = bucket
+        else:
+            elapsed = now - bucket[1]
+            bucket[0] = min(
+                float(self.requests_per_minute),
+                bucket[0] + elapsed * self.refill_per_second,
+            )
+            bucket[1] = now
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        # Drop buckets that have been idle long enough to be full again
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        idle_keys = [
+            key for key, (tokens, last) in self.buckets.items()
+            if tokens + (now - last) * self.refill_per_second >= self.requests_per_minute
+        ]
+        for key in idle_keys:
+            del self.buckets[key]
+
+
+class ConcurrencyLimiter:
+    """
+    Per-endpoint admission control.
 
-        # Simple rate limiting logic
-        import time
-        current_minute = int(time.time() / 60)
-        key = f"{client_ip}:{current_minute}"
+    ``limits`` maps a path prefix to the maximum number of requests that may
+    be in flight for it at once.
+    """
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = dict(limits)
+        self._semaphores = {
+            prefix: asyncio.Semaphore(limit) for prefix, limit in self.limits.items()
+        }
+        # Longest prefix first so "/pdf/merge" wins over "/pdf"
+        self._prefixes = sorted(self._semaphores, key=len, reverse=True)
 
-        # Clean old entries
-        old_keys = [k for k in self.request_counts.keys()
-                   if int(k.split(':')[1]) < current_minute - 1]
-        for old_key in old_keys:
-            del self.request_counts[old_key]
+    def semaphore_for(self, path: str) -> Optional[asyncio.Semaphore]:
+        for prefix in self._prefixes:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return self._semaphores[prefix]
+        return None
 
-        # Check rate limit
-        self.request_counts[key] = self.request_counts.get(key, 0) + 1
 
-        if self.request_counts[key] > self.requests_per_minute:
-            return JSONResponse(
-                status_code=429,
-                content={"detail": "Rate limit exceeded. Please try again later."}
-            )
+# ============================================
+# 3. SECURITY HEADERS
+# ============================================
 
-        response = await call_next(request)
-        return response
+SECURITY_HEADERS = {
+    # Content Security Policy - Prevent XSS
+    "Content-Security-Policy": (
+        "default-src 'self'; "
+        "script-src 'self' https://pagead2.googlesyndication.com https://www.googletagmanager.com 'unsafe-inline'; "
+        "style-src 'self' 'unsafe-inline'; "
+        "img-src 'self' data: https:; "
+        "font-src 'self' data:; "
+        "connect-src 'self'; "
+        "frame-ancestors 'none';"
+    ),
+    # Prevent clickjacking
+    "X-Frame-Options": "DENY",
+    # Prevent MIME type sniffing
+    "X-Content-Type-Options": "nosniff",
+    # Enable XSS filter in browsers
+    "X-XSS-Protection": "1; mode=block",
+    # Referrer policy
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    # Permissions policy (formerly Feature-Policy)
+    "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
+}
 
 
 # ============================================
-# 3. SECURITY HEADERS MIDDLEWARE
+# 4. COMBINED ASGI SECURITY MIDDLEWARE
 # ============================================
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """
-    Add security headers to all responses.
-    Protects against XSS, clickjacking, and other attacks.
-    """
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-
-        # Content Security Policy - Prevent XSS
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self' https://pagead2.googlesyndication.com https://www.googletagmanager.com 'unsafe-inline'; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data: https:; "
-            "font-src 'self' data:; "
-            "connect-src 'self'; "
-            "frame-ancestors 'none';"
+class RequestBodyTooLarge(HTTPException):
+    """Raised while streaming a request body that exceeds the size limit."""
+    def __init__(self, max_size: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Request body too large. Maximum size: {max_size} bytes",
         )
 
-        # Prevent clickjacking
-        response.headers["X-Frame-Options"] = "DENY"
 
-        # Prevent MIME type sniffing
-        response.headers["X-Content-Type-Options"] = "nosniff"
+class SecurityMiddleware:
+    """
+    Security headers, rate limiting, admission control and request size
+    limiting in a single raw ASGI middleware.
 
-        # Enable XSS filter in browsers
-        response.headers["X-XSS-Protection"] = "1; mode=block"
+    Unlike ``BaseHTTPMiddleware`` this does not spawn a task or wrap the
+    response stream per request: headers are appended to the
+    ``http.response.start`` message as precomputed bytes and the request body
+    is counted while it streams, so chunked uploads without Content-Length
+    are cut off with 413 as soon as they cross ``max_size``.
 
-        # Referrer policy
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+    Every feature is optional; pass None to disable it.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        security_headers: Optional[Dict[str, str]] = SECURITY_HEADERS,
+        requests_per_minute: Optional[int] = 60,
+        bytes_per_token: int = 64 * 1024,
+        seconds_per_token: float = 0.25,
+        max_charge_seconds: float = 2.0,
+        max_size: Optional[int] = 1024 * 1024,  # 1MB default
+        concurrency_limits: Optional[Dict[str, int]] = None,
+        queue_timeout: float = 0.5,
+        retry_after: int = 2,
+    ):
+        self.app = app
+        self.headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in (security_headers or {}).items()
+        ]
+        self._header_names = {name for name, _ in self.headers}
+        self.rate_limiter = (
+            TokenBucketLimiter(requests_per_minute, bytes_per_token, seconds_per_token, max_charge_seconds)
+            if requests_per_minute is not None else None
+        )
+        self.max_size = max_size
+        self.concurrency = ConcurrencyLimiter(concurrency_limits) if concurrency_limits else None
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+        handler_seconds: Optional[float] = None
+        # (monotonic, process_time) when the app is entered
+        started: Optional[tuple] = None
+
+        def handler_cost() -> float:
+            # Process CPU time (covers sync routes in the thread pool) stops
+            # the clock while awaiting upstreams; bounded by wall time because
+            # concurrent requests' CPU is counted too. Streaming the response
+            # to a slow client happens after http.response.start.
+            wall, cpu = started
+            return min(time.process_time() - cpu, time.monotonic() - wall)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started, handler_seconds
+            if message["type"] == "http.response.start":
+                response_started = True
+                if handler_seconds is None and started is not None:
+                    handler_seconds = handler_cost()
+                if self.headers:
+                    headers = [
+                        (name, value) for name, value in message.get("headers", [])
+                        if name.lower() not in self._header_names
+                    ]
+                    headers.extend(self.headers)
+                    message["headers"] = headers
+            await send(message)
+
+        content_length = None
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                content_length = int(value) if value.isdigit() else None
+                break
+
+        # Check declared Content-Length before reading anything
+        if (
+            self.max_size is not None
+            and scope["method"] in ("POST", "PUT", "PATCH")
+            and content_length is not None
+            and content_length > self.max_size
+        ):
+            SECURITY_REJECTIONS.inc("too_large")
+            await self._send_error(
+                send_wrapper, 413,
+                f"Request body too large. Maximum size: {self.max_size} bytes",
+            )
+            return
 
-        # Permissions policy (formerly Feature-Policy)
-        response.headers["Permissions-Policy"] = (
-            "geolocation=(), microphone=(), camera=()"
+        # Check rate limit
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+        if self.rate_limiter is not None:
+            wait = self.rate_limiter.acquire(
+                client_ip, self.rate_limiter.request_cost(content_length)
+            )
+            if wait is not None:
+                SECURITY_REJECTIONS.inc("rate_limit")
+                await self._send_error(
+                    send_wrapper, 429, "Rate limit exceeded. Please try again later.",
+                    retry_after=wait,
+                )
+                return
+
+        # Admission control: wait briefly for a slot, shed with 503 otherwise
+        semaphore = self.concurrency.semaphore_for(scope["path"]) if self.concurrency else None
+        if semaphore is not None:
+            try:
+                with stage("admission"):
+                    await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                SECURITY_REJECTIONS.inc("busy")
+                await self._send_error(
+                    send_wrapper, 503, "Server is busy. Please try again later.",
+                    retry_after=self.retry_after,
+                )
+                return
+
+        receive_wrapper = receive
+        if self.max_size is not None:
+            max_size = self.max_size
+            received = 0
+
+            async def receive_wrapper() -> Message:
+                nonlocal received
+                message = await receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > max_size:
+                        SECURITY_REJECTIONS.inc("too_large")
+                        raise RequestBodyTooLarge(max_size)
+                return message
+
+        started = (time.monotonic(), time.process_time())
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except RequestBodyTooLarge as exc:
+            # Normally turned into a 413 by the app's exception handling;
+            # this covers apps that let it propagate.
+            if response_started:
+                raise
+            await self._send_error(send_wrapper, exc.status_code, exc.detail)
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+            if self.rate_limiter is not None:
+                if handler_seconds is None:
+                    handler_seconds = handler_cost()
+                self.rate_limiter.charge(client_ip, handler_seconds)
+
+    @staticmethod
+    async def _send_error(
+        send: Send,
+        status_code: int,
+        detail: str,
+        retry_after: Optional[int] = None,
+    ) -> None:
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ]
+        if retry_after is not None:
+            headers.append((b"retry-after", str(retry_after).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware(SecurityMiddleware):
+    """Cost-weighted rate limiting only (see ``TokenBucketLimiter``)."""
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_minute: int = 60,
+        bytes_per_token: int = 64 * 1024,
+        seconds_per_token: float = 0.25,
+        max_charge_seconds: float = 2.0,
+    ):
+        super().__init__(
+            app,
+            security_headers=None,
+            requests_per_minute=requests_per_minute,
+            bytes_per_token=bytes_per_token,
+            seconds_per_token=seconds_per_token,
+            max_charge_seconds=max_charge_seconds,
+            max_size=None,
         )
 
-        return response
 
+class ConcurrencyLimitMiddleware(SecurityMiddleware):
+    """
+    Per-endpoint admission control only.
 
-# ============================================
-# 4. REQUEST SIZE LIMITER
-# ============================================
+    Requests over the cap wait up to ``queue_timeout`` seconds for a slot and
+    are shed with 503 + Retry-After otherwise, so an overloaded worker
+    rejects work instead of falling over.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        limits: Optional[Dict[str, int]] = None,
+        queue_timeout: float = 0.5,
+        retry_after: int = 2,
+    ):
+        super().__init__(
+            app,
+            security_headers=None,
+            requests_per_minute=None,
+            max_size=None,
+            concurrency_limits=limits,
+            queue_timeout=queue_timeout,
+            retry_after=retry_after,
+        )
 
-class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
+
+class SecurityHeadersMiddleware(SecurityMiddleware):
     """
-    Limit request body size to prevent memory exhaustion attacks.
+    Add security headers to all responses.
+    Protects against XSS, clickjacking, and other attacks.
     """
-    def __init__(self, app, max_size: int = 1024 * 1024):  # 1MB default
-        super().__init__(app)
-        self.max_size = max_size
+    def __init__(self, app: ASGIApp):
+        super().__init__(app, requests_per_minute=None, max_size=None)
 
-    async def dispatch(self, request: Request, call_next):
-        if request.method in ["POST", "PUT", "PATCH"]:
-            # Check Content-Length header
-            content_length = request.headers.get("content-length")
-            if content_length and int(content_length) > self.max_size:
-                return JSONResponse(
-                    status_code=413,
-                    content={"detail": f"Request body too large. Maximum size: {self.max_size} bytes"}
-                )
 
-        response = await call_next(request)
-        return response
+class RequestSizeLimitMiddleware(SecurityMiddleware):
+    """
+    Limit request body size to prevent memory exhaustion attacks.
+    """
+    def __init__(self, app: ASGIApp, max_size: int = 1024 * 1024):  # 1MB default
+        super().__init__(
+            app,
+            security_headers=None,
+            requests_per_minute=None,
+            max_size=max_size,
+        )
 
 
 # ============================================
@@ -247,19 +542,20 @@ To use these security features, update your main.py:
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from security_middleware import (
-    RateLimitMiddleware,
-    SecurityHeadersMiddleware,
-    RequestSizeLimitMiddleware,
+    SecurityMiddleware,
     sanitize_text_input,
     validate_text_content,
 )
 
 app = FastAPI(title="Metin Analiz API")
 
-# Add security middleware
-app.add_middleware(SecurityHeadersMiddleware)
-app.add_middleware(RateLimitMiddleware, requests_per_minute=60)
-app.add_middleware(RequestSizeLimitMiddleware, max_size=1024 * 1024)  # 1MB
+# Add security middleware (headers, rate limit, admission control, size limit)
+app.add_middleware(
+    SecurityMiddleware,
+    requests_per_minute=60,
+    max_size=1024 * 1024,  # 1MB
+    concurrency_limits={"/analyze": 8, "/export": 4, "/pdf": 2},
+)
 
 # Configure CORS properly
 app.add_middleware(
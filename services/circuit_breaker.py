@@ -0,0 +1,201 @@
+"""
+Circuit Breaker
+Upstream kaynaklar için devre kesici ve son gecikmelere göre uyarlanan timeout.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from cachetools import LRUCache
+
+from services.metrics import registry
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = registry.gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state (0=closed, 1=half_open, 2=open).",
+    ("name",),
+)
+CIRCUIT_REJECTIONS = registry.counter(
+    "circuit_breaker_rejections_total",
+    "Calls skipped because the circuit was open.",
+    ("name",),
+)
+CIRCUIT_TIMEOUTS = registry.counter(
+    "circuit_breaker_timeouts_total",
+    "Calls that exceeded the adaptive timeout.",
+    ("name",),
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """Devre açıkken yapılan çağrı; upstream'e hiç gidilmedi."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} circuit open, retry in {math.ceil(retry_in)}s")
+        self.retry_in = retry_in
+
+
+class LatencyTracker:
+    """Son ``size`` başarılı çağrının süresini tutar ve yüzdelik hesaplar."""
+
+    def __init__(self, size: int = 50):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """``q`` (0-1) yüzdeliği; örnek yoksa None."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Kaynak başına closed / open / half-open devre kesici.
+
+    Art arda ``failure_threshold`` hata devreyi açar; açık devre çağrıları
+    upstream'e gitmeden ``CircuitOpenError`` ile reddeder. ``reset_timeout``
+    sonra tek bir deneme (half-open) yapılır: başarılıysa devre kapanır,
+    değilse yeniden açılır.
+
+    Timeout, son başarılı çağrıların ``timeout_percentile`` yüzdeliğinin
+    ``timeout_multiplier`` katıdır ve [min_timeout, max_timeout] aralığında
+    tutulur. Gecikmeler çağıranın verdiği ``size_class`` başına ayrı tutulur
+    (ör. pencere uzunluğu); küçük sorgulardan öğrenilen timeout büyük bir
+    sorguyu kesmez. Sınıfın yeterli örneği yoksa max_timeout kullanılır.
+    """
+
+    MIN_SAMPLES = 5
+    # Size classes whose latencies are kept; least recently used ones are dropped
+    MAX_SIZE_CLASSES = 64
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        min_timeout: float = 0.5,
+        max_timeout: float = 3.0,
+        timeout_percentile: float = 0.95,
+        timeout_multiplier: float = 2.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max(min_timeout, max_timeout)
+        self.timeout_percentile = timeout_percentile
+        self.timeout_multiplier = timeout_multiplier
+        self.latency = LatencyTracker()
+        self._class_latency: LRUCache = LRUCache(maxsize=self.MAX_SIZE_CLASSES)
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_running = False
+        CIRCUIT_STATE.set(_STATE_VALUES[CLOSED], name)
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._retry_in() <= 0:
+            return HALF_OPEN
+        return self._state
+
+    def latency_for(self, size_class: Hashable = None) -> LatencyTracker:
+        """``size_class``'ın gecikme örnekleri (None: sınıfsız çağrılar)."""
+        if size_class is None:
+            return self.latency
+        tracker = self._class_latency.get(size_class)
+        if tracker is None:
+            tracker = self._class_latency[size_class] = LatencyTracker()
+        return tracker
+
+    def timeout(self, size_class: Hashable = None) -> float:
+        latency = self.latency_for(size_class)
+        if len(latency) < self.MIN_SAMPLES:
+            return self.max_timeout
+        adaptive = latency.percentile(self.timeout_percentile) * self.timeout_multiplier
+        return min(self.max_timeout, max(self.min_timeout, adaptive))
+
+    async def call(self, func: Callable[[], Awaitable[T]], size_class: Hashable = None) -> T:
+        """
+        ``func()``'ı ``size_class``'ın adaptif timeout'u ile çalıştırır.
+
+        Raises:
+            CircuitOpenError: Devre açık (veya half-open denemesi sürüyor)
+            RuntimeError: Timeout
+        """
+        self._before_call()
+        timeout = self.timeout(size_class)
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(func(), timeout=timeout)
+        except asyncio.CancelledError:
+            # Cancelled by the caller (e.g. request deadline): not the source's fault
+            self._probe_running = False
+            raise
+        except asyncio.TimeoutError as exc:
+            CIRCUIT_TIMEOUTS.inc(self.name)
+            self._record_failure()
+            raise RuntimeError(f"Timeout after {timeout:.1f}s") from exc
+        except Exception:
+            self._record_failure()
+            raise
+        self._record_success(time.perf_counter() - started, size_class)
+        return result
+
+    def status(self) -> dict[str, Any]:
+        return {"state": self.state, "timeout_s": round(self.timeout(), 2)}
+
+    def _before_call(self) -> None:
+        if self._state == CLOSED:
+            return
+        if self._state == OPEN and self._retry_in() > 0:
+            CIRCUIT_REJECTIONS.inc(self.name)
+            raise CircuitOpenError(self.name, self._retry_in())
+        if self._probe_running:
+            CIRCUIT_REJECTIONS.inc(self.name)
+            raise CircuitOpenError(self.name, self.reset_timeout)
+        self._set_state(HALF_OPEN)
+        self._probe_running = True
+
+    def _record_success(self, seconds: float, size_class: Hashable = None) -> None:
+        self.latency_for(size_class).record(seconds)
+        self._failures = 0
+        self._probe_running = False
+        if self._state != CLOSED:
+            print(f"[CIRCUIT] {self.name} closed")
+            self._set_state(CLOSED)
+
+    def _record_failure(self) -> None:
+        self._failures += 1
+        self._probe_running = False
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != OPEN:
+                print(f"[CIRCUIT] {self.name} open after {self._failures} failure(s)")
+            self._opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def _retry_in(self) -> float:
+        return self.reset_timeout - (time.monotonic() - self._opened_at)
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        CIRCUIT_STATE.set(_STATE_VALUES[state], self.name)
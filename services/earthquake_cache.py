@@ -4,21 +4,124 @@ USGS API için caching mekanizması sağlar.
 """
 from __future__ import annotations
 
+import base64
+import bisect
 import hashlib
 import json
+import math
+import os
 import re
+import time
 import asyncio
+from collections import Counter
 from datetime import datetime, timedelta, timezone
-from typing import Any, Iterable
+from functools import partial
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Iterable
 
-import httpx
-from cachetools import TTLCache
+from cachetools import LRUCache
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, LatencyTracker
+from services.earthquake_clusters import GridClusters
+from services.earthquake_event import Event, EventCollection
+from services.earthquake_index import EventLocationIndex, cluster_events
+from services.earthquake_live import LiveWindow
+from services.earthquake_nearest import NearestIndex
+from services.earthquake_region import BoundingBox, Region, parse_region
+from services.earthquake_store import EarthquakeStore
+from services.earthquake_stream import FeatureStream, PreBlockLines
+from services.metrics import registry, stage
+from services.response_encoding import EncodedPayload
+
+if TYPE_CHECKING:
+    import httpx
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class CacheEntry:
+    """
+    Cache'lenen sonuç (birleştirilmiş ya da kaynak düzeyinde), alındığı an
+    (monotonic) ve ilk istekte üretilen serileştirilmiş yanıtları, harita
+    ızgara özetleri ve en yakın deprem indeksi.
+    """
+
+    __slots__ = (
+        "data", "created_at", "fresh_for", "coverage", "payloads", "stale_payloads", "pages", "clusters", "nearest",
+    )
+
+    # Encoded pages kept per entry; cursors and limits are client-chosen
+    MAX_PAYLOADS = 8
+
+    def __init__(
+        self,
+        data: Any,
+        fresh_for: float,
+        coverage: dict[str, Any] | None = None,
+    ):
+        self.data = data
+        self.created_at = time.monotonic()
+        self.fresh_for = fresh_for
+        # Query this entry answers completely (see EarthquakeCache._find_covering)
+        self.coverage = coverage
+        # (deduplicate, limit, cursor) -> encoded response bodies (see get_earthquakes_payload)
+        self.payloads: LRUCache = LRUCache(maxsize=self.MAX_PAYLOADS)
+        # (page, error, age_seconds) -> stale-marked bodies (age_seconds is part of the body)
+        self.stale_payloads: LRUCache = LRUCache(maxsize=self.MAX_PAYLOADS)
+        # deduplicate -> (items, page keys) in page order (see EarthquakeCache._page_index)
+        self.pages: dict[bool, tuple[list[tuple[Event, str | None, list[Event]]], list[tuple[int, int, str]]]] = {}
+        # deduplicate -> grid clusters (see get_earthquake_clusters)
+        self.clusters: dict[bool, GridClusters] = {}
+        # deduplicate -> nearest-event index (see get_nearest_earthquakes)
+        self.nearest: dict[bool, NearestIndex] = {}
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+CACHE_REQUESTS = registry.counter(
+    "earthquake_cache_requests_total",
+    "Earthquake cache lookups by result.",
+    ("result",),
+)
+INFLIGHT_FETCHES = registry.gauge(
+    "earthquake_inflight_fetches",
+    "Upstream fetches currently in progress (one per cache key).",
+)
+COALESCED_REQUESTS = registry.counter(
+    "earthquake_coalesced_requests_total",
+    "Cache misses that joined an in-flight fetch instead of starting one.",
+)
+SOURCE_CACHE_REQUESTS = registry.counter(
+    "earthquake_source_cache_requests_total",
+    "Source-level cache lookups (raw upstream responses) by source and result.",
+    ("source", "result"),
+)
+POLL_EVENTS = registry.counter(
+    "earthquake_poll_events_total",
+    "Events received by the background poller (full window loads vs deltas).",
+    ("source", "kind"),
+)
+POLL_FAILURES = registry.counter(
+    "earthquake_poll_failures_total",
+    "Background poll requests that failed.",
+    ("source",),
+)
+KANDILLI_FETCHES = registry.counter(
+    "earthquake_kandilli_fetches_total",
+    "Kandilli list fetches by how they were answered "
+    "(primary, fallback after error, hedge_primary, hedge_fallback).",
+    ("result",),
+)
 
 
 class EarthquakeCache:
     """
     USGS Earthquake API için cache servisi.
-    TTLCache kullanarak API yanıtlarını önbelleğe alır.
+    Yanıtlar iki kademeli TTL ile önbelleğe alınır: ``ttl`` süresince taze,
+    ardından ``stale_ttl`` boyunca bayat kayıt hemen dönülüp arka planda
+    yenilenir (stale-while-revalidate). Upstream hata verirse
+    ``stale_if_error_ttl`` süresine kadar bayat veri ``metadata.stale``
+    işaretiyle sunulur (stale-if-error).
     """
 
     USGS_BASE_URL = "https://earthquake.usgs.gov/fdsnws/event/1/query"
@@ -26,27 +129,221 @@ class EarthquakeCache:
     KANDILLI_FALLBACK_URL = "https://www.koeri.boun.edu.tr/scripts/sondepremler.asp"
     EMSC_BASE_URL = "https://www.seismicportal.eu/fdsnws/event/1/query"
     DEFAULT_TTL = 60  # 60 seconds cache
+    # Past the TTL, serve the cached result immediately and refresh in background
+    STALE_TTL = int(os.getenv("EARTHQUAKE_STALE_SECONDS", "300"))
+    # When upstreams fail, keep serving entries up to this age (marked stale)
+    STALE_IF_ERROR_TTL = int(os.getenv("EARTHQUAKE_STALE_IF_ERROR_SECONDS", "3600"))
     MAX_CACHE_SIZE = 20
+    SOURCES = ("USGS", "Kandilli", "EMSC")
     SOURCE_TIMEOUT_SECONDS = 3
+    # All sources are fetched concurrently; whatever is late at the deadline is dropped
+    FETCH_DEADLINE_SECONDS = float(os.getenv("EARTHQUAKE_FETCH_DEADLINE_SECONDS", "8"))
+    # Results missing a source are refreshed sooner than complete ones
+    PARTIAL_TTL = 10
+    # Consecutive failures that open a source's circuit, and how long it stays open
+    BREAKER_FAILURES = int(os.getenv("EARTHQUAKE_BREAKER_FAILURES", "3"))
+    BREAKER_RESET_SECONDS = float(os.getenv("EARTHQUAKE_BREAKER_RESET_SECONDS", "30"))
+    # Start the Kandilli fallback once the primary is slower than this percentile of its latency
+    KANDILLI_HEDGE_PERCENTILE = 0.9
+    KANDILLI_HEDGE_DEFAULT_SECONDS = 1.0
+    # Persistent SQLite event store ("" disables it)
+    STORE_PATH = os.getenv("EARTHQUAKE_STORE_PATH", "data/earthquakes.sqlite3")
+    # Events younger than this may still be revised upstream and are always re-fetched
+    STORE_SETTLE_SECONDS = int(os.getenv("EARTHQUAKE_STORE_SETTLE_SECONDS", "3600"))
+    # Background delta polling of USGS/EMSC (0 disables); window and magnitude it keeps live
+    POLL_SECONDS = int(os.getenv("EARTHQUAKE_POLL_SECONDS", "30"))
+    POLL_WINDOW_HOURS = int(os.getenv("EARTHQUAKE_POLL_WINDOW_HOURS", "168"))
+    POLL_MIN_MAGNITUDE = float(os.getenv("EARTHQUAKE_POLL_MIN_MAGNITUDE", "0"))
+    # USGS maximum per request; windows and shards are fetched up to this many events
+    MAX_UPSTREAM_LIMIT = 20000
+    # Page size of the API when no limit is given, and its upper bound
+    DEFAULT_PAGE_SIZE = 1000
+    MAX_PAGE_SIZE = 5000
+    POLL_LIMIT = MAX_UPSTREAM_LIMIT
+    # USGS/EMSC windows that hit MAX_UPSTREAM_LIMIT are completed with aligned time
+    # shards of SHARD_HOURS times a power of two (0 disables sharding)
+    SHARD_HOURS = int(os.getenv("EARTHQUAKE_SHARD_HOURS", "24"))
+    SHARD_PARALLELISM = int(os.getenv("EARTHQUAKE_SHARD_PARALLELISM", "4"))
+    # The shard fan-out has its own deadline instead of FETCH_DEADLINE_SECONDS
+    SHARD_DEADLINE_SECONDS = float(os.getenv("EARTHQUAKE_SHARD_DEADLINE_SECONDS", "30"))
+    MAX_SHARDS = 32
+    # Source responses for ranges older than STORE_SETTLE_SECONDS are kept this long
+    SETTLED_TTL = int(os.getenv("EARTHQUAKE_SETTLED_TTL_SECONDS", "900"))
+    # Source-level entries: room for the shards of a few long windows
+    SOURCE_CACHE_SIZE = 256
     TIME_TOLERANCE_MS = 5 * 60 * 1000
     COORD_TOLERANCE_DEG = 0.2
     MAG_TOLERANCE = 0.3
+    # Whose values the deduplicated feed keeps for an event seen by several sources
+    CANONICAL_SOURCE_PRIORITY = ("Kandilli", "USGS", "EMSC")
+    # Query windows are rounded to this many seconds before cache lookup
+    TIME_BUCKET_SECONDS = int(os.getenv("EARTHQUAKE_TIME_BUCKET_SECONDS", "60"))
 
-    def __init__(self, ttl: int = DEFAULT_TTL, max_size: int = MAX_CACHE_SIZE):
-        self._cache: TTLCache = TTLCache(maxsize=max_size, ttl=ttl)
+    def __init__(
+        self,
+        ttl: int = DEFAULT_TTL,
+        max_size: int = MAX_CACHE_SIZE,
+        time_bucket_seconds: int = TIME_BUCKET_SECONDS,
+        stale_ttl: int = STALE_TTL,
+        stale_if_error_ttl: int = STALE_IF_ERROR_TTL,
+        store_path: str = STORE_PATH,
+        poll_seconds: int = POLL_SECONDS,
+    ):
+        self._cache: LRUCache = LRUCache(maxsize=max_size)
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._stale_if_error_ttl = max(stale_if_error_ttl, ttl + stale_ttl)
+        self._time_bucket_seconds = max(1, time_bucket_seconds)
         self._client: httpx.AsyncClient | None = None
+        # cache_key -> fetch task shared by concurrent misses (single-flight)
+        self._inflight: dict[str, asyncio.Task] = {}
+        # Adaptive timeouts are capped by the request deadline (USGS) or SOURCE_TIMEOUT_SECONDS
+        self._breakers = {
+            source: CircuitBreaker(
+                f"earthquake_{source.lower()}",
+                failure_threshold=self.BREAKER_FAILURES,
+                reset_timeout=self.BREAKER_RESET_SECONDS,
+                max_timeout=self.FETCH_DEADLINE_SECONDS if source == "USGS" else self.SOURCE_TIMEOUT_SECONDS,
+            )
+            for source in self.SOURCES
+        }
+        self._kandilli_latency = LatencyTracker()
+        # Location index over the current Kandilli page (rebuilt when the page changes)
+        self._kandilli_index: EventLocationIndex | None = None
+        # Second layer: raw per-source responses, shared by every query that needs them
+        self._source_cache: LRUCache = LRUCache(maxsize=self.SOURCE_CACHE_SIZE)
+        self._source_inflight: dict[str, asyncio.Task] = {}
+        self._store = EarthquakeStore(store_path) if store_path else None
+        self._store_tasks: set[asyncio.Task] = set()
+        self._poll_seconds = poll_seconds
+        self._poll_task: asyncio.Task | None = None
+        # Kept current by the poller; a window is trusted for three missed polls
+        self._live = {
+            source: LiveWindow(
+                source,
+                window_ms=self.POLL_WINDOW_HOURS * 3600 * 1000,
+                min_magnitude=self.POLL_MIN_MAGNITUDE,
+                max_staleness=3 * poll_seconds,
+            )
+            for source in ("USGS", "EMSC")
+        }
 
     async def _get_client(self) -> httpx.AsyncClient:
         """Lazy initialization of async client."""
         if self._client is None or self._client.is_closed:
+            import httpx
+
             self._client = httpx.AsyncClient(timeout=30.0)
         return self._client
 
     async def close(self) -> None:
-        """Close the HTTP client."""
+        """Stop polling, close the HTTP client and the event store."""
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            await asyncio.gather(self._poll_task, return_exceptions=True)
+            self._poll_task = None
         if self._client and not self._client.is_closed:
             await self._client.aclose()
             self._client = None
+        if self._store is not None:
+            if self._store_tasks:
+                await asyncio.gather(*self._store_tasks, return_exceptions=True)
+            self._store.close()
+
+    def start_polling(self) -> asyncio.Task | None:
+        """
+        USGS ve EMSC için arka plan delta poller'ını başlatır.
+
+        Çalışan event loop içinden çağrılmalıdır. POLL_SECONDS 0 ise kapalıdır.
+        """
+        if self._poll_seconds > 0 and self._poll_task is None:
+            self._poll_task = asyncio.create_task(self._poll_loop())
+        return self._poll_task
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await asyncio.gather(*(self._poll_source(window) for window in self._live.values()))
+            await asyncio.sleep(self._poll_seconds)
+
+    async def _poll_source(self, window: LiveWindow) -> None:
+        """
+        Canlı pencereyi günceller.
+
+        İlk seferde (ya da sıfırlamadan sonra) tüm pencere çekilir; sonrasında
+        yalnızca ``updatedafter`` = high-water mark'tan sonra değişen olaylar
+        istenir ve pencereye uygulanır. Değişenler depoya da yazılır.
+        """
+        now = datetime.utcnow()
+        start = now - timedelta(milliseconds=window.window_ms)
+        full = not window.loaded
+        params: dict[str, Any] = {
+            "starttime": self._format_fdsn_time(start),
+            "minmagnitude": window.min_magnitude,
+            "limit": self.POLL_LIMIT,
+        }
+        if not full:
+            params["updatedafter"] = self._format_fdsn_time(
+                _EPOCH + timedelta(milliseconds=window.high_water_ms)
+            )
+        try:
+            if window.source == "USGS":
+                params.update(format="geojson", orderby="time")
+                if not full:
+                    params["includedeleted"] = "true"
+                events = (await self._fetch_usgs_events(params)).events
+            else:
+                params["format"] = "json"
+                events = await self._fetch_emsc_events(params)
+        except Exception as e:
+            POLL_FAILURES.inc(window.source)
+            print(f"[POLL] {window.source} {'full' if full else 'delta'} poll failed: {e}")
+            return
+
+        truncated = len(events) >= self.POLL_LIMIT
+        if truncated and not full:
+            # Too many changes for one delta: reload the whole window next time
+            window.reset()
+            return
+        complete_from = None
+        if full:
+            oldest = min((event.time for event in events), default=None)
+            complete_from = oldest if truncated and oldest is not None else self._to_utc_ms(start)
+        applied = window.apply(events, self._to_utc_ms(now), complete_from)
+        POLL_EVENTS.inc(window.source, "full" if full else "delta", amount=applied)
+
+        covered = None
+        if window.complete_from_ms is not None and self._settled_ms() > window.complete_from_ms:
+            covered = (window.complete_from_ms, self._settled_ms(), window.min_magnitude)
+        live = [event for event in events if not event.deleted]
+        # Retracted upstream: covered store ranges must stop serving them
+        deleted = [event.id for event in events if event.deleted]
+        self._save_to_store(window.source, live, covered, deleted)
+
+    def _read_live(self, source: str, query: dict[str, Any], info: dict[str, Any]) -> Any:
+        """
+        Sorgu poller'ın güncel tuttuğu pencere içindeyse sonucu yerelden üretir.
+
+        Upstream yanıtları gibi ``limit``'e takılan sonuç ``info``'da
+        ``truncated`` işaretlenir.
+        """
+        window = self._live.get(source)
+        start_ms = self._to_utc_ms(query["start_time"])
+        if window is None or not window.covers(start_ms, query["min_magnitude"]):
+            return None
+        events = window.query(
+            start_ms,
+            self._to_utc_ms(query["end_time"]),
+            query["min_magnitude"],
+            query["max_magnitude"],
+            query["limit"],
+            query["region"],
+        )
+        info["live"] = True
+        if len(events) >= query["limit"]:
+            info["truncated"] = True
+        if source == "USGS":
+            return EventCollection(self._empty_metadata(), events)
+        return events
 
     def _build_cache_key(self, params: dict[str, Any]) -> str:
         """
@@ -62,31 +359,833 @@ class EarthquakeCache:
         end_time: datetime | None = None,
         min_magnitude: float = 2.5,
         max_magnitude: float | None = None,
-        limit: int = 1000,
+        limit: int = DEFAULT_PAGE_SIZE,
+        window: timedelta | None = None,
+        deduplicate: bool = False,
+        sources: Iterable[str] | None = None,
+        bbox: Iterable[float] | None = None,
+        lat: float | None = None,
+        lon: float | None = None,
+        radius_km: float | None = None,
+        cursor: str | None = None,
     ) -> dict[str, Any]:
         """
         USGS'ten deprem verilerini çeker (cache'li).
 
         Args:
-            start_time: Başlangıç zamanı (default: 24 saat önce)
+            start_time: Başlangıç zamanı (default: end_time - window)
             end_time: Bitiş zamanı (default: şimdi)
             min_magnitude: Minimum büyüklük (default: 2.5)
             max_magnitude: Maximum büyüklük (opsiyonel)
-            limit: Sonuç limiti (default: 1000, max: 5000)
+            limit: Sayfa boyutu (default: 1000, max: 5000); devamı ``metadata.next_cursor`` ile
+            window: start_time verilmediğinde pencere uzunluğu (default: 24 saat)
+            deduplicate: Kaynaklar arası kopyalar yerine depremi başına tek kanonik kayıt
+            sources: Sorgulanacak kaynaklar (default: hepsi; büyük/küçük harf duyarsız)
+            bbox: (batı, güney, doğu, kuzey) derece kutusu
+            lat, lon, radius_km: Merkez ve yarıçap (bbox ile birlikte kullanılamaz)
+            cursor: Önceki sayfanın ``metadata.next_cursor`` değeri
 
         Returns:
             USGS GeoJSON response
+
+        Raises:
+            ValueError: Bilinmeyen kaynak adı, geçersiz alan ya da cursor
+            RuntimeError: Hiçbir kaynaktan veri alınamadı (ve bayat veri yok)
+        """
+        after = self._decode_cursor(cursor)
+        entry, stale, error = await self._lookup(
+            start_time, end_time, min_magnitude, max_magnitude, window, sources,
+            bbox, lat, lon, radius_km,
+        )
+        data = self._view(entry, deduplicate, self._clamp_limit(limit), after)
+        return self._mark_stale(entry, data, error) if stale else data
+
+    async def get_earthquakes_payload(
+        self,
+        deduplicate: bool = False,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        **query: Any,
+    ) -> EncodedPayload:
+        """
+        ``get_earthquakes`` ile aynı sorgu; yanıtı serileştirilmiş bayt olarak döner.
+
+        JSON gövdesi ve sıkıştırılmış varyantları cache kaydının yanında
+        (sayfa başına) saklanır; böylece bir cache hit hazır baytların
+        gönderilmesinden ibarettir. ETag event kümesinin özetinden
+        (``fingerprint``) ve sayfadan, Last-Modified en yeni ``updated``
+        değerinden üretilir. Bayat yanıtlar ``age_seconds`` değiştikçe (en
+        fazla saniyede bir) yeniden üretilir; ETag'leri yalnızca 304
+        kararında kullanılır ve 304 dönülürse gövde hiç üretilmez.
+        """
+        after = self._decode_cursor(cursor)
+        limit = self._clamp_limit(limit)
+        entry, stale, error = await self._lookup(**query)
+        data: EventCollection = entry.data
+        validator = f"{data.fingerprint()}-dedup" if deduplicate else data.fingerprint()
+        if limit != self.DEFAULT_PAGE_SIZE or cursor:
+            validator += f"-{limit}-{cursor or ''}"
+        validators = {"validator": validator, "last_modified": data.last_modified()}
+        page = (deduplicate, limit, cursor or None)
+        if stale:
+            # The body differs from the fresh one (stale marker), but a client
+            # holding this event set can still get a 304; rendered only if it cannot
+            key = (page, error, int(entry.age))
+            payload = entry.stale_payloads.get(key)
+            if payload is None:
+                payload = entry.stale_payloads[key] = EncodedPayload(
+                    lambda: self._mark_stale(entry, self._view(entry, deduplicate, limit, after), error),
+                    revalidate_only=True,
+                    **validators,
+                )
+            return payload
+        payload = entry.payloads.get(page)
+        if payload is None:
+            payload = entry.payloads[page] = EncodedPayload(
+                partial(self._view, entry, deduplicate, limit, after), **validators,
+            )
+        return payload
+
+    async def get_earthquake_clusters(
+        self,
+        zoom: int,
+        bbox: tuple[float, float, float, float] | None = None,
+        deduplicate: bool = True,
+        **query: Any,
+    ) -> dict[str, Any]:
+        """
+        Sorgunun depremlerini harita için ızgara hücrelerinde toplar.
+
+        Hücreler (Web Mercator, 64 px) her cache kaydı ve zoom seviyesi için
+        bir kez hesaplanır; istek yalnızca ``bbox`` ile kesişenleri süzer.
+        Varsayılan olarak kaynaklar arası kopyalar tek deprem sayılır.
+
+        Args:
+            zoom: Harita zoom seviyesi (0-MAX_ZOOM)
+            bbox: (batı, güney, doğu, kuzey) derece; None ise tüm dünya
+            deduplicate: Eşleşme gruplarını tek deprem say
+            **query: ``get_earthquakes`` sorgu parametreleri
+
+        Returns:
+            GeoJSON FeatureCollection; her feature bir hücre (count, max_mag)
+        """
+        bbox = BoundingBox.from_values(bbox).as_tuple() if bbox is not None else None
+        entry, stale, error = await self._lookup(**query)
+        clusters = entry.clusters.get(deduplicate)
+        if clusters is None:
+            with stage("cluster_index"):
+                collection: EventCollection = entry.data
+                events = [item[0] for item in self._page_index(entry, True)[0]] if deduplicate else collection.events
+                clusters = entry.clusters[deduplicate] = GridClusters(events)
+        with stage("clusters"):
+            features = clusters.query(zoom, bbox)
+
+        metadata = {
+            key: entry.data.metadata[key]
+            for key in ("generated", "sources", "partial")
+            if key in entry.data.metadata
+        }
+        metadata.update({
+            "zoom": zoom,
+            "bbox": list(bbox) if bbox is not None else None,
+            "count": len(features),
+            "events": sum(feature["properties"]["count"] for feature in features),
+            "deduplicated": deduplicate,
+        })
+        data = {"type": "FeatureCollection", "metadata": metadata, "features": features}
+        return self._mark_stale(entry, data, error) if stale else data
+
+    async def get_nearest_earthquakes(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 10,
+        deduplicate: bool = True,
+        **query: Any,
+    ) -> dict[str, Any]:
+        """
+        Sorgunun depremlerinden (lat, lon) noktasına en yakın ``k`` tanesi.
+
+        İndeks (birim küre üzerinde KD-tree) cache kaydı başına bir kez
+        kurulur; kayıt yenilendiğinde önceki neslin ağacı değişmeyen
+        depremler için yeniden kullanılır. Her feature
+        ``properties.distance_km`` (büyük daire uzaklığı) taşır.
+
+        Args:
+            lat, lon: Referans nokta (derece)
+            k: Dönülecek deprem sayısı
+            deduplicate: Eşleşme gruplarını tek deprem say
+            **query: ``get_earthquakes`` sorgu parametreleri
+
+        Returns:
+            GeoJSON FeatureCollection, en yakın önce
+        """
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError("lat must be within [-90, 90] and lon within [-180, 180]")
+        entry, stale, error = await self._lookup(**query)
+        collection: EventCollection = entry.data
+        fingerprint = collection.fingerprint()
+        index = entry.nearest.get(deduplicate)
+        if index is None or index.fingerprint != fingerprint:
+            with stage("nearest_index"):
+                canonical, _ = self._page_index(entry, deduplicate)
+                items = (
+                    ((item[0].source, item[0].id or position), item, item[0].lat, item[0].lon)
+                    for position, item in enumerate(canonical)
+                )
+                if index is None:
+                    index = NearestIndex.build(items, fingerprint)
+                else:
+                    index = index.updated(items, fingerprint)
+                entry.nearest[deduplicate] = index
+        with stage("nearest"):
+            nearest = index.query(lat, lon, k)
+
+        features = []
+        for distance, (event, group, others) in nearest:
+            source_events = [other.summary() for other in others] if deduplicate and group else None
+            feature = event.to_feature(group, source_events=source_events)
+            feature["properties"]["distance_km"] = round(distance, 3)
+            features.append(feature)
+        metadata = {
+            key: collection.metadata[key]
+            for key in ("generated", "sources", "partial")
+            if key in collection.metadata
+        }
+        metadata.update({
+            "origin": [lon, lat],
+            "count": len(features),
+            "deduplicated": deduplicate,
+        })
+        data = {"type": "FeatureCollection", "metadata": metadata, "features": features}
+        return self._mark_stale(entry, data, error) if stale else data
+
+    async def _lookup(
+        self,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+        min_magnitude: float = 2.5,
+        max_magnitude: float | None = None,
+        window: timedelta | None = None,
+        sources: Iterable[str] | None = None,
+        bbox: Iterable[float] | None = None,
+        lat: float | None = None,
+        lon: float | None = None,
+        radius_km: float | None = None,
+    ) -> tuple[CacheEntry, bool, str | None]:
+        """
+        Sorguyu cevaplayacak cache kaydını bulur ya da çeker.
+
+        Kayıt penceredeki tüm event'leri tutar (kaynak başına
+        MAX_UPSTREAM_LIMIT'e kadar); sayfalama ``_view``'dadır.
+
+        Returns:
+            (kayıt, bayat mı, stale-if-error nedeni)
+        """
+        sources = self._normalize_sources(sources)
+        region = parse_region(bbox, lat, lon, radius_km)
+        start_time, end_time, window_key = self._normalize_window(start_time, end_time, window)
+
+        # Check cache
+        cache_key = self._build_cache_key({
+            **window_key,
+            "minmagnitude": min_magnitude,
+            "maxmagnitude": max_magnitude,
+            "sources": ",".join(sources),
+            "region": region.key() if region is not None else None,
+        })
+        query = {
+            "start_time": start_time,
+            "end_time": end_time,
+            "min_magnitude": min_magnitude,
+            "max_magnitude": max_magnitude,
+            "sources": sources,
+            "region": region,
+        }
+
+        entry: CacheEntry | None = self._cache.get(cache_key)
+        if entry is not None:
+            if entry.age < entry.fresh_for:
+                CACHE_REQUESTS.inc("hit")
+                return entry, False, None
+
+        covering = self._find_covering(query)
+        if covering is not None:
+            # Narrower than a fresh cached query: filter locally instead of fetching
+            CACHE_REQUESTS.inc("contained")
+            data = self._filter_entry(covering, query)
+            derived = CacheEntry(
+                data,
+                fresh_for=covering.fresh_for - covering.age,
+                coverage=self._coverage(query, data),
+            )
+            self._cache[cache_key] = derived
+            return derived, False, None
+
+        if entry is not None:
+            if entry.age < entry.fresh_for + self._stale_ttl:
+                # Stale-while-revalidate: answer now, refresh in background
+                CACHE_REQUESTS.inc("stale")
+                self._start_fetch(cache_key, query)
+                return entry, True, None
+        CACHE_REQUESTS.inc("miss")
+
+        task = self._start_fetch(cache_key, query)
+        try:
+            # shield(): a cancelled request (e.g. client disconnect) must not
+            # cancel the fetch that other requests are waiting on.
+            fresh = await asyncio.shield(task)
+        except RuntimeError as e:
+            # Stale-if-error: upstream outage, fall back to old data
+            if entry is not None and entry.age < self._stale_if_error_ttl:
+                CACHE_REQUESTS.inc("stale_if_error")
+                return entry, True, str(e)
+            raise
+        return fresh, False, None
+
+    def _view(
+        self,
+        entry: CacheEntry,
+        deduplicate: bool,
+        limit: int | None = None,
+        after: tuple[int, int, str] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Cache'teki event'lerden istenen GeoJSON sayfasını üretir.
+
+        Sıralama kaynaklardan bağımsız olarak zaman (yeni önce), sonra kaynak
+        (SOURCES sırası), sonra id'dir; ilk sayfa her kaynağın en yeni
+        depremlerini içerir. Cursor son dönen kaydın bu anahtarıdır (keyset). Böylece kayıt
+        yenilense de sayfalar kaymaz: yeni depremler ilk sayfaya girer,
+        sonraki sayfalar kaldığı yerden devam eder. Tekilleştirilmiş
+        görünümde anahtar grubun sıradaki ilk üyesidir. Birden fazla sayfa
+        varsa ``metadata.total`` ve (devamı varsa) ``metadata.next_cursor`` eklenir.
+        """
+        data: EventCollection = entry.data
+        items, keys = self._page_index(entry, deduplicate)
+        with stage("render"):
+            start = bisect.bisect_right(keys, after) if after is not None else 0
+            end = len(items) if limit is None else min(len(items), start + limit)
+            if deduplicate:
+                features = [
+                    event.to_feature(group, source_events=[other.summary() for other in others] if group else None)
+                    for event, group, others in items[start:end]
+                ]
+            else:
+                features = [event.to_feature(group) for event, group, _ in items[start:end]]
+
+            metadata = dict(data.metadata)
+            metadata["count"] = len(features)
+            if deduplicate:
+                metadata["deduplicated"] = True
+            if after is not None or end < len(items):
+                metadata["total"] = len(items)
+            if end < len(items):
+                metadata["next_cursor"] = self._encode_cursor(keys[end - 1])
+            return data.to_geojson(metadata, features)
+
+    def _page_index(
+        self,
+        entry: CacheEntry,
+        deduplicate: bool,
+    ) -> tuple[list[tuple[Event, str | None, list[Event]]], list[tuple[int, int, str]]]:
+        """
+        Kaydın (event, match_group, diğer kaynaklar) listesi ve sayfa anahtarları.
+
+        Kayıt başına ve görünüm başına bir kez hesaplanır; her sayfa isteği
+        yalnızca anahtarlarda ikili arama yapar.
+        """
+        index = entry.pages.get(deduplicate)
+        if index is None:
+            data: EventCollection = entry.data
+            with stage("page_index"):
+                if deduplicate:
+                    items = self._canonical(data)
+                    keys = [min(self._page_key(event) for event in (item[0], *item[2])) for item in items]
+                else:
+                    items = [(event, group, []) for event, group in zip(data.events, data.groups)]
+                    keys = [self._page_key(event) for event in data.events]
+            index = entry.pages[deduplicate] = (items, keys)
+        return index
+
+    def _page_key(self, event: Event) -> tuple[int, int, str]:
+        """Sayfalama sırası: zaman (yeni önce), kaynak, id."""
+        rank = self.SOURCES.index(event.source) if event.source in self.SOURCES else len(self.SOURCES)
+        return -(event.time or 0), rank, event.id or ""
+
+    def _encode_cursor(self, key: tuple[int, int, str]) -> str:
+        negative_time, rank, event_id = key
+        raw = json.dumps([-negative_time, rank, event_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str | None) -> tuple[int, int, str] | None:
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            time_ms, rank, event_id = json.loads(raw)
+            if not (isinstance(time_ms, int) and isinstance(rank, int) and isinstance(event_id, str)):
+                raise TypeError
+        except (ValueError, TypeError) as e:
+            raise ValueError("Invalid cursor") from e
+        return -time_ms, rank, event_id
+
+    @classmethod
+    def _clamp_limit(cls, limit: int) -> int:
+        return min(max(1, limit), cls.MAX_PAGE_SIZE)
+
+    def _start_fetch(self, cache_key: str, query: dict[str, Any]) -> asyncio.Task:
+        """Anahtar için çalışan fetch'i döner, yoksa başlatır (single-flight)."""
+        task = self._inflight.get(cache_key)
+        if task is not None:
+            COALESCED_REQUESTS.inc()
+            return task
+
+        task = asyncio.create_task(self._fetch_and_store(cache_key, **query))
+        self._inflight[cache_key] = task
+        INFLIGHT_FETCHES.inc()
+        task.add_done_callback(lambda t, key=cache_key: self._fetch_done(key, t))
+        return task
+
+    @staticmethod
+    def _mark_stale(
+        entry: CacheEntry,
+        data: dict[str, Any],
+        error: str | None = None,
+    ) -> dict[str, Any]:
+        """Cache'teki nesneyi değiştirmeden bayat işaretli bir kopya döner."""
+        metadata = dict(data.get("metadata", {}))
+        metadata["stale"] = True
+        metadata["age_seconds"] = int(entry.age)
+        if error:
+            metadata["stale_reason"] = error
+        return {**data, "metadata": metadata}
+
+    async def _fetch_and_store(self, cache_key: str, **query: Any) -> CacheEntry:
+        data = await self._fetch_merged(**query)
+
+        # Cache the result
+        fresh_for = min(self._ttl, self.PARTIAL_TTL) if data.metadata["partial"] else self._ttl
+        entry = CacheEntry(data, fresh_for, coverage=self._coverage(query, data))
+        previous: CacheEntry | None = self._cache.get(cache_key)
+        if previous is not None:
+            # Updated incrementally from the previous generation on first use
+            entry.nearest = dict(previous.nearest)
+        if previous is not None and previous.data.fingerprint() == data.fingerprint():
+            # Same events as before: keep serving the same bytes, so clients' ETags stay valid
+            entry.payloads = previous.payloads
+            entry.pages = previous.pages
+            entry.clusters = previous.clusters
+        self._cache[cache_key] = entry
+
+        return entry
+
+    @staticmethod
+    def _coverage(query: dict[str, Any], data: EventCollection) -> dict[str, Any]:
+        """Sonucun eksiksiz cevapladığı sorgu: pencere, büyüklük aralığı, alan ve kaynaklar."""
+        # A source is complete if it answered, no shard failed and nothing hit MAX_UPSTREAM_LIMIT
+        complete = frozenset(
+            source
+            for source, status in data.metadata["sources"].items()
+            if status["ok"] and not status.get("partial") and not status.get("truncated")
+        )
+        return {
+            "start_time": query["start_time"],
+            "end_time": query["end_time"],
+            "min_magnitude": query["min_magnitude"],
+            "max_magnitude": query["max_magnitude"],
+            "region": query["region"],
+            "complete_sources": complete,
+        }
+
+    def _find_covering(self, query: dict[str, Any]) -> CacheEntry | None:
         """
-        # Set defaults
-        if end_time is None:
-            end_time = datetime.utcnow()
-        if start_time is None:
-            start_time = end_time - timedelta(hours=24)
+        Sorguyu tamamen kapsayan taze bir cache kaydı arar.
+
+        Kayıt; zaman penceresini, büyüklük aralığını ve alanı (alansız kayıt
+        tüm dünyadır) kapsamalı, istenen her kaynak için de eksiksiz olmalıdır
+        (kaynak yanıt vermiş ve MAX_UPSTREAM_LIMIT ile kesilmemiş). Birden fazla aday
+        varsa en az event'li seçilir.
+        """
+        best: CacheEntry | None = None
+        for entry in list(self._cache.values()):
+            coverage = entry.coverage
+            if coverage is None or entry.age >= entry.fresh_for:
+                continue
+            if coverage["start_time"] > query["start_time"] or coverage["end_time"] < query["end_time"]:
+                continue
+            if coverage["min_magnitude"] > query["min_magnitude"]:
+                continue
+            if coverage["max_magnitude"] is not None and (
+                query["max_magnitude"] is None or query["max_magnitude"] > coverage["max_magnitude"]
+            ):
+                continue
+            if coverage["region"] is not None and (
+                query["region"] is None or not coverage["region"].covers(query["region"])
+            ):
+                continue
+            if not coverage["complete_sources"].issuperset(query["sources"]):
+                continue
+            if best is None or len(entry.data) < len(best.data):
+                best = entry
+        return best
+
+    def _filter_entry(self, entry: CacheEntry, query: dict[str, Any]) -> EventCollection:
+        """Kapsayan kaydın event'lerini sorguya göre süzer ve yeniden birleştirir."""
+        start_ms = self._to_utc_ms(query["start_time"])
+        end_ms = self._to_utc_ms(query["end_time"])
+        min_magnitude, max_magnitude = query["min_magnitude"], query["max_magnitude"]
+        region: Region | None = query["region"]
+
+        per_source: dict[str, list[Event]] = {source: [] for source in self.SOURCES}
+        for event in entry.data.events:
+            source = event.source
+            if source not in query["sources"]:
+                continue
+            time_ms, mag = event.time, event.mag
+            if time_ms is None or mag is None:
+                continue
+            if time_ms < start_ms or time_ms > end_ms:
+                continue
+            if mag < min_magnitude or (max_magnitude is not None and mag > max_magnitude):
+                continue
+            if region is not None and not region.contains(event.lat, event.lon):
+                continue
+            per_source[source].append(event)
 
-        # Clamp limit
-        limit = min(max(1, limit), 5000)
+        events, groups = self._merge_sources(*(per_source[source] for source in self.SOURCES))
 
-        # Build params
+        metadata = dict(entry.data.metadata)
+        metadata["count"] = len(events)
+        metadata["sources"] = {
+            source: status
+            for source, status in metadata.get("sources", {}).items()
+            if source in query["sources"]
+        }
+        metadata["partial"] = False
+        return EventCollection(metadata, events, groups, bbox=entry.data.bbox)
+
+    def _fetch_done(self, cache_key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(cache_key) is task:
+            del self._inflight[cache_key]
+        INFLIGHT_FETCHES.dec()
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def _normalize_window(
+        self,
+        start_time: datetime | None,
+        end_time: datetime | None,
+        window: timedelta | None,
+    ) -> tuple[datetime, datetime, dict[str, Any]]:
+        """
+        Sorgu penceresini zaman bucket'larına yuvarlar.
+
+        Başlangıç aşağı, bitiş yukarı yuvarlanır (naive UTC). Bitiş verilmemişse
+        ya da "şimdi"ye bir bucket'tan yakınsa pencere görecelidir: cache key'i
+        mutlak zamanlar yerine pencere uzunluğunu kullanır, böylece aynı preset'i
+        yoklayan istemciler TTL boyunca tek bir upstream fetch'i paylaşır.
+
+        Returns:
+            (start_time, end_time, cache key alanları)
+        """
+        bucket = self._time_bucket_seconds
+        now = datetime.utcnow()
+        end_utc = self._to_naive_utc(end_time) if end_time is not None else now
+        relative = abs((end_utc - now).total_seconds()) <= bucket
+
+        if start_time is not None:
+            start_utc = self._to_naive_utc(start_time)
+        else:
+            start_utc = end_utc - (window or timedelta(hours=24))
+
+        if relative:
+            span = max(1, round((end_utc - start_utc).total_seconds() / bucket)) * bucket
+            end_utc = self._round_to_bucket(now, up=True)
+            start_utc = end_utc - timedelta(seconds=span)
+            return start_utc, end_utc, {"end": "now", "window": span}
+
+        start_utc = self._round_to_bucket(start_utc)
+        end_utc = self._round_to_bucket(end_utc, up=True)
+        return start_utc, end_utc, {"start": start_utc.isoformat(), "end": end_utc.isoformat()}
+
+    def _round_to_bucket(self, value: datetime, up: bool = False) -> datetime:
+        seconds = (value - _EPOCH).total_seconds() / self._time_bucket_seconds
+        rounded = math.ceil(seconds) if up else math.floor(seconds)
+        return _EPOCH + timedelta(seconds=rounded * self._time_bucket_seconds)
+
+    def _normalize_sources(self, sources: Iterable[str] | None) -> tuple[str, ...]:
+        """Kaynak adlarını SOURCES sırasındaki kanonik adlara çevirir."""
+        if sources is None:
+            return self.SOURCES
+        by_name = {source.lower(): source for source in self.SOURCES}
+        selected: set[str] = set()
+        for name in sources:
+            key = name.strip().lower()
+            if not key:
+                continue
+            if key not in by_name:
+                valid = ", ".join(by_name)
+                raise ValueError(f"Unknown earthquake source: {name!r} (valid: {valid})")
+            selected.add(by_name[key])
+        if not selected:
+            raise ValueError("At least one earthquake source is required")
+        return tuple(source for source in self.SOURCES if source in selected)
+
+    async def _fetch_merged(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        min_magnitude: float,
+        max_magnitude: float | None,
+        sources: tuple[str, ...],
+        region: Region | None = None,
+    ) -> EventCollection:
+        """
+        Seçili kaynakları aynı anda çekip birleştirir.
+
+        Tüm kaynaklar FETCH_DEADLINE_SECONDS içinde tamamlanmalıdır; geç
+        kalanlar iptal edilir ve sonuç eldeki kaynaklarla döner
+        (``metadata.partial``). Devresi açık kaynaklar hiç beklenmeden
+        atlanır. Her kaynağın durumu ``metadata.sources`` altındadır.
+        """
+        query = {
+            "start_time": start_time,
+            "end_time": end_time,
+            "min_magnitude": min_magnitude,
+            "max_magnitude": max_magnitude,
+            "limit": self.MAX_UPSTREAM_LIMIT,
+            "region": region,
+        }
+        info: dict[str, dict[str, Any]] = {source: {} for source in sources}
+        tasks = {
+            asyncio.create_task(self._run_source(source, query, info[source])): source
+            for source in sources
+        }
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=self.FETCH_DEADLINE_SECONDS)
+            # Sources fanning out into shards are bounded by SHARD_DEADLINE_SECONDS instead
+            sharding = {task for task in pending if "shards" in info[tasks[task]]}
+            if sharding:
+                await asyncio.wait(sharding)
+                pending -= sharding
+        finally:
+            for task in tasks:
+                task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results: dict[str, Any] = {}
+        source_status: dict[str, dict[str, Any]] = {}
+        for task, source in tasks.items():
+            if task in pending:
+                error = f"Deadline exceeded ({self.FETCH_DEADLINE_SECONDS:g}s)"
+                source_status[source] = {"ok": False, "error": error}
+            elif task.exception() is not None:
+                source_status[source] = {"ok": False, "error": str(task.exception())}
+                if isinstance(task.exception(), CircuitOpenError):
+                    source_status[source]["skipped"] = True
+            else:
+                results[source] = task.result()
+                source_status[source] = {"ok": True}
+            source_status[source].update(info[source])
+            source_status[source]["circuit"] = self._breakers[source].state
+
+        if not results:
+            errors = "; ".join(f"{source}: {status['error']}" for source, status in source_status.items())
+            raise RuntimeError(f"Failed to fetch earthquake data: {errors}")
+
+        usgs: EventCollection = results.pop("USGS", None) or EventCollection(self._empty_metadata(), [])
+
+        with stage("merge"):
+            events, groups = self._merge_sources(
+                *(usgs.events if source == "USGS" else results.get(source, []) for source in self.SOURCES),
+            )
+        metadata = dict(usgs.metadata)
+        metadata["count"] = len(events)
+        metadata["sources"] = source_status
+        metadata["partial"] = not all(
+            status["ok"] and not status.get("partial") for status in source_status.values()
+        )
+
+        return EventCollection(metadata, events, groups, bbox=usgs.bbox)
+
+    @staticmethod
+    def _empty_metadata() -> dict[str, Any]:
+        return {
+            "generated": int(time.time() * 1000),
+            "title": "Earthquakes",
+            "status": 200,
+        }
+
+    async def _run_source(
+        self,
+        source: str,
+        query: dict[str, Any],
+        info: dict[str, Any],
+    ) -> Any:
+        """
+        Tek bir kaynağı çeker; süreyi, depodan gelip gelmediğini ve
+        MAX_UPSTREAM_LIMIT ile kesilip kesilmediğini ``info``'ya yazar.
+
+        Sorgu aralığı poller'ın canlı penceresinde ya da kalıcı depoda
+        eksiksiz varsa upstream'e gidilmez. MAX_UPSTREAM_LIMIT'e takılan
+        USGS/EMSC pencerelerinin kalanı parçalarla tamamlanır (bkz. ``_run_shards``).
+        """
+        if source == "Kandilli":
+            query = {key: value for key, value in query.items() if key != "limit"}
+
+        started = time.perf_counter()
+        try:
+            result = self._read_live(source, query, info)
+            if result is None:
+                result = await self._run_window(source, query, info)
+            if info.get("truncated") and source != "Kandilli" and self.SHARD_HOURS > 0:
+                return await self._run_shards(source, query, result, info)
+            return result
+        finally:
+            info["elapsed_ms"] = round((time.perf_counter() - started) * 1000)
+
+    async def _run_window(self, source: str, query: dict[str, Any], info: dict[str, Any]) -> Any:
+        """Tek bir pencere: önce depo, yoksa (kaynak düzeyinde cache'li) upstream."""
+        stored = await self._read_store(source, query)
+        if stored is not None:
+            info["store"] = True
+            return stored
+        if source == "USGS":
+            result = await self._get_usgs_data(**query)
+            events = result.events
+        elif source == "Kandilli":
+            return await self._get_kandilli_events(**query)
+        else:
+            result = events = await self._get_emsc_events(**query)
+        if len(events) >= query["limit"]:
+            info["truncated"] = True
+        return result
+
+    async def _run_shards(
+        self,
+        source: str,
+        query: dict[str, Any],
+        first: Any,
+        info: dict[str, Any],
+    ) -> Any:
+        """
+        Üst sınıra takılan bir pencerenin kalanını zaman parçalarıyla çeker.
+
+        Yanıtlar yeniden eskiye sıralı olduğundan ilk çağrı (``first``)
+        pencerenin en yeni kısmını eksiksiz getirir; yalnızca en eski
+        event'ine kadar kalan aralık parçalanır. Parça boyu ilk yanıttaki
+        yoğunluktan seçilir ve parçalar epoch'a hizalıdır; kayan bir
+        pencerenin eski parçaları kaynak cache'inden (yerleşmiş olanlar
+        SETTLED_TTL boyunca) ya da depodan cevaplanır. En fazla
+        SHARD_PARALLELISM parça aynı anda, toplamda SHARD_DEADLINE_SECONDS
+        içinde çekilir. Hata veren ya da yetişmeyen parçalar atlanır ve
+        kaynak ``partial`` işaretlenir.
+        """
+        first_events: list[Event] = first.events if source == "USGS" else first
+        start_ms = self._to_utc_ms(query["start_time"])
+        end_ms = self._to_utc_ms(query["end_time"])
+        oldest_ms = min(event.time for event in first_events if event.time is not None)
+        rate = len(first_events) / max(1.0, (end_ms - oldest_ms) / 1000)
+        shards = self._time_shards(query["start_time"], _EPOCH + timedelta(milliseconds=oldest_ms), rate)
+        # Also tells _fetch_merged that this source is past the shared deadline's concern
+        info["shards"] = len(shards)
+
+        semaphore = asyncio.Semaphore(self.SHARD_PARALLELISM)
+        shard_info: list[dict[str, Any]] = [{} for _ in shards]
+
+        async def run(position: int) -> Any:
+            shard_start, shard_end = shards[position]
+            async with semaphore:
+                return await self._run_window(
+                    source, {**query, "start_time": shard_start, "end_time": shard_end}, shard_info[position],
+                )
+
+        tasks = [asyncio.create_task(run(position)) for position in range(len(shards))]
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=self.SHARD_DEADLINE_SECONDS)
+        finally:
+            for task in tasks:
+                task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results = [first_events]
+        failed = 0
+        for task in tasks:
+            if task in pending or task.cancelled() or task.exception() is not None:
+                failed += 1
+                continue
+            result = task.result()
+            results.append(result.events if source == "USGS" else result)
+
+        seen: set[str] = set()
+        events: list[Event] = []
+        for result in results:
+            for event in result:
+                # Shards overlap the first window and each other at the bounds
+                if event.id in seen or event.time is None or not start_ms <= event.time <= end_ms:
+                    continue
+                seen.add(event.id)
+                events.append(event)
+
+        stored = sum(1 for item in shard_info if item.get("store"))
+        if stored:
+            info["store_shards"] = stored
+        if failed:
+            info["partial"] = True
+            info["failed_shards"] = failed
+        # The first window's truncation is resolved unless a shard hit the limit too
+        if not any(item.get("truncated") for item in shard_info):
+            info.pop("truncated", None)
+        if source == "USGS":
+            return EventCollection(dict(first.metadata), events)
+        return events
+
+    def _time_shards(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        events_per_second: float,
+    ) -> list[tuple[datetime, datetime]]:
+        """
+        Aralığı kapsayan hizalı parçalar, yeniden eskiye.
+
+        Parça boyu SHARD_HOURS'ın ikinin kuvveti katıdır: beklenen event
+        sayısı MAX_UPSTREAM_LIMIT'in yarısını aşmayan en büyük boy, en fazla
+        MAX_SHARDS parça olacak şekilde. Boylar sabit bir kümeden seçildiği
+        için yoğunluk biraz değişse de parça sınırları (ve cache anahtarları)
+        aynı kalır. Son parça aralığın ötesine uzanabilir.
+        """
+        shard_seconds = self.SHARD_HOURS * 3600
+        span = max(1.0, (end_time - start_time).total_seconds())
+        budget = self.MAX_UPSTREAM_LIMIT / 2
+        while shard_seconds < span and (
+            events_per_second * shard_seconds * 2 <= budget or span / shard_seconds >= self.MAX_SHARDS
+        ):
+            shard_seconds *= 2
+        first = math.floor((start_time - _EPOCH).total_seconds() / shard_seconds)
+        last = math.ceil((end_time - _EPOCH).total_seconds() / shard_seconds)
+        return [
+            (
+                _EPOCH + timedelta(seconds=index * shard_seconds),
+                _EPOCH + timedelta(seconds=(index + 1) * shard_seconds),
+            )
+            for index in range(max(last, first + 1) - 1, first - 1, -1)
+        ]
+
+    async def _get_usgs_data(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        min_magnitude: float,
+        max_magnitude: float | None,
+        limit: int,
+        region: Region | None = None,
+    ) -> EventCollection:
         params = {
             "format": "geojson",
             "starttime": start_time.isoformat(),
@@ -95,118 +1194,237 @@ class EarthquakeCache:
             "limit": limit,
             "orderby": "time",
         }
-
         if max_magnitude is not None:
             params["maxmagnitude"] = max_magnitude
-
-        # Check cache
-        cache_key = self._build_cache_key(params)
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
-        # Fetch from USGS
-        data = await self._fetch_from_usgs(params)
-        source_status: dict[str, dict[str, Any]] = {"USGS": {"ok": True}}
-
-        # Fetch from Kandilli (official) and EMSC with per-source timeout
-        kandilli_task = self._fetch_with_timeout(
-            self._get_kandilli_features(
-                start_time=start_time,
-                end_time=end_time,
-                min_magnitude=min_magnitude,
-                max_magnitude=max_magnitude,
-            )
-        )
-        emsc_task = self._fetch_with_timeout(
-            self._get_emsc_features(
-                start_time=start_time,
-                end_time=end_time,
-                min_magnitude=min_magnitude,
-                max_magnitude=max_magnitude,
-                limit=limit,
+        if region is not None:
+            params.update(region.fdsn_params())
+
+        with stage("usgs"):
+            return await self._cached_source(
+                "USGS",
+                params,
+                partial(self._fetch_usgs_events, params, region),
+                persist=lambda result: self._persist_window(
+                    "USGS", start_time, end_time, min_magnitude, max_magnitude, limit, region, result.events,
+                ),
+                ttl=self._window_ttl(end_time),
+                size_class=self._size_class(start_time, end_time, min_magnitude, region),
             )
-        )
 
-        kandilli_result, emsc_result = await asyncio.gather(
-            kandilli_task,
-            emsc_task,
-            return_exceptions=True,
-        )
-
-        kandilli_features = []
-        if isinstance(kandilli_result, Exception):
-            source_status["Kandilli"] = {"ok": False, "error": str(kandilli_result)}
+    async def _cached_source(
+        self,
+        source: str,
+        params: dict[str, Any],
+        fetch: Callable[[], Awaitable[Any]],
+        persist: Callable[[Any], None] | None = None,
+        ttl: float | None = None,
+        size_class: Any = None,
+    ) -> Any:
+        """
+        Kaynak düzeyinde TTL cache + single-flight.
+
+        Farklı sorgular aynı upstream yanıtına ihtiyaç duyduğunda (ör. farklı
+        ``sources`` seçimleri veya aynı Kandilli sayfası) upstream en fazla bir
+        kez çağrılır. Upstream çağrısı kaynağın devre kesicisi ve adaptif
+        timeout'u ile yapılır (timeout ``size_class``'ın gecikmelerinden
+        öğrenilir); cache'ten dönen yanıtlar devreyi etkilemez.
+        Başarılı her upstream yanıtı ``persist`` ile kalıcı depoya da yazılır
+        ve ``ttl`` (varsayılan: cache TTL'i) boyunca saklanır.
+        Dönen nesne paylaşılır; çağıran değiştirmemelidir.
+        """
+        key = f"{source}:{self._build_cache_key(params)}"
+        entry: CacheEntry | None = self._source_cache.get(key)
+        if entry is not None and entry.age < entry.fresh_for:
+            SOURCE_CACHE_REQUESTS.inc(source, "hit")
+            return entry.data
+
+        task = self._source_inflight.get(key)
+        if task is None:
+            SOURCE_CACHE_REQUESTS.inc(source, "miss")
+            task = asyncio.create_task(self._breakers[source].call(fetch, size_class))
+            self._source_inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._source_fetch_done(key, t, persist, ttl))
         else:
-            kandilli_features = kandilli_result or []
-            source_status["Kandilli"] = {"ok": True}
+            SOURCE_CACHE_REQUESTS.inc(source, "coalesced")
+        # A waiter hitting the request deadline must not cancel the shared fetch
+        return await asyncio.shield(task)
 
-        emsc_features = []
-        if isinstance(emsc_result, Exception):
-            source_status["EMSC"] = {"ok": False, "error": str(emsc_result)}
-        else:
-            emsc_features = emsc_result or []
-            source_status["EMSC"] = {"ok": True}
+    @staticmethod
+    def _size_class(
+        start_time: datetime,
+        end_time: datetime,
+        min_magnitude: float,
+        region: Region | None,
+    ) -> tuple[int, int, bool]:
+        """
+        Bir pencerenin gecikme sınıfı: yanıt boyunu belirleyen pencere
+        uzunluğu (saat, ikinin kuvvetine yuvarlanmış), minimum büyüklük ve alan.
+        """
+        hours = max(1.0, (end_time - start_time).total_seconds() / 3600)
+        return math.ceil(math.log2(hours)), math.floor(min_magnitude), region is not None
 
-        merged_features = self._merge_features(
-            base_features=data.get("features", []),
-            incoming_features=kandilli_features,
-        )
-        merged_features = self._merge_features(
-            base_features=merged_features,
-            incoming_features=emsc_features,
-        )
-        data["features"] = merged_features
-        if "metadata" in data:
-            data["metadata"]["count"] = len(merged_features)
-            data["metadata"]["sources"] = source_status
+    def _source_fetch_done(
+        self,
+        key: str,
+        task: asyncio.Task,
+        persist: Callable[[Any], None] | None,
+        ttl: float | None = None,
+    ) -> None:
+        if self._source_inflight.get(key) is task:
+            del self._source_inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._source_cache[key] = CacheEntry(task.result(), ttl if ttl is not None else self._ttl)
+        if persist is not None:
+            persist(task.result())
+
+    def _persist_window(
+        self,
+        source: str,
+        start_time: datetime,
+        end_time: datetime,
+        min_magnitude: float,
+        max_magnitude: float | None,
+        limit: int,
+        region: Region | None,
+        events: list[Event],
+    ) -> None:
+        """
+        Bir USGS/EMSC penceresini depoya yazar.
 
-        # Cache the result
-        self._cache[cache_key] = data
+        Yanıt ``limit`` ile kesilmemişse, büyüklük üst sınırı ve alan filtresi
+        yoksa pencerenin yerleşmiş (STORE_SETTLE_SECONDS'tan eski) kısmı
+        eksiksiz kabul edilir.
+        """
+        covered = None
+        if max_magnitude is None and region is None and len(events) < limit:
+            start_ms = self._to_utc_ms(start_time)
+            end_ms = min(self._to_utc_ms(end_time), self._settled_ms())
+            if end_ms > start_ms:
+                covered = (start_ms, end_ms, min_magnitude)
+        self._save_to_store(source, events, covered)
+
+    def _persist_kandilli(self, events: list[Event]) -> None:
+        """Kandilli sayfası en eski kaydından bu yana tüm depremleri içerir."""
+        times = [event.time for event in events]
+        covered = None
+        if times and self._settled_ms() > min(times):
+            covered = (min(times), self._settled_ms(), 0.0)
+        self._save_to_store("Kandilli", events, covered)
+
+    def _window_ttl(self, end_time: datetime) -> float | None:
+        """Yerleşmiş (artık revize edilmeyen) pencereler kaynak cache'inde daha uzun kalır."""
+        if self._to_utc_ms(end_time) <= self._settled_ms():
+            return max(self._ttl, self.SETTLED_TTL)
+        return None
+
+    def _settled_ms(self) -> int:
+        # Recent events still get revised upstream; only older ranges count as covered
+        return int(time.time() * 1000) - self.STORE_SETTLE_SECONDS * 1000
+
+    def _save_to_store(
+        self,
+        source: str,
+        events: list[Event],
+        covered: tuple[int, int, float] | None,
+        deleted: list[str] | None = None,
+    ) -> None:
+        if self._store is None or (not events and covered is None and not deleted):
+            return
+        # Events are never mutated, so the thread can read them as-is
+        task = asyncio.create_task(asyncio.to_thread(self._store.save, source, events, covered, deleted or ()))
+        self._store_tasks.add(task)
+        task.add_done_callback(self._store_save_done)
+
+    def _store_save_done(self, task: asyncio.Task) -> None:
+        self._store_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[STORE] Failed to save earthquakes: {task.exception()}")
+
+    async def _read_store(self, source: str, query: dict[str, Any]) -> Any:
+        """Sorgu depodaki eksiksiz aralıklarla kapsanıyorsa kaynağın sonucunu döner."""
+        if self._store is None:
+            return None
+        with stage("store"):
+            events = await asyncio.to_thread(
+                self._store.read,
+                source,
+                self._to_utc_ms(query["start_time"]),
+                self._to_utc_ms(query["end_time"]),
+                query["min_magnitude"],
+                query["max_magnitude"],
+                None if source == "Kandilli" else query["limit"],
+                query["region"],
+            )
+        if events is None:
+            return None
+        if source == "USGS":
+            return EventCollection(self._empty_metadata(), events)
+        return events
+
+    async def _fetch_usgs_events(self, params: dict[str, Any], region: Region | None = None) -> EventCollection:
+        """
+        USGS yanıtını indirilirken event'lere çevirir (``properties`` olduğu gibi tutulur).
 
-        return data
+        Alan filtresi upstream'e parametre olarak gider; sonuç yine de
+        ``region`` ile süzülür ki cache'ten türetilen sonuçlarla aynı sınırı
+        (küresel mesafe) kullansın.
+        """
+        stream = FeatureStream()
+        events = await self._read_features(
+            self._stream_from_usgs(params), stream, partial(Event.from_feature, source="USGS"), region,
+        )
+        return EventCollection(stream.members.get("metadata", {}), events, bbox=stream.members.get("bbox"))
 
-    async def _fetch_from_usgs(self, params: dict[str, Any]) -> dict[str, Any]:
+    async def _stream_from_usgs(self, params: dict[str, Any]) -> AsyncIterator[bytes]:
         """
-        USGS API'den veri çeker.
+        USGS API yanıtını geldikçe parça parça verir.
         """
+        import httpx
+
         client = await self._get_client()
 
         try:
-            response = await client.get(self.USGS_BASE_URL, params=params)
-            response.raise_for_status()
-            return response.json()
+            async with client.stream("GET", self.USGS_BASE_URL, params=params) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    yield chunk
         except httpx.TimeoutException as e:
-            # Return cached data if available on timeout
-            cache_key = self._build_cache_key(params)
-            if cache_key in self._cache:
-                return self._cache[cache_key]
+            # get_earthquakes falls back to stale cached data (stale-if-error)
             raise RuntimeError(f"USGS API timeout: {e}") from e
         except httpx.HTTPStatusError as e:
             raise RuntimeError(f"USGS API error: {e.response.status_code}") from e
         except Exception as e:
             raise RuntimeError(f"Failed to fetch earthquake data: {e}") from e
 
-    async def _get_kandilli_features(
+    async def _get_kandilli_events(
         self,
         start_time: datetime,
         end_time: datetime,
         min_magnitude: float,
         max_magnitude: float | None,
-    ) -> list[dict[str, Any]]:
-        text = await self._fetch_kandilli_text()
-
-        features = self._parse_kandilli_text(text)
-        if not features:
+        region: Region | None = None,
+    ) -> list[Event]:
+        with stage("kandilli"):
+            events = await self._cached_source(
+                "Kandilli", {}, self._fetch_kandilli_events, persist=self._persist_kandilli,
+            )
+        if not events:
             return []
+        if region is not None:
+            # The page has no spatial parameters: filter it through a location index
+            index = self._kandilli_index
+            if index is None or index.events is not events:
+                index = self._kandilli_index = EventLocationIndex(events)
+            events = index.query(region)
 
         start_ms = self._to_utc_ms(start_time)
         end_ms = self._to_utc_ms(end_time)
 
-        filtered: list[dict[str, Any]] = []
-        for feature in features:
-            props = feature.get("properties", {})
-            mag = props.get("mag")
-            time_ms = props.get("time")
+        filtered: list[Event] = []
+        for event in events:
+            mag = event.mag
+            time_ms = event.time
 
             if mag is None or time_ms is None:
                 continue
@@ -216,121 +1434,211 @@ class EarthquakeCache:
                 continue
             if max_magnitude is not None and mag > max_magnitude:
                 continue
-            filtered.append(feature)
+            filtered.append(event)
 
         return filtered
 
-    async def _get_emsc_features(
+    async def _get_emsc_events(
         self,
         start_time: datetime,
         end_time: datetime,
         min_magnitude: float,
         max_magnitude: float | None,
         limit: int,
-    ) -> list[dict[str, Any]]:
+        region: Region | None = None,
+    ) -> list[Event]:
         params = {
             "format": "json",
             "starttime": self._format_fdsn_time(start_time),
             "endtime": self._format_fdsn_time(end_time),
             "minmagnitude": min_magnitude,
             "limit": limit,
+            # Newest first, so a truncated response is complete from its oldest event on
+            "orderby": "time",
         }
         if max_magnitude is not None:
             params["maxmagnitude"] = max_magnitude
+        if region is not None:
+            # Standard FDSN: radius in degrees
+            params.update(region.fdsn_params(radius_km=False))
+
+        with stage("emsc"):
+            return await self._cached_source(
+                "EMSC",
+                params,
+                partial(self._fetch_emsc_events, params, region),
+                persist=partial(
+                    self._persist_window, "EMSC",
+                    start_time, end_time, min_magnitude, max_magnitude, limit, region,
+                ),
+                ttl=self._window_ttl(end_time),
+                size_class=self._size_class(start_time, end_time, min_magnitude, region),
+            )
 
-        data = await self._fetch_from_emsc(params)
+    async def _fetch_emsc_events(self, params: dict[str, Any], region: Region | None = None) -> list[Event]:
+        """EMSC yanıtını indirilirken event'lere normalize eder (``region`` ile süzülmüş)."""
+        return await self._read_features(
+            self._stream_from_emsc(params), FeatureStream(), self._emsc_event, region,
+        )
 
-        features = data.get("features", [])
-        normalized: list[dict[str, Any]] = []
-        for feature in features:
-            props = feature.get("properties", {})
-            geom = feature.get("geometry", {})
-            coords = geom.get("coordinates", [None, None, None])
-            lon, lat, depth = coords[0], coords[1], coords[2]
+    def _emsc_event(self, feature: dict[str, Any]) -> Event | None:
+        props = feature.get("properties", {})
+        geom = feature.get("geometry", {})
+        coords = geom.get("coordinates", [None, None, None])
+        lon, lat, depth = coords[0], coords[1], coords[2]
 
-            mag = props.get("mag")
-            if mag is None or lat is None or lon is None:
-                continue
+        mag = props.get("mag")
+        if mag is None or lat is None or lon is None:
+            return None
 
-            time_str = props.get("time")
-            time_ms = self._parse_iso_to_ms(time_str) if time_str else None
-            if time_ms is None:
-                continue
+        time_str = props.get("time")
+        time_ms = self._parse_iso_to_ms(time_str) if time_str else None
+        if time_ms is None:
+            return None
+
+        place = props.get("flynn_region") or ""
+        mag_type = props.get("magtype") or ""
+        event_id = props.get("unid") or feature.get("id") or ""
+        if event_id:
+            event_id = f"emsc-{event_id}"
+        else:
+            event_id = f"emsc-{time_ms}-{lat:.4f}-{lon:.4f}"
+
+        return Event(
+            event_id,
+            "EMSC",
+            time_ms,
+            lat,
+            lon,
+            depth if depth is not None else 0.0,
+            mag,
+            mag_type=mag_type,
+            place=place,
+            updated=self._parse_iso_to_ms(props.get("lastupdate") or "") or time_ms,
+        )
+
+    @staticmethod
+    async def _read_features(
+        chunks: AsyncIterator[bytes],
+        stream: FeatureStream,
+        convert: Callable[[dict[str, Any]], Event | None],
+        region: Region | None = None,
+    ) -> list[Event]:
+        """
+        GeoJSON gövdesini indirilirken event'lere çevirir ve süzer.
+
+        Her parçadaki tamamlanmış feature'lar hemen ``convert`` edilir;
+        ``region`` dışında kalanlar saklanmaz.
+        """
+        events: list[Event] = []
+
+        def collect(features: list[dict[str, Any]]) -> None:
+            for feature in features:
+                event = convert(feature)
+                if event is not None and (region is None or region.contains(event.lat, event.lon)):
+                    events.append(event)
 
-            place = props.get("flynn_region") or ""
-            mag_type = props.get("magtype") or ""
-            event_id = props.get("unid") or feature.get("id") or ""
-            if event_id:
-                event_id = f"emsc-{event_id}"
-            else:
-                event_id = f"emsc-{time_ms}-{lat:.4f}-{lon:.4f}"
-
-            normalized.append({
-                "type": "Feature",
-                "properties": {
-                    "mag": mag,
-                    "place": place,
-                    "time": time_ms,
-                    "updated": time_ms,
-                    "tz": 0,
-                    "url": "",
-                    "detail": "",
-                    "felt": None,
-                    "cdi": None,
-                    "mmi": None,
-                    "alert": None,
-                    "status": "emsc",
-                    "tsunami": 0,
-                    "sig": 0,
-                    "net": "EMSC",
-                    "code": event_id,
-                    "ids": event_id,
-                    "sources": "EMSC",
-                    "types": "origin",
-                    "nst": None,
-                    "dmin": None,
-                    "rms": None,
-                    "gap": None,
-                    "magType": mag_type,
-                    "type": "earthquake",
-                    "title": f"M{mag:.1f} - {place}" if place else f"M{mag:.1f}",
-                    "source": "EMSC",
-                },
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [lon, lat, depth if depth is not None else 0.0],
-                },
-                "id": event_id,
-            })
-
-        return normalized
-
-    async def _fetch_kandilli_text(self) -> str:
-        client = await self._get_client()
         try:
-            response = await client.get(self.KANDILLI_URL)
-            response.raise_for_status()
-            text = response.content.decode("windows-1254", errors="replace")
-        except Exception:
-            response = await client.get(self.KANDILLI_FALLBACK_URL)
-            response.raise_for_status()
-            text = response.text
+            async for chunk in chunks:
+                collect(stream.feed(chunk))
+        finally:
+            # Closes the response if parsing failed or the fetch was cancelled mid-body
+            await chunks.aclose()
+        collect(stream.close())
+        return events
+
+    async def _fetch_kandilli_events(self) -> list[Event]:
+        """
+        Kandilli listesini hedged istekle çeker (sorgudan bağımsız).
 
-        match = re.search(r"<pre[^>]*>(.*?)</pre>", text, re.S | re.I)
-        return match.group(1) if match else text
+        Birincil adres, kendi gecikmesinin KANDILLI_HEDGE_PERCENTILE
+        yüzdeliği içinde yanıt vermezse yedek adres de başlatılır; ilk başarılı
+        yanıt kullanılır, diğeri iptal edilir. Birincil hata verirse yedek
+        hemen denenir. Her iki istek de sayfayı indirirken ayrıştırır.
 
-    async def _fetch_from_emsc(self, params: dict[str, Any]) -> dict[str, Any]:
+        Yedek kazandığında iptal edilen birincilin o ana kadarki süresi de
+        gecikme örneği olarak kaydedilir (gerçek süresinin alt sınırı).
+        """
+        hedge_after = self._kandilli_latency.percentile(self.KANDILLI_HEDGE_PERCENTILE)
+        if hedge_after is None or len(self._kandilli_latency) < CircuitBreaker.MIN_SAMPLES:
+            hedge_after = self.KANDILLI_HEDGE_DEFAULT_SECONDS
+
+        started = time.perf_counter()
+        primary = asyncio.create_task(self._fetch_kandilli_primary())
+        fallback: asyncio.Task | None = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            if primary in done and primary.exception() is None:
+                KANDILLI_FETCHES.inc("primary")
+                events = primary.result()
+            elif primary in done:
+                fallback = asyncio.create_task(self._fetch_kandilli_fallback())
+                events = await fallback
+                KANDILLI_FETCHES.inc("fallback")
+            else:
+                fallback = asyncio.create_task(self._fetch_kandilli_fallback())
+                winner = await self._first_successful(primary, fallback)
+                KANDILLI_FETCHES.inc("hedge_primary" if winner is primary else "hedge_fallback")
+                events = winner.result()
+        finally:
+            if not primary.done():
+                # Record the cancelled primary's wait as a lower bound of its latency;
+                # otherwise only fast responses are sampled and the hedge fires ever earlier
+                self._kandilli_latency.record(time.perf_counter() - started)
+            for task in (primary, fallback):
+                if task is not None and not task.done():
+                    task.cancel()
+
+        return events
+
+    async def _fetch_kandilli_primary(self) -> list[Event]:
+        started = time.perf_counter()
+        events = await self._read_kandilli(self.KANDILLI_URL, encoding="windows-1254")
+        self._kandilli_latency.record(time.perf_counter() - started)
+        return events
+
+    async def _fetch_kandilli_fallback(self) -> list[Event]:
+        return await self._read_kandilli(self.KANDILLI_FALLBACK_URL)
+
+    async def _read_kandilli(self, url: str, encoding: str | None = None) -> list[Event]:
+        """
+        Sayfayı indirirken ``<pre>`` bloğunu satır satır event'lere çevirir.
+
+        Args:
+            encoding: Yanıt başlığındaki charset yerine kullanılacak kodlama
+        """
         client = await self._get_client()
-        response = await client.get(self.EMSC_BASE_URL, params=params)
-        response.raise_for_status()
-        return response.json()
+        lines = PreBlockLines()
+        events: list[Event] = []
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            if encoding is not None:
+                response.encoding = encoding
+            async for text in response.aiter_text():
+                self._parse_kandilli_lines(lines.feed(text), events)
+        self._parse_kandilli_lines(lines.close(), events)
+        return events
 
-    def _parse_kandilli_text(self, text: str) -> list[dict[str, Any]]:
-        features: list[dict[str, Any]] = []
-        if not text:
-            return features
+    @staticmethod
+    async def _first_successful(*tasks: asyncio.Task) -> asyncio.Task:
+        """İlk başarıyla biten task'i döner; hepsi hata verirse ilkinin hatasını fırlatır."""
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in tasks:
+                if task in done and task.exception() is None:
+                    return task
+        raise tasks[0].exception()
+
+    async def _stream_from_emsc(self, params: dict[str, Any]) -> AsyncIterator[bytes]:
+        client = await self._get_client()
+        async with client.stream("GET", self.EMSC_BASE_URL, params=params) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                yield chunk
 
-        lines = text.splitlines()
+    def _parse_kandilli_lines(self, lines: Iterable[str], events: list[Event]) -> None:
+        """Liste satırlarından ayrıştırılabilenleri ``events``'e ekler."""
         for line in lines:
             line = line.strip()
             if not line:
@@ -388,112 +1696,81 @@ class EarthquakeCache:
             time_ms = int(dt_local.timestamp() * 1000)
             event_id = f"kandilli-{date_str}-{time_str}-{lat:.4f}-{lon:.4f}"
 
-            feature = {
-                "type": "Feature",
-                "properties": {
-                    "mag": mag,
-                    "place": place,
-                    "time": time_ms,
-                    "updated": time_ms,
-                    "tz": 180,
-                    "url": "",
-                    "detail": "",
-                    "felt": None,
-                    "cdi": None,
-                    "mmi": None,
-                    "alert": None,
-                    "status": "kandilli",
-                    "tsunami": 0,
-                    "sig": 0,
-                    "net": "KOERI",
-                    "code": event_id,
-                    "ids": event_id,
-                    "sources": "KOERI",
-                    "types": "origin",
-                    "nst": None,
-                    "dmin": None,
-                    "rms": None,
-                    "gap": None,
-                    "magType": mag_type or "",
-                    "type": "earthquake",
-                    "title": f"M{mag:.1f} - {place}" if place else f"M{mag:.1f}",
-                    "source": "Kandilli",
-                },
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [lon, lat, depth],
-                },
-                "id": event_id,
-            }
-            features.append(feature)
+            events.append(Event(
+                event_id,
+                "Kandilli",
+                time_ms,
+                lat,
+                lon,
+                depth,
+                mag,
+                mag_type=mag_type or "",
+                place=place,
+            ))
+
+    def _merge_sources(self, *sources: Iterable[Event]) -> tuple[list[Event], list[str | None]]:
+        """
+        Kaynakları birleştirir ve aynı depremin kopyalarını kümeler.
 
-        return features
+        Sonuç sayfalama sırasındadır (``_page_key``: yeni önce). Birden fazla
+        kaynakta görülen her küme, bu sonuçta tekil bir ``match_group`` alır
+        (``match-1``, ``match-2``, ...). Event'ler değiştirilmez; gruplar
+        event'lerle aynı sırada ayrı bir listede döner.
 
-    def _merge_features(
-        self,
-        base_features: Iterable[dict[str, Any]],
-        incoming_features: Iterable[dict[str, Any]],
-    ) -> list[dict[str, Any]]:
-        merged: list[dict[str, Any]] = []
-        for feature in base_features:
-            feature.setdefault("properties", {}).setdefault("source", "USGS")
-            merged.append(feature)
-
-        group_counter = 1
-        for feature in incoming_features:
-            match = self._find_match(feature, merged)
-            if match is not None:
-                group_id = match.get("properties", {}).get("match_group")
-                if not group_id:
-                    group_id = f"match-{group_counter}"
-                    match.setdefault("properties", {})["match_group"] = group_id
-                    group_counter += 1
-                feature.setdefault("properties", {})["match_group"] = group_id
-            merged.append(feature)
-
-        return merged
-
-    def _find_match(
-        self,
-        candidate: dict[str, Any],
-        existing: Iterable[dict[str, Any]],
-    ) -> dict[str, Any] | None:
-        candidate_id = candidate.get("id")
-        if candidate_id:
-            for item in existing:
-                if item.get("id") == candidate_id:
-                    return item
-
-        cand_props = candidate.get("properties", {})
-        cand_time = cand_props.get("time")
-        cand_mag = cand_props.get("mag")
-        cand_coords = candidate.get("geometry", {}).get("coordinates", [None, None, None])
-        cand_lon, cand_lat = cand_coords[0], cand_coords[1]
-
-        if cand_time is None or cand_mag is None or cand_lat is None or cand_lon is None:
-            return None
+        Returns:
+            (events, groups)
+        """
+        merged: list[Event] = []
+        for events in sources:
+            merged.extend(events)
+        merged.sort(key=self._page_key)
+
+        roots = cluster_events(
+            merged,
+            time_tolerance_ms=self.TIME_TOLERANCE_MS,
+            coord_tolerance_deg=self.COORD_TOLERANCE_DEG,
+            mag_tolerance=self.MAG_TOLERANCE,
+        )
+        sizes = Counter(roots)
+        group_ids: dict[int, str] = {}
+        groups: list[str | None] = []
+        for root in roots:
+            if sizes[root] < 2:
+                groups.append(None)
+                continue
+            if root not in group_ids:
+                group_ids[root] = f"match-{len(group_ids) + 1}"
+            groups.append(group_ids[root])
 
-        for item in existing:
-            props = item.get("properties", {})
-            item_time = props.get("time")
-            item_mag = props.get("mag")
-            coords = item.get("geometry", {}).get("coordinates", [None, None, None])
-            item_lon, item_lat = coords[0], coords[1]
+        return merged, groups
 
-            if item_time is None or item_mag is None or item_lat is None or item_lon is None:
-                continue
+    def _canonical(self, data: EventCollection) -> list[tuple[Event, str | None, list[Event]]]:
+        """
+        Her depremi bir kez döner: (kanonik event, match_group, diğer kaynakların event'leri).
 
-            if abs(item_time - cand_time) > self.TIME_TOLERANCE_MS:
-                continue
-            if abs(item_mag - cand_mag) > self.MAG_TOLERANCE:
-                continue
-            if abs(item_lat - cand_lat) > self.COORD_TOLERANCE_DEG:
+        Kanonik event CANONICAL_SOURCE_PRIORITY'deki ilk kaynağınkidir;
+        sıralama her grubun ilk görüldüğü konumu izler.
+        """
+        priority = {source: rank for rank, source in enumerate(self.CANONICAL_SOURCE_PRIORITY)}
+        groups: dict[str, list[Event]] = {}
+        ordered: list[Event | str] = []
+        for event, group_id in zip(data.events, data.groups):
+            if not group_id:
+                ordered.append(event)
                 continue
-            if abs(item_lon - cand_lon) > self.COORD_TOLERANCE_DEG:
+            if group_id not in groups:
+                groups[group_id] = []
+                ordered.append(group_id)
+            groups[group_id].append(event)
+
+        canonical: list[tuple[Event, str | None, list[Event]]] = []
+        for item in ordered:
+            if not isinstance(item, str):
+                canonical.append((item, None, []))
                 continue
-            return item
-
-        return None
+            members = sorted(groups[item], key=lambda event: priority.get(event.source, len(priority)))
+            canonical.append((members[0], item, members[1:]))
+        return canonical
 
     @staticmethod
     def _to_float(value: str) -> float | None:
@@ -516,6 +1793,12 @@ class EarthquakeCache:
         except Exception:
             return None
 
+    @staticmethod
+    def _to_naive_utc(value: datetime) -> datetime:
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
     @staticmethod
     def _to_utc_ms(value: datetime) -> int:
         if value.tzinfo is None:
@@ -532,15 +1815,10 @@ class EarthquakeCache:
             value = value.astimezone(timezone.utc)
         return value.strftime("%Y-%m-%dT%H:%M:%S")
 
-    async def _fetch_with_timeout(self, coro: Any) -> Any:
-        try:
-            return await asyncio.wait_for(coro, timeout=self.SOURCE_TIMEOUT_SECONDS)
-        except asyncio.TimeoutError as exc:
-            raise RuntimeError("Timeout after 3s") from exc
-
     def clear_cache(self) -> None:
         """Cache'i temizler."""
         self._cache.clear()
+        self._source_cache.clear()
 
 
 # Global cache instance
@@ -0,0 +1,140 @@
+"""
+Earthquake Clusters
+Harita için depremlerin Web Mercator ızgara hücrelerinde toplanması.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Iterable
+
+from services.earthquake_event import Event
+
+MAX_ZOOM = 18
+# 2^CELL_BITS cells per tile edge: 4x4 cells of 64 px on a 256 px tile
+CELL_BITS = 2
+_FINE_BITS = MAX_ZOOM + CELL_BITS
+MAX_LATITUDE = 85.05112878  # Web Mercator limit
+
+
+def _mercator(lat: float, lon: float) -> tuple[float, float]:
+    """(lat, lon) -> Web Mercator (x, y), ikisi de [0, 1) aralığında, y güneye doğru artar."""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = (lon + 180.0) / 360.0 % 1.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x, y
+
+
+def _cell_index(value: float, cells: int) -> int:
+    return min(cells - 1, max(0, int(value * cells)))
+
+
+class GridClusters:
+    """
+    Bir event kümesinin zoom seviyelerine göre ızgara özetleri.
+
+    Her event'in en ince (MAX_ZOOM) seviyedeki hücresi bir kez hesaplanır.
+    Bir zoom seviyesinin hücreleri ilk istendiğinde tek geçişte üretilip
+    saklanır; daha ince bir seviye hazırsa event'ler yerine onun hücreleri
+    birleştirilir. Sorgular yalnızca hücreleri bbox'a göre süzer.
+    """
+
+    __slots__ = ("_fine", "_levels")
+
+    def __init__(self, events: Iterable[Event]):
+        fine_cells = 1 << _FINE_BITS
+        # (x, y, lat, lon, mag) with x/y the MAX_ZOOM cell indexes
+        self._fine: list[tuple[int, int, float, float, float]] = []
+        for event in events:
+            if event.lat is None or event.lon is None or event.mag is None:
+                continue
+            x, y = _mercator(event.lat, event.lon)
+            self._fine.append((
+                _cell_index(x, fine_cells), _cell_index(y, fine_cells), event.lat, event.lon, event.mag,
+            ))
+        # zoom -> (cell_x, cell_y) -> [count, max_mag, sum_lat, sum_lon]
+        self._levels: dict[int, dict[tuple[int, int], list[float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._fine)
+
+    def level(self, zoom: int) -> dict[tuple[int, int], list[float]]:
+        cells = self._levels.get(zoom)
+        if cells is not None:
+            return cells
+
+        cells = {}
+        finer = min((level for level in self._levels if level > zoom), default=None)
+        if finer is not None:
+            shift = finer - zoom
+            for (cell_x, cell_y), (count, max_mag, sum_lat, sum_lon) in self._levels[finer].items():
+                self._add(cells, (cell_x >> shift, cell_y >> shift), count, max_mag, sum_lat, sum_lon)
+        else:
+            shift = MAX_ZOOM - zoom
+            for x, y, lat, lon, mag in self._fine:
+                self._add(cells, (x >> shift, y >> shift), 1, mag, lat, lon)
+        self._levels[zoom] = cells
+        return cells
+
+    def query(
+        self,
+        zoom: int,
+        bbox: tuple[float, float, float, float] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        ``bbox`` (batı, güney, doğu, kuzey) ile kesişen hücreleri GeoJSON
+        Point feature'ları olarak döner: konum hücredeki depremlerin
+        ağırlık merkezi, ``count`` ve ``max_mag`` property'leri.
+
+        Batı > doğu ise bbox 180. meridyeni geçiyor kabul edilir.
+        """
+        zoom = max(0, min(MAX_ZOOM, zoom))
+        cells = 1 << (zoom + CELL_BITS)
+        x_ranges = [(0, cells - 1)]
+        y_range = (0, cells - 1)
+        if bbox is not None:
+            west, south, east, north = bbox
+            if east - west < 360:
+                # Not wrapped: east = 180 is the last column, not the first
+                west_x = _cell_index((west + 180.0) / 360.0, cells)
+                east_x = _cell_index((east + 180.0) / 360.0, cells)
+                x_ranges = [(west_x, east_x)] if west_x <= east_x else [(west_x, cells - 1), (0, east_x)]
+            y_range = (
+                _cell_index(_mercator(north, 0.0)[1], cells),
+                _cell_index(_mercator(south, 0.0)[1], cells),
+            )
+
+        features: list[dict[str, Any]] = []
+        for (cell_x, cell_y), (count, max_mag, sum_lat, sum_lon) in self.level(zoom).items():
+            if not y_range[0] <= cell_y <= y_range[1]:
+                continue
+            if not any(low <= cell_x <= high for low, high in x_ranges):
+                continue
+            features.append({
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [round(sum_lon / count, 4), round(sum_lat / count, 4)],
+                },
+                "properties": {"count": int(count), "max_mag": max_mag},
+                "id": f"{zoom}/{cell_x}/{cell_y}",
+            })
+        return features
+
+    @staticmethod
+    def _add(
+        cells: dict[tuple[int, int], list[float]],
+        key: tuple[int, int],
+        count: float,
+        max_mag: float,
+        sum_lat: float,
+        sum_lon: float,
+    ) -> None:
+        cell = cells.get(key)
+        if cell is None:
+            cells[key] = [count, max_mag, sum_lat, sum_lon]
+            return
+        cell[0] += count
+        cell[1] = max(cell[1], max_mag)
+        cell[2] += sum_lat
+        cell[3] += sum_lon
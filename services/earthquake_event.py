@@ -0,0 +1,227 @@
+"""
+Earthquake Event
+Depremlerin bellekte kompakt temsili; GeoJSON yalnızca çıktı üretilirken oluşturulur.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Iterable
+
+# Fixed GeoJSON properties of the sources normalized here (USGS keeps its own)
+_SOURCE_PROPERTIES: dict[str, dict[str, Any]] = {
+    "Kandilli": {"tz": 180, "status": "kandilli", "net": "KOERI", "sources": "KOERI"},
+    "EMSC": {"tz": 0, "status": "emsc", "net": "EMSC", "sources": "EMSC"},
+}
+# Properties added per result, never part of a source's event
+_RESULT_PROPERTIES = ("source", "match_group", "source_events")
+
+
+class Event:
+    """
+    Tek bir deprem: eşleştirme, filtreleme ve saklama için gereken alanlar.
+
+    Kandilli ve EMSC kayıtlarının ~30 anahtarlı property seti bu alanlardan
+    ``to_feature`` ile üretilir. USGS'in upstream ``properties`` sözlüğü
+    gerçek veri taşıdığı için ``properties``'te olduğu gibi tutulur.
+    Event'ler cache'ler, canlı pencere ve sonuçlar arasında paylaşılır;
+    değiştirilmezler. Sonuca özgü alanlar (``match_group``,
+    ``source_events``) ``to_feature``'a parametre olarak verilir.
+    """
+
+    __slots__ = (
+        "id", "source", "time", "updated", "lat", "lon", "depth", "mag", "mag_type", "place", "properties",
+    )
+
+    def __init__(
+        self,
+        event_id: str,
+        source: str,
+        time: int | None,
+        lat: float | None,
+        lon: float | None,
+        depth: float | None,
+        mag: float | None,
+        mag_type: str = "",
+        place: str = "",
+        updated: int | None = None,
+        properties: dict[str, Any] | None = None,
+    ):
+        self.id = event_id
+        self.source = source
+        self.time = time
+        self.updated = updated if updated is not None else time
+        self.lat = lat
+        self.lon = lon
+        self.depth = depth
+        self.mag = mag
+        self.mag_type = mag_type
+        self.place = place
+        self.properties = properties
+
+    def __repr__(self) -> str:
+        return f"Event({self.source} {self.id} M{self.mag} t={self.time})"
+
+    @classmethod
+    def from_feature(cls, feature: dict[str, Any], source: str | None = None) -> Event:
+        """GeoJSON feature'dan (USGS yanıtı ya da depodaki kayıt) Event üretir."""
+        props = feature.get("properties") or {}
+        coords = list((feature.get("geometry") or {}).get("coordinates") or ())
+        coords += [None] * (3 - len(coords))
+        source = source or props.get("source") or "USGS"
+        properties = None
+        if source not in _SOURCE_PROPERTIES:
+            properties = {key: value for key, value in props.items() if key not in _RESULT_PROPERTIES}
+        return cls(
+            feature.get("id"),
+            source,
+            props.get("time"),
+            coords[1],
+            coords[0],
+            coords[2],
+            props.get("mag"),
+            mag_type=props.get("magType") or "",
+            place=props.get("place") or "",
+            updated=props.get("updated"),
+            properties=properties,
+        )
+
+    @property
+    def deleted(self) -> bool:
+        """USGS delta yanıtlarında silinmiş olarak işaretlenmiş kayıt."""
+        return self.properties is not None and self.properties.get("status") == "deleted"
+
+    def to_feature(
+        self,
+        match_group: str | None = None,
+        source_events: list[dict[str, Any]] | None = None,
+    ) -> dict[str, Any]:
+        """USGS biçiminde GeoJSON feature üretir (her çağrıda yeni nesne)."""
+        if self.properties is not None:
+            properties = dict(self.properties)
+            properties.setdefault("source", self.source)
+        else:
+            properties = self._render_properties()
+        if match_group:
+            properties["match_group"] = match_group
+        if source_events is not None:
+            properties["source_events"] = source_events
+        return {
+            "type": "Feature",
+            "properties": properties,
+            "geometry": {
+                "type": "Point",
+                "coordinates": [self.lon, self.lat, self.depth],
+            },
+            "id": self.id,
+        }
+
+    def summary(self) -> dict[str, Any]:
+        """Tekilleştirilmiş çıktıda ``source_events`` altındaki özet."""
+        return {
+            "source": self.source,
+            "id": self.id,
+            "mag": self.mag,
+            "time": self.time,
+            "coordinates": [self.lon, self.lat, self.depth],
+        }
+
+    def _render_properties(self) -> dict[str, Any]:
+        fixed = _SOURCE_PROPERTIES[self.source]
+        mag, place = self.mag, self.place
+        return {
+            "mag": mag,
+            "place": place,
+            "time": self.time,
+            "updated": self.updated,
+            "tz": fixed["tz"],
+            "url": "",
+            "detail": "",
+            "felt": None,
+            "cdi": None,
+            "mmi": None,
+            "alert": None,
+            "status": fixed["status"],
+            "tsunami": 0,
+            "sig": 0,
+            "net": fixed["net"],
+            "code": self.id,
+            "ids": self.id,
+            "sources": fixed["sources"],
+            "types": "origin",
+            "nst": None,
+            "dmin": None,
+            "rms": None,
+            "gap": None,
+            "magType": self.mag_type,
+            "type": "earthquake",
+            "title": f"M{mag:.1f} - {place}" if place else f"M{mag:.1f}",
+            "source": self.source,
+        }
+
+
+class EventCollection:
+    """
+    Bir sorgunun sonucu: ``metadata``, event'ler ve her birinin ``match_group``'u.
+
+    ``groups`` verilmezse hiçbir event eşleşmemiş sayılır. GeoJSON
+    FeatureCollection ``to_geojson`` ile istek anında üretilir. Oluşturulduktan
+    sonra değiştirilmez (``fingerprint`` bir kez hesaplanır).
+    """
+
+    __slots__ = ("metadata", "events", "groups", "bbox", "_fingerprint")
+
+    def __init__(
+        self,
+        metadata: dict[str, Any],
+        events: list[Event],
+        groups: list[str | None] | None = None,
+        bbox: list[float] | None = None,
+    ):
+        self.metadata = metadata
+        self.events = events
+        self.groups = groups if groups is not None else [None] * len(events)
+        self.bbox = bbox
+        self._fingerprint: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def fingerprint(self) -> str:
+        """
+        Event kümesinin özeti: event'lerin konum/zaman/büyüklük/güncelleme
+        değerleri, eşleşme grupları ve hangi kaynakların yanıt verdiği.
+
+        ``generated`` ya da ``elapsed_ms`` gibi her çekimde değişen
+        metadata alanları dahil değildir.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.md5()
+            for event, group in zip(self.events, self.groups):
+                digest.update(
+                    f"{event.source}|{event.id}|{event.updated}|{event.time}|{event.mag}|{event.mag_type}|"
+                    f"{event.lat}|{event.lon}|{event.depth}|{event.place}|{group}\n".encode()
+                )
+            sources = sorted(self.metadata.get("sources", {}).items())
+            digest.update(",".join(f"{source}:{status.get('ok')}" for source, status in sources).encode())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def last_modified(self) -> int | None:
+        """En son güncellenen event'in ``updated`` değeri (ms)."""
+        return max((event.updated or event.time for event in self.events if event.time is not None), default=None)
+
+    def to_geojson(
+        self,
+        metadata: dict[str, Any] | None = None,
+        features: Iterable[dict[str, Any]] | None = None,
+    ) -> dict[str, Any]:
+        if features is None:
+            features = (event.to_feature(group) for event, group in zip(self.events, self.groups))
+        data = {
+            "type": "FeatureCollection",
+            "metadata": metadata if metadata is not None else self.metadata,
+            "features": list(features),
+        }
+        if self.bbox is not None:
+            data["bbox"] = self.bbox
+        return data
@@ -0,0 +1,242 @@
+"""
+Earthquake Index
+Kaynaklar arası deprem eşleştirmesi ve alan sorguları için ızgara indeksleri.
+"""
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from services.earthquake_event import Event
+    from services.earthquake_region import Region
+
+
+class EventMatchIndex:
+    """
+    Event'ler için id + zaman/enlem/boylam ızgara indeksi.
+
+    Hücre boyutları eşleşme toleranslarına eşittir; tolerans içindeki iki
+    olay ya aynı hücrede ya da komşu hücrelerdedir. Böylece her aday tüm
+    listeyi taramak yerine 3x3x3 komşu hücreye bakar.
+    """
+
+    def __init__(
+        self,
+        time_tolerance_ms: float,
+        coord_tolerance_deg: float,
+        mag_tolerance: float,
+    ):
+        self.time_tolerance_ms = time_tolerance_ms
+        self.coord_tolerance_deg = coord_tolerance_deg
+        self.mag_tolerance = mag_tolerance
+        self._items: list[Event] = []
+        self._ids: dict[Any, list[int]] = {}
+        # (time_cell, lat_cell, lon_cell) -> ascending positions
+        self._grid: dict[tuple[int, int, int], list[int]] = {}
+        # position -> (time, mag, lat, lon)
+        self._values: dict[int, tuple[float, float, float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, event: Event) -> int:
+        """Event'i indekse ekler ve sırasını (position) döner."""
+        position = len(self._items)
+        self._items.append(event)
+
+        if event.id:
+            self._ids.setdefault(event.id, []).append(position)
+
+        values = self._match_values(event)
+        if values is not None:
+            self._values[position] = values
+            self._grid.setdefault(self._cell(values), []).append(position)
+        return position
+
+    def find_matches(self, candidate: Event) -> list[int]:
+        """
+        Aday ile eşleşen tüm kayıtların sırasını döner.
+
+        Aynı id'ye sahip kayıtlar önce gelir; kalanlar toleranslara göre
+        normalize edilmiş uzaklığa (en yakın önce) göre sıralanır.
+        """
+        matches: list[int] = []
+        if candidate.id:
+            matches.extend(self._ids.get(candidate.id, ()))
+
+        values = self._match_values(candidate)
+        if values is None:
+            return matches
+        cand_time, cand_mag, cand_lat, cand_lon = values
+        time_cell, lat_cell, lon_cell = self._cell(values)
+
+        seen = set(matches)
+        scored: list[tuple[float, int]] = []
+        for dt in (-1, 0, 1):
+            for dlat in (-1, 0, 1):
+                for dlon in (-1, 0, 1):
+                    bucket = self._grid.get((time_cell + dt, lat_cell + dlat, lon_cell + dlon))
+                    if not bucket:
+                        continue
+                    for position in bucket:
+                        if position in seen:
+                            continue
+                        item_time, item_mag, item_lat, item_lon = self._values[position]
+                        time_delta = abs(item_time - cand_time)
+                        mag_delta = abs(item_mag - cand_mag)
+                        lat_delta = abs(item_lat - cand_lat)
+                        lon_delta = abs(item_lon - cand_lon)
+                        if (
+                            time_delta > self.time_tolerance_ms
+                            or mag_delta > self.mag_tolerance
+                            or lat_delta > self.coord_tolerance_deg
+                            or lon_delta > self.coord_tolerance_deg
+                        ):
+                            continue
+                        score = (
+                            time_delta / self.time_tolerance_ms
+                            + mag_delta / self.mag_tolerance
+                            + (lat_delta + lon_delta) / self.coord_tolerance_deg
+                        )
+                        scored.append((score, position))
+        scored.sort()
+        matches.extend(position for _, position in scored)
+        return matches
+
+    def _cell(self, values: tuple[float, float, float, float]) -> tuple[int, int, int]:
+        time_ms, _, lat, lon = values
+        return (
+            math.floor(time_ms / self.time_tolerance_ms),
+            math.floor(lat / self.coord_tolerance_deg),
+            math.floor(lon / self.coord_tolerance_deg),
+        )
+
+    @staticmethod
+    def _match_values(event: Event) -> tuple[float, float, float, float] | None:
+        if event.time is None or event.mag is None or event.lat is None or event.lon is None:
+            return None
+        return event.time, event.mag, event.lat, event.lon
+
+
+class EventLocationIndex:
+    """
+    Değişmeyen bir event listesi için enlem/boylam ızgara indeksi.
+
+    ``query`` alanı çevreleyen kutuların kapsadığı hücrelere bakar (hücre
+    sayısı dolu hücrelerden fazlaysa dolu hücreleri tarar), adayları
+    ``Region.contains`` ile süzer ve listedeki sırayla döner.
+    """
+
+    def __init__(self, events: list[Event], cell_deg: float = 1.0):
+        self.events = events
+        self.cell_deg = cell_deg
+        # (lat_cell, lon_cell) -> ascending positions
+        self._grid: dict[tuple[int, int], list[int]] = {}
+        for position, event in enumerate(events):
+            if event.lat is None or event.lon is None:
+                continue
+            self._grid.setdefault(self._cell(event.lat, event.lon), []).append(position)
+
+    def query(self, region: Region) -> list[Event]:
+        positions: set[int] = set()
+        for south, north, west, east in region.rectangles():
+            lat_low, lon_low = self._cell(south, west)
+            lat_high, lon_high = self._cell(north, east)
+            if (lat_high - lat_low + 1) * (lon_high - lon_low + 1) > len(self._grid):
+                cells = [
+                    cell for cell in self._grid
+                    if lat_low <= cell[0] <= lat_high and lon_low <= cell[1] <= lon_high
+                ]
+            else:
+                cells = [
+                    (lat_cell, lon_cell)
+                    for lat_cell in range(lat_low, lat_high + 1)
+                    for lon_cell in range(lon_low, lon_high + 1)
+                ]
+            for cell in cells:
+                positions.update(self._grid.get(cell, ()))
+
+        events = self.events
+        return [
+            events[position]
+            for position in sorted(positions)
+            if region.contains(events[position].lat, events[position].lon)
+        ]
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+
+class DisjointSet:
+    """Union-find (path compression + union by size)."""
+
+    def __init__(self, size: int = 0):
+        self._parent: list[int] = list(range(size))
+        self._size: list[int] = [1] * size
+
+    def add(self) -> int:
+        position = len(self._parent)
+        self._parent.append(position)
+        self._size.append(1)
+        return position
+
+    def find(self, position: int) -> int:
+        root = position
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[position] != root:
+            self._parent[position], position = root, self._parent[position]
+        return root
+
+    def union(self, a: int, b: int) -> int:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+        return root_a
+
+
+def cluster_events(
+    events: list[Event],
+    time_tolerance_ms: float,
+    coord_tolerance_deg: float,
+    mag_tolerance: float,
+) -> list[int]:
+    """
+    Farklı kaynaklardaki aynı depremi tek geçişte kümeler.
+
+    Her event, indeksteki eşleşmeleriyle (en yakın önce) birleştirilir.
+    Aynı kaynaktan iki kayıt ayrı depremlerdir: iki kümenin kaynak kümeleri
+    kesişiyorsa birleştirilmez. Böylece art arda gelen artçılar tolerans
+    zinciriyle tek bir olaya çökmez.
+
+    Returns:
+        Her event için küme kökünün sırası (``events`` ile aynı uzunlukta)
+    """
+    index = EventMatchIndex(time_tolerance_ms, coord_tolerance_deg, mag_tolerance)
+    clusters = DisjointSet()
+    cluster_sources: dict[int, set[str]] = {}
+
+    for event in events:
+        source = event.source or ""
+        position = clusters.add()
+        cluster_sources[position] = {source}
+
+        for match in index.find_matches(event):
+            own_root = clusters.find(position)
+            match_root = clusters.find(match)
+            if own_root == match_root:
+                continue
+            if cluster_sources[own_root] & cluster_sources[match_root]:
+                continue
+            root = clusters.union(own_root, match_root)
+            merged_sources = cluster_sources.pop(own_root) | cluster_sources.pop(match_root)
+            cluster_sources[root] = merged_sources
+
+        index.add(event)
+
+    return [clusters.find(position) for position in range(len(events))]
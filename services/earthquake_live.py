@@ -0,0 +1,120 @@
+"""
+Earthquake Live Window
+Delta polling ile güncel tutulan, kaynak başına son depremler kümesi.
+"""
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Iterable
+
+from services.earthquake_event import Event
+
+if TYPE_CHECKING:
+    from services.earthquake_region import Region
+
+
+class LiveWindow:
+    """
+    Bir kaynağın son ``window_ms`` içindeki depremleri (id -> Event).
+
+    İlk yüklemeden sonra yalnızca ``high_water_ms``'ten sonra güncellenen
+    olaylar uygulanır; böylece yenileme maliyeti pencere boyutuna değil,
+    değişim hızına bağlıdır. Event'ler yerinde değiştirilmez, güncellemede
+    yenisiyle değiştirilir; ``query`` sonuçları kopyalanmadan paylaşılabilir.
+    """
+
+    def __init__(self, source: str, window_ms: int, min_magnitude: float, max_staleness: float):
+        self.source = source
+        self.window_ms = window_ms
+        self.min_magnitude = min_magnitude
+        # Past this many seconds without a successful poll the window is not trusted
+        self.max_staleness = max_staleness
+        self.events: dict[str, Event] = {}
+        self.high_water_ms: int | None = None
+        # Oldest event time from which the window is known to be complete
+        self.complete_from_ms: int | None = None
+        self.synced_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    @property
+    def loaded(self) -> bool:
+        return self.high_water_ms is not None
+
+    def reset(self) -> None:
+        """Bir sonraki poll'un tam yükleme yapmasını sağlar."""
+        self.events.clear()
+        self.high_water_ms = None
+        self.complete_from_ms = None
+
+    def apply(
+        self,
+        events: Iterable[Event],
+        now_ms: int,
+        complete_from_ms: int | None = None,
+    ) -> int:
+        """
+        Tam yüklemeyi ya da bir delta'yı uygular; uygulanan olay sayısını döner.
+
+        ``complete_from_ms`` yalnızca tam yüklemede verilir. Silinmiş
+        (``Event.deleted``) olaylar kümeden çıkarılır.
+        """
+        applied = 0
+        high_water = self.high_water_ms or 0
+        for event in events:
+            if not event.id or event.time is None:
+                continue
+            applied += 1
+            high_water = max(high_water, event.updated or event.time)
+            if event.deleted:
+                self.events.pop(event.id, None)
+            else:
+                self.events[event.id] = event
+
+        if complete_from_ms is not None:
+            self.complete_from_ms = complete_from_ms
+        # Nothing seen yet (e.g. an empty window): changes after this poll are still needed
+        self.high_water_ms = high_water or now_ms
+        self.synced_at = time.monotonic()
+        self._evict(now_ms - self.window_ms)
+        return applied
+
+    def covers(self, start_ms: int, min_magnitude: float) -> bool:
+        """Pencere güncel ve sorgunun başlangıcından itibaren eksiksiz mi?"""
+        return (
+            self.complete_from_ms is not None
+            and time.monotonic() - self.synced_at <= self.max_staleness
+            and start_ms >= self.complete_from_ms
+            and min_magnitude >= self.min_magnitude
+        )
+
+    def query(
+        self,
+        start_ms: int,
+        end_ms: int,
+        min_magnitude: float,
+        max_magnitude: float | None,
+        limit: int | None,
+        region: Region | None = None,
+    ) -> list[Event]:
+        """Filtreye uyan event'ler, en yeni önce (USGS ``orderby=time`` gibi)."""
+        matches = []
+        for event in self.events.values():
+            mag = event.mag
+            if mag is None or event.time < start_ms or event.time > end_ms:
+                continue
+            if mag < min_magnitude or (max_magnitude is not None and mag > max_magnitude):
+                continue
+            if region is not None and not region.contains(event.lat, event.lon):
+                continue
+            matches.append(event)
+        matches.sort(key=lambda event: event.time, reverse=True)
+        return matches[:limit] if limit is not None else matches
+
+    def _evict(self, cutoff_ms: int) -> None:
+        expired = [key for key, event in self.events.items() if event.time < cutoff_ms]
+        for key in expired:
+            del self.events[key]
+        if self.complete_from_ms is not None:
+            self.complete_from_ms = max(self.complete_from_ms, cutoff_ms)
@@ -0,0 +1,213 @@
+"""
+Earthquake Nearest
+Bir noktaya en yakın depremler için birim küre üzerinde KD-tree.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Any, Hashable, Iterable
+
+from services.earthquake_region import EARTH_RADIUS_KM
+
+Point = tuple[float, float, float]
+
+# Ranges this small are scanned instead of split further
+_LEAF_SIZE = 8
+
+
+def to_unit_vector(lat: float, lon: float) -> Point:
+    """(lat, lon) -> birim küre üzerinde (x, y, z); kiriş uzunluğu büyük daireyle monoton."""
+    phi, lam = math.radians(lat), math.radians(lon)
+    cos_phi = math.cos(phi)
+    return cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi)
+
+
+def chord_to_km(squared_chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(squared_chord) / 2))
+
+
+class _KDTree:
+    """
+    Noktaların yerinde sıralandığı örtük (implicit) KD-tree.
+
+    Her ``[low, high)`` aralığının ortasındaki nokta düğümdür; ``axes``
+    o düğümün bölme eksenini tutur. Oluşturulduktan sonra değişmez; birden
+    fazla ``NearestIndex`` nesli tarafından paylaşılabilir.
+    """
+
+    __slots__ = ("points", "keys", "axes", "positions")
+
+    def __init__(self, entries: list[tuple[Point, Hashable]]):
+        self.points: list[Point] = []
+        self.keys: list[Hashable] = []
+        self.axes: list[int] = [0] * len(entries)
+        order = list(entries)
+        self._build(order, 0, len(order))
+        for point, key in order:
+            self.points.append(point)
+            self.keys.append(key)
+        self.positions = {key: position for position, key in enumerate(self.keys)}
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _build(self, entries: list[tuple[Point, Hashable]], low: int, high: int) -> None:
+        if high - low <= _LEAF_SIZE:
+            return
+        chunk = entries[low:high]
+        # Split on the axis with the widest spread
+        spreads = [max(values) - min(values) for values in zip(*(entry[0] for entry in chunk))]
+        axis = spreads.index(max(spreads))
+        chunk.sort(key=lambda entry: entry[0][axis])
+        entries[low:high] = chunk
+        middle = (low + high) // 2
+        self.axes[middle] = axis
+        self._build(entries, low, middle)
+        self._build(entries, middle + 1, high)
+
+    def search(
+        self,
+        target: Point,
+        k: int,
+        alive: set[Hashable],
+        heap: list[tuple[float, int, Hashable]],
+    ) -> None:
+        """``heap``'i (-kiriş², sıra, key) en yakın ``k`` canlı noktayla günceller."""
+        points, keys, axes = self.points, self.keys, self.axes
+        tx, ty, tz = target
+
+        def consider(position: int) -> None:
+            key = keys[position]
+            if key not in alive:
+                return
+            px, py, pz = points[position]
+            distance = (px - tx) ** 2 + (py - ty) ** 2 + (pz - tz) ** 2
+            if len(heap) < k:
+                heapq.heappush(heap, (-distance, -position, key))
+            elif distance < -heap[0][0]:
+                heapq.heapreplace(heap, (-distance, -position, key))
+
+        def visit(low: int, high: int) -> None:
+            if high - low <= _LEAF_SIZE:
+                for position in range(low, high):
+                    consider(position)
+                return
+            middle = (low + high) // 2
+            consider(middle)
+            axis = axes[middle]
+            delta = target[axis] - points[middle][axis]
+            near, far = ((low, middle), (middle + 1, high)) if delta < 0 else ((middle + 1, high), (low, middle))
+            visit(*near)
+            if len(heap) < k or delta * delta < -heap[0][0]:
+                visit(*far)
+
+        visit(0, len(points))
+
+
+class NearestIndex:
+    """
+    Bir event kümesi için k-en-yakın-komşu indeksi.
+
+    Event'ler birim küre üzerinde 3 boyutlu noktalara çevrilir; öklid
+    (kiriş) uzaklığı büyük daire uzaklığıyla aynı sırayı verdiğinden KD-tree
+    doğrudan kullanılabilir ve boylam sarması ya da kutup sorunu olmaz.
+
+    Cache yenilendiğinde ``updated`` önceki neslin ağacını paylaşır: konumu
+    değişmeyen kayıtlar ağaçta kalır, yeni ya da taşınan kayıtlar küçük bir
+    listede doğrusal taranır. Bu fark REBUILD_FRACTION'ı aşınca ağaç baştan
+    kurulur.
+    """
+
+    REBUILD_FRACTION = 0.25
+
+    __slots__ = ("fingerprint", "_tree", "_items", "_alive", "_extra")
+
+    def __init__(self, items: dict[Hashable, tuple[Any, float, float]], fingerprint: str | None = None):
+        """
+        Args:
+            items: key -> (item, enlem, boylam); konumsuz item'lar verilmemelidir
+            fingerprint: İndekslenen event kümesinin özeti (yeniden kullanım kontrolü için)
+        """
+        self.fingerprint = fingerprint
+        self._items = items
+        self._tree = _KDTree([(to_unit_vector(lat, lon), key) for key, (_, lat, lon) in items.items()])
+        self._alive = set(items)
+        self._extra: list[tuple[Point, Hashable]] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @classmethod
+    def build(
+        cls,
+        items: Iterable[tuple[Hashable, Any, float | None, float | None]],
+        fingerprint: str | None = None,
+    ) -> NearestIndex:
+        """(key, item, enlem, boylam) dörtlülerinden indeks kurar; konumsuzlar atlanır."""
+        return cls(cls._collect(items), fingerprint)
+
+    def updated(
+        self,
+        items: Iterable[tuple[Hashable, Any, float | None, float | None]],
+        fingerprint: str | None = None,
+    ) -> NearestIndex:
+        """
+        Yeni event kümesi için indeks; mümkünse bu neslin ağacını yeniden kullanır.
+
+        Aynı key ve aynı konumdaki kayıtlar ağaçtan cevaplanır (item'ı yenisiyle
+        değişir); silinenler ağaçta kalır ama atlanır.
+        """
+        collected = self._collect(items)
+        tree = self._tree
+        alive: set[Hashable] = set()
+        extra: list[tuple[Point, Hashable]] = []
+        for key, (_, lat, lon) in collected.items():
+            point = to_unit_vector(lat, lon)
+            position = tree.positions.get(key)
+            if position is not None and tree.points[position] == point:
+                alive.add(key)
+            else:
+                extra.append((point, key))
+
+        removed = len(tree) - len(alive)
+        if len(extra) + removed > self.REBUILD_FRACTION * max(len(collected), 1):
+            return NearestIndex(collected, fingerprint)
+
+        index = NearestIndex.__new__(NearestIndex)
+        index.fingerprint = fingerprint
+        index._items = collected
+        index._tree = tree
+        index._alive = alive
+        index._extra = extra
+        return index
+
+    def query(self, lat: float, lon: float, k: int) -> list[tuple[float, Any]]:
+        """En yakın ``k`` item, (büyük daire uzaklığı km, item) olarak, en yakın önce."""
+        if k <= 0 or not self._items:
+            return []
+        target = to_unit_vector(lat, lon)
+        heap: list[tuple[float, int, Hashable]] = []
+        self._tree.search(target, k, self._alive, heap)
+
+        tx, ty, tz = target
+        for order, ((px, py, pz), key) in enumerate(self._extra, start=len(self._tree)):
+            distance = (px - tx) ** 2 + (py - ty) ** 2 + (pz - tz) ** 2
+            if len(heap) < k:
+                heapq.heappush(heap, (-distance, -order, key))
+            elif distance < -heap[0][0]:
+                heapq.heapreplace(heap, (-distance, -order, key))
+
+        nearest = sorted((-negative, -order, key) for negative, order, key in heap)
+        return [(chord_to_km(distance), self._items[key][0]) for distance, _, key in nearest]
+
+    @staticmethod
+    def _collect(
+        items: Iterable[tuple[Hashable, Any, float | None, float | None]],
+    ) -> dict[Hashable, tuple[Any, float, float]]:
+        collected: dict[Hashable, tuple[Any, float, float]] = {}
+        for key, item, lat, lon in items:
+            if lat is None or lon is None or key in collected:
+                continue
+            collected[key] = (item, lat, lon)
+        return collected
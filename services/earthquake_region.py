@@ -0,0 +1,228 @@
+"""
+Earthquake Region
+Deprem sorguları için coğrafi alanlar: enlem/boylam kutusu ve merkez + yarıçap.
+"""
+from __future__ import annotations
+
+import math
+from abc import ABC, abstractmethod
+from typing import Any, Iterable
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Half the circumference: a circle this large covers the whole globe
+MAX_RADIUS_KM = math.pi * EARTH_RADIUS_KM
+
+# (south, north, west, east) with west <= east
+Rectangle = tuple[float, float, float, float]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """İki nokta arasındaki büyük daire uzaklığı (km, küresel Dünya)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = math.radians(lon2 - lon1) / 2
+    a = math.sin(half_dphi) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(half_dlambda) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _wrap_longitude(lon: float) -> float:
+    return lon if -180 <= lon <= 180 else (lon + 180) % 360 - 180
+
+
+def _rectangle_within(inner: Rectangle, outer: Rectangle) -> bool:
+    return outer[0] <= inner[0] and inner[1] <= outer[1] and outer[2] <= inner[2] and inner[3] <= outer[3]
+
+
+class Region(ABC):
+    """
+    Sorgunun coğrafi filtresi.
+
+    ``contains`` tek bir noktayı, ``covers`` başka bir alanın tamamen içeride
+    olup olmadığını söyler (cache kapsama kontrolü). ``rectangles`` alanı
+    çevreleyen, 180. meridyende bölünmüş kutulardır (indeks taraması için).
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def contains(self, lat: float | None, lon: float | None) -> bool:
+        ...
+
+    @abstractmethod
+    def covers(self, other: Region) -> bool:
+        ...
+
+    @abstractmethod
+    def rectangles(self) -> list[Rectangle]:
+        ...
+
+    @abstractmethod
+    def fdsn_params(self, radius_km: bool = True) -> dict[str, Any]:
+        """
+        FDSN event servisi parametreleri.
+
+        Args:
+            radius_km: USGS'in ``maxradiuskm`` uzantısını kullan; False ise
+                standart ``maxradius`` (derece) gönderilir (EMSC)
+        """
+
+    @abstractmethod
+    def key(self) -> dict[str, list[float]]:
+        """Cache key'e giren kanonik gösterim."""
+
+
+class BoundingBox(Region):
+    """
+    (batı, güney, doğu, kuzey) derece kutusu.
+
+    GeoJSON'daki gibi batı > doğu, 180. meridyeni geçen kutu demektir.
+    """
+
+    __slots__ = ("west", "south", "east", "north")
+
+    def __init__(self, west: float, south: float, east: float, north: float):
+        self.west = west
+        self.south = south
+        self.east = east
+        self.north = north
+
+    def __repr__(self) -> str:
+        return f"BoundingBox({self.west}, {self.south}, {self.east}, {self.north})"
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> BoundingBox:
+        """
+        Dört sayıyı doğrular; boylamlar [-180, 180]'e sarılır.
+
+        Raises:
+            ValueError: Sayı adedi ya da enlem aralığı geçersiz
+        """
+        values = tuple(float(value) for value in values)
+        if len(values) != 4 or not all(math.isfinite(value) for value in values):
+            raise ValueError("bbox must be four numbers: west,south,east,north")
+        west, south, east, north = values
+        if not -90 <= south <= north <= 90:
+            raise ValueError("bbox latitudes must satisfy -90 <= south <= north <= 90")
+        if east - west >= 360:
+            return cls(-180.0, south, 180.0, north)
+        return cls(_wrap_longitude(west), south, _wrap_longitude(east), north)
+
+    @property
+    def crosses_antimeridian(self) -> bool:
+        return self.west > self.east
+
+    def as_tuple(self) -> tuple[float, float, float, float]:
+        return self.west, self.south, self.east, self.north
+
+    def contains(self, lat: float | None, lon: float | None) -> bool:
+        if lat is None or lon is None or not self.south <= lat <= self.north:
+            return False
+        if self.crosses_antimeridian:
+            return lon >= self.west or lon <= self.east
+        return self.west <= lon <= self.east
+
+    def covers(self, other: Region) -> bool:
+        # Conservative for circles: their bounding rectangles must fit
+        own = self.rectangles()
+        return all(any(_rectangle_within(rect, outer) for outer in own) for rect in other.rectangles())
+
+    def rectangles(self) -> list[Rectangle]:
+        if self.crosses_antimeridian:
+            return [(self.south, self.north, self.west, 180.0), (self.south, self.north, -180.0, self.east)]
+        return [(self.south, self.north, self.west, self.east)]
+
+    def fdsn_params(self, radius_km: bool = True) -> dict[str, Any]:
+        # FDSN allows longitudes up to 360 for boxes crossing the antimeridian
+        east = self.east + 360 if self.crosses_antimeridian else self.east
+        return {
+            "minlatitude": self.south,
+            "maxlatitude": self.north,
+            "minlongitude": self.west,
+            "maxlongitude": east,
+        }
+
+    def key(self) -> dict[str, list[float]]:
+        return {"bbox": list(self.as_tuple())}
+
+
+class Circle(Region):
+    """Merkez (enlem, boylam) ve km cinsinden yarıçap."""
+
+    __slots__ = ("lat", "lon", "radius_km")
+
+    def __init__(self, lat: float, lon: float, radius_km: float):
+        if not (math.isfinite(lat) and math.isfinite(lon) and math.isfinite(radius_km)):
+            raise ValueError("lat, lon and radius_km must be finite numbers")
+        if not -90 <= lat <= 90:
+            raise ValueError("lat must be between -90 and 90")
+        if radius_km <= 0:
+            raise ValueError("radius_km must be positive")
+        self.lat = lat
+        self.lon = _wrap_longitude(lon)
+        self.radius_km = min(radius_km, MAX_RADIUS_KM)
+
+    def __repr__(self) -> str:
+        return f"Circle({self.lat}, {self.lon}, {self.radius_km}km)"
+
+    def contains(self, lat: float | None, lon: float | None) -> bool:
+        if lat is None or lon is None:
+            return False
+        return haversine_km(self.lat, self.lon, lat, lon) <= self.radius_km
+
+    def covers(self, other: Region) -> bool:
+        if isinstance(other, Circle):
+            return haversine_km(self.lat, self.lon, other.lat, other.lon) + other.radius_km <= self.radius_km
+        # A box inside a circle would need its edges checked on the sphere; not worth it
+        return False
+
+    def rectangles(self) -> list[Rectangle]:
+        angle = self.radius_km / EARTH_RADIUS_KM
+        south = self.lat - math.degrees(angle)
+        north = self.lat + math.degrees(angle)
+        if south <= -90 or north >= 90:
+            # Contains a pole: every longitude
+            return [(max(south, -90.0), min(north, 90.0), -180.0, 180.0)]
+        # Widest longitude extent of a spherical cap
+        spread = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(self.lat)))))
+        west, east = self.lon - spread, self.lon + spread
+        if west < -180:
+            return [(south, north, west + 360, 180.0), (south, north, -180.0, east)]
+        if east > 180:
+            return [(south, north, west, 180.0), (south, north, -180.0, east - 360)]
+        return [(south, north, west, east)]
+
+    def fdsn_params(self, radius_km: bool = True) -> dict[str, Any]:
+        params: dict[str, Any] = {"latitude": self.lat, "longitude": self.lon}
+        if radius_km:
+            params["maxradiuskm"] = self.radius_km
+        else:
+            params["maxradius"] = self.radius_km / KM_PER_DEGREE
+        return params
+
+    def key(self) -> dict[str, list[float]]:
+        return {"circle": [self.lat, self.lon, self.radius_km]}
+
+
+def parse_region(
+    bbox: Iterable[float] | None = None,
+    lat: float | None = None,
+    lon: float | None = None,
+    radius_km: float | None = None,
+) -> Region | None:
+    """
+    Sorgu parametrelerinden alanı üretir; hiçbiri verilmemişse None (tüm dünya).
+
+    Raises:
+        ValueError: Eksik, geçersiz ya da birlikte kullanılmış parametreler
+    """
+    circle_params = (lat, lon, radius_km)
+    if bbox is not None:
+        if any(value is not None for value in circle_params):
+            raise ValueError("Use either bbox or lat/lon/radius_km, not both")
+        return BoundingBox.from_values(bbox)
+    if all(value is None for value in circle_params):
+        return None
+    if any(value is None for value in circle_params):
+        raise ValueError("lat, lon and radius_km must be given together")
+    return Circle(float(lat), float(lon), float(radius_km))
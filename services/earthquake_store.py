@@ -0,0 +1,181 @@
+"""
+Earthquake Store
+Kaynaklardan gelen depremlerin SQLite üzerinde kalıcı olarak saklanması.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+
+from services.earthquake_event import Event
+
+if TYPE_CHECKING:
+    from services.earthquake_region import Region
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    mag REAL NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    feature TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_source_time ON events (source, time);
+CREATE INDEX IF NOT EXISTS events_mag ON events (mag);
+CREATE INDEX IF NOT EXISTS events_location ON events (lat, lon);
+
+-- Time ranges for which every event of a source with mag >= min_mag is stored
+CREATE TABLE IF NOT EXISTS coverage (
+    source TEXT NOT NULL,
+    min_mag REAL NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_source ON coverage (source, min_mag, start);
+"""
+
+
+class EarthquakeStore:
+    """
+    Event'ler için SQLite deposu (satır başına GeoJSON feature olarak).
+
+    Her event id'sine göre upsert edilir. Ayrıca her kaynak için hangi
+    zaman aralıklarının (ve hangi minimum büyüklükten itibaren) eksiksiz
+    saklandığı tutulur; ``read`` yalnızca bu aralıkların tamamen kapsadığı
+    sorgulara cevap verir. Metotlar blocking'dir, thread'den çağrılmalıdır.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def save(
+        self,
+        source: str,
+        events: Iterable[Event],
+        covered: tuple[int, int, float] | None = None,
+        deleted: Iterable[str] = (),
+    ) -> int:
+        """
+        Event'leri upsert eder; ``covered`` (start_ms, end_ms, min_mag)
+        verilmişse bu aralık eksiksiz olarak işaretlenir. ``deleted``
+        upstream'de geri çekilen event id'leridir ve depodan silinir.
+
+        Returns:
+            Yazılan event sayısı
+        """
+        rows = []
+        for event in events:
+            if not event.id or event.time is None or event.mag is None or event.lat is None or event.lon is None:
+                continue
+            rows.append((
+                event.id, source, event.time, event.mag, event.lat, event.lon,
+                json.dumps(event.to_feature(), separators=(",", ":")),
+            ))
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO events (id, source, time, mag, lat, lon, feature) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                conn.executemany("DELETE FROM events WHERE id = ?", [(event_id,) for event_id in deleted])
+                if covered is not None:
+                    self._add_coverage(conn, source, *covered)
+        return len(rows)
+
+    def read(
+        self,
+        source: str,
+        start_ms: int,
+        end_ms: int,
+        min_magnitude: float,
+        max_magnitude: float | None = None,
+        limit: int | None = None,
+        region: Region | None = None,
+    ) -> list[Event] | None:
+        """
+        Aralık tamamen kapsanıyorsa event'leri (en yeni önce) döner, yoksa None.
+
+        ``region`` verilmişse satırlar önce çevreleyen kutularla SQL'de,
+        sonra ``Region.contains`` ile süzülür; ``limit`` süzmeden sonra uygulanır.
+        """
+        with self._lock:
+            conn = self._connect()
+            if not self._covers(conn, source, start_ms, end_ms, min_magnitude):
+                return None
+            sql = "SELECT lat, lon, feature FROM events WHERE source = ? AND time BETWEEN ? AND ? AND mag >= ?"
+            params: list[Any] = [source, start_ms, end_ms, min_magnitude]
+            if max_magnitude is not None:
+                sql += " AND mag <= ?"
+                params.append(max_magnitude)
+            if region is not None:
+                rectangles = region.rectangles()
+                sql += " AND (" + " OR ".join(
+                    "(lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?)" for _ in rectangles
+                ) + ")"
+                params.extend(value for rectangle in rectangles for value in rectangle)
+            sql += " ORDER BY time DESC"
+            if limit is not None and region is None:
+                sql += " LIMIT ?"
+                params.append(limit)
+            rows = conn.execute(sql, params).fetchall()
+        if region is not None:
+            rows = [row for row in rows if region.contains(row[0], row[1])][:limit]
+        return [Event.from_feature(json.loads(row[2]), source) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _covers(conn: sqlite3.Connection, source: str, start_ms: int, end_ms: int, min_mag: float) -> bool:
+        # Ranges recorded with a lower (or equal) min_mag also cover this query
+        rows = conn.execute(
+            "SELECT start, end FROM coverage "
+            "WHERE source = ? AND min_mag <= ? AND end >= ? AND start <= ? ORDER BY start",
+            (source, min_mag, start_ms, end_ms),
+        ).fetchall()
+        cursor = start_ms
+        for start, end in rows:
+            if start > cursor:
+                return False
+            cursor = max(cursor, end)
+            if cursor >= end_ms:
+                return True
+        return False
+
+    @staticmethod
+    def _add_coverage(conn: sqlite3.Connection, source: str, start_ms: int, end_ms: int, min_mag: float) -> None:
+        """Aralığı, aynı min_mag ile çakışan/komşu aralıklarla birleştirerek ekler."""
+        overlapping = conn.execute(
+            "SELECT rowid, start, end FROM coverage "
+            "WHERE source = ? AND min_mag = ? AND end >= ? AND start <= ?",
+            (source, min_mag, start_ms, end_ms),
+        ).fetchall()
+        for rowid, start, end in overlapping:
+            start_ms, end_ms = min(start_ms, start), max(end_ms, end)
+        conn.executemany("DELETE FROM coverage WHERE rowid = ?", [(row[0],) for row in overlapping])
+        conn.execute(
+            "INSERT INTO coverage (source, min_mag, start, end) VALUES (?, ?, ?, ?)",
+            (source, min_mag, start_ms, end_ms),
+        )
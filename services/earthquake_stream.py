@@ -0,0 +1,176 @@
+"""
+Earthquake Stream
+Upstream yanıtlarının indirilirken parça parça ayrıştırılması.
+"""
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Any
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_JSON = json.JSONDecoder()
+_PRE_OPEN = re.compile(r"<pre[^>]*>", re.I)
+_PRE_CLOSE = re.compile(r"</pre>", re.I)
+
+# FeatureStream states
+_START, _MEMBERS, _FEATURES, _DONE = range(4)
+
+
+class FeatureStream:
+    """
+    GeoJSON FeatureCollection'ı parça parça ayrıştırır.
+
+    ``feed`` gelen baytları ekler ve tamamlanan feature'ları sözlük olarak
+    döner. Bellekte yalnızca henüz tamamlanmamış son feature tutulur; ham
+    gövde, metni ve tüm nesne ağacı hiçbir an birlikte oluşmaz.
+    ``features`` dışındaki üst düzey alanlar (``metadata``, ``bbox``)
+    ``members``'ta toplanır.
+    """
+
+    __slots__ = ("members", "_decoder", "_buffer", "_state")
+
+    def __init__(self):
+        self.members: dict[str, Any] = {}
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = _START
+
+    def feed(self, chunk: bytes) -> list[dict[str, Any]]:
+        self._buffer += self._decoder.decode(chunk)
+        return self._drain(final=False)
+
+    def close(self) -> list[dict[str, Any]]:
+        """
+        Kalan feature'ları döner.
+
+        Boş gövde sıfır feature'dır: FDSN servisleri sonuçsuz sorgulara
+        gövdesiz 204 döner.
+
+        Raises:
+            ValueError: Belge eksik ya da geçersiz
+        """
+        self._buffer += self._decoder.decode(b"", final=True)
+        if self._state == _START and not self._buffer.strip():
+            self._state = _DONE
+            return []
+        features = self._drain(final=True)
+        if self._state != _DONE:
+            raise ValueError("Truncated GeoJSON document")
+        return features
+
+    def _drain(self, final: bool) -> list[dict[str, Any]]:
+        buffer = self._buffer
+        features: list[dict[str, Any]] = []
+        # Only advanced once a whole token is available; the rest waits for the next chunk
+        position = 0
+        while self._state != _DONE:
+            start = _WHITESPACE.match(buffer, position).end()
+            if start == len(buffer):
+                break
+            char = buffer[start]
+
+            if self._state == _START:
+                if char != "{":
+                    raise ValueError("GeoJSON document must be an object")
+                self._state = _MEMBERS
+                position = start + 1
+            elif char == ",":
+                position = start + 1
+            elif self._state == _FEATURES:
+                if char == "]":
+                    self._state = _MEMBERS
+                    position = start + 1
+                    continue
+                decoded = self._decode(buffer, start, final)
+                if decoded is None:
+                    break
+                feature, position = decoded
+                features.append(feature)
+            elif char == "}":
+                self._state = _DONE
+                position = start + 1
+            else:
+                decoded = self._decode(buffer, start, final)
+                if decoded is None:
+                    break
+                key, end = decoded
+                colon = _WHITESPACE.match(buffer, end).end()
+                value_start = _WHITESPACE.match(buffer, colon + 1).end()
+                if value_start >= len(buffer):
+                    if final:
+                        raise ValueError("Truncated GeoJSON document")
+                    break
+                if buffer[colon] != ":":
+                    raise ValueError(f"Expected ':' after {key!r}")
+                if key == "features" and buffer[value_start] == "[":
+                    self._state = _FEATURES
+                    position = value_start + 1
+                    continue
+                decoded = self._decode(buffer, value_start, final)
+                if decoded is None:
+                    break
+                self.members[key], position = decoded
+
+        self._buffer = buffer[position:]
+        return features
+
+    @staticmethod
+    def _decode(buffer: str, start: int, final: bool) -> tuple[Any, int] | None:
+        """``start``'taki JSON değeri ve bitişi; veri henüz tamamlanmadıysa None."""
+        try:
+            value, end = _JSON.raw_decode(buffer, start)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None
+        # A number at the end of the buffer may continue in the next chunk
+        if end == len(buffer) and not final:
+            return None
+        return value, end
+
+
+class PreBlockLines:
+    """
+    HTML sayfasındaki ilk ``<pre>`` bloğunun satırlarını parça parça çıkarır.
+
+    Yalnızca tamamlanmış satırlar döner; yarım kalan satır bir sonraki
+    parçayı bekler. Sayfada ``<pre>`` yoksa (düz metin yanıt) ``close``
+    tüm metnin satırlarını döner.
+    """
+
+    __slots__ = ("_buffer", "_inside", "_done")
+
+    def __init__(self):
+        self._buffer = ""
+        self._inside = False
+        self._done = False
+
+    def feed(self, text: str) -> list[str]:
+        if self._done:
+            return []
+        self._buffer += text
+        if not self._inside:
+            match = _PRE_OPEN.search(self._buffer)
+            if match is None:
+                return []
+            self._buffer = self._buffer[match.end():]
+            self._inside = True
+        return self._lines(final=False)
+
+    def close(self) -> list[str]:
+        if self._done:
+            return []
+        return self._lines(final=True)
+
+    def _lines(self, final: bool) -> list[str]:
+        match = _PRE_CLOSE.search(self._buffer)
+        if match is not None:
+            block, self._buffer, self._done = self._buffer[:match.start()], "", True
+        elif final:
+            block, self._buffer, self._done = self._buffer, "", True
+        else:
+            cut = self._buffer.rfind("\n") + 1
+            block, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        return block.splitlines()
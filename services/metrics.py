@@ -0,0 +1,293 @@
+"""
+Metrics Service
+İstek ve aşama (stage) bazlı süre ölçümü, Server-Timing başlığı ve
+Prometheus formatında /metrics çıktısı sağlar.
+"""
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "1.0"))
+
+# Prometheus default latency buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monoton artan sayaç."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Artıp azalabilen anlık değer."""
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """Kümülatif bucket'lı gecikme histogramı."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts..., sum, count]
+        self._values: dict[LabelValues, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = [0.0] * (len(self.buckets) + 2)
+                self._values[labels] = series
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[idx] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._values.items())
+        for labels, series in items:
+            cumulative = 0.0
+            for idx, bound in enumerate(self.buckets):
+                cumulative += series[idx]
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {int(cumulative)}"
+                )
+            inf = 'le="+Inf"'
+            lines.append(
+                f"{self.name}_bucket{_format_labels(self.labelnames, labels, inf)} {int(series[-1])}"
+            )
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-2]!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {int(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Kayıtlı metrikleri Prometheus text formatında sunar."""
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency in seconds.",
+    ("method", "route", "status"),
+)
+REQUESTS_TOTAL = registry.counter(
+    "http_requests_total",
+    "Total HTTP requests.",
+    ("method", "route", "status"),
+)
+STAGE_DURATION = registry.histogram(
+    "stage_duration_seconds",
+    "Latency of instrumented processing stages in seconds.",
+    ("stage",),
+)
+SLOW_REQUESTS_TOTAL = registry.counter(
+    "http_slow_requests_total",
+    "Requests slower than SLOW_REQUEST_SECONDS.",
+    ("route",),
+)
+
+
+# ============================================
+# STAGE TIMING
+# ============================================
+
+_current_timings: contextvars.ContextVar[list[tuple[str, float]] | None] = contextvars.ContextVar(
+    "request_stage_timings", default=None
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Bir işlem aşamasının süresini ölçer.
+
+    Süre ``stage_duration_seconds`` histogramına yazılır; bir istek
+    bağlamında çalışıyorsa ayrıca Server-Timing başlığına eklenir.
+    Context, FastAPI'nin thread pool'una ve gather edilen task'lere
+    taşındığı için senkron endpoint'ler ve paralel coroutine'ler de aynı
+    isteğe kaydedilir (``loop.run_in_executor`` context taşımaz; orada
+    ölçümü await eden coroutine içinde yapın).
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.observe(elapsed, name)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def _server_timing_value(timings: list[tuple[str, float]], total: float) -> bytes:
+    totals: dict[str, float] = {}
+    for name, elapsed in timings:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    parts = [f"{name};dur={elapsed * 1000:.2f}" for name, elapsed in totals.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    İstek süresini ölçen ham ASGI middleware.
+
+    Aşama sürelerini ``Server-Timing`` başlığı olarak döner, istek
+    histogramlarını günceller ve ``SLOW_REQUEST_SECONDS`` üzerindeki istekleri
+    girdi boyutu ve aşama dökümüyle loglar.
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_seconds: float = SLOW_REQUEST_SECONDS):
+        self.app = app
+        self.slow_request_seconds = slow_request_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: list[tuple[str, float]] = []
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+        input_bytes = 0
+
+        async def receive_wrapper() -> Message:
+            nonlocal input_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                input_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (b"server-timing", _server_timing_value(timings, time.perf_counter() - started))
+                )
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            _current_timings.reset(token)
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            status = str(status_code)
+            REQUEST_DURATION.observe(elapsed, scope["method"], route_path, status)
+            REQUESTS_TOTAL.inc(scope["method"], route_path, status)
+            if elapsed >= self.slow_request_seconds:
+                SLOW_REQUESTS_TOTAL.inc(route_path)
+                breakdown = ", ".join(f"{name}={value * 1000:.1f}ms" for name, value in timings)
+                print(
+                    f"[SLOW] {scope['method']} {scope['path']} status={status} "
+                    f"total={elapsed * 1000:.1f}ms input_bytes={input_bytes} "
+                    f"stages=[{breakdown}]"
+                )
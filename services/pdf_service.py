@@ -6,6 +6,7 @@ from __future__ import annotations
 
 import asyncio
 import hashlib
+import importlib.util
 import os
 import re
 import shutil
@@ -17,19 +18,13 @@ from typing import Any
 import aiofiles
 import aiofiles.os
 
-# PDF conversion library
-try:
-    from pdf2docx import Converter
-    PDF2DOCX_AVAILABLE = True
-except ImportError:
-    PDF2DOCX_AVAILABLE = False
+from services.metrics import stage
 
-# PDF merge library
-try:
-    from pypdf import PdfReader, PdfWriter
-    PYPDF_AVAILABLE = True
-except ImportError:
-    PYPDF_AVAILABLE = False
+# PDF conversion / merge libraries. Only checked for here; they are heavy
+# (pdf2docx pulls in PyMuPDF and its image stack) and are imported on first
+# use inside the thread pool, or ahead of time by services.warmup.
+PDF2DOCX_AVAILABLE = importlib.util.find_spec("pdf2docx") is not None
+PYPDF_AVAILABLE = importlib.util.find_spec("pypdf") is not None
 
 # Environment configuration
 PDF_MAX_FILE_SIZE_MB = int(os.getenv("PDF_MAX_FILE_SIZE_MB", "50"))
@@ -245,7 +240,8 @@ class PDFService:
             )
 
         # Try to get page count
-        page_count = await self._get_page_count(content)
+        with stage("pdf_page_count"):
+            page_count = await self._get_page_count(content)
 
         return PDFValidationResult(
             is_valid=True,
@@ -302,19 +298,21 @@ class PDFService:
 
         try:
             # Save input file
-            async with aiofiles.open(input_path, "wb") as f:
-                await f.write(content)
+            with stage("pdf_write"):
+                async with aiofiles.open(input_path, "wb") as f:
+                    await f.write(content)
 
             # Convert in thread pool (pdf2docx is sync)
             loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
-                self._sync_convert_pdf_to_docx,
-                str(input_path),
-                str(output_path),
-                start_page,
-                end_page,
-            )
+            with stage("pdf_convert"):
+                await loop.run_in_executor(
+                    None,
+                    self._sync_convert_pdf_to_docx,
+                    str(input_path),
+                    str(output_path),
+                    start_page,
+                    end_page,
+                )
 
             # Verify output exists
             if not output_path.exists():
@@ -359,6 +357,8 @@ class PDFService:
         end_page: int | None,
     ) -> None:
         """Senkron PDF -> DOCX dönüşümü (thread pool'da çalışır)."""
+        from pdf2docx import Converter
+
         cv = Converter(input_path)
         try:
             cv.convert(output_path, start=start_page, end=end_page)
@@ -414,20 +414,22 @@ class PDFService:
 
         try:
             # Save input files
-            for idx, (content, filename) in enumerate(files):
-                input_path = self._temp_dir / f"{file_id}_input_{idx}.pdf"
-                async with aiofiles.open(input_path, "wb") as f:
-                    await f.write(content)
-                input_paths.append(input_path)
+            with stage("pdf_write"):
+                for idx, (content, filename) in enumerate(files):
+                    input_path = self._temp_dir / f"{file_id}_input_{idx}.pdf"
+                    async with aiofiles.open(input_path, "wb") as f:
+                        await f.write(content)
+                    input_paths.append(input_path)
 
             # Merge in thread pool (pypdf is sync)
             loop = asyncio.get_event_loop()
-            total_pages = await loop.run_in_executor(
-                None,
-                self._sync_merge_pdfs,
-                [str(p) for p in input_paths],
-                str(output_path),
-            )
+            with stage("pdf_merge"):
+                total_pages = await loop.run_in_executor(
+                    None,
+                    self._sync_merge_pdfs,
+                    [str(p) for p in input_paths],
+                    str(output_path),
+                )
 
             # Verify output exists
             if not output_path.exists():
@@ -470,6 +472,8 @@ class PDFService:
         output_path: str,
     ) -> int:
         """Senkron PDF birleştirme (thread pool'da çalışır)."""
+        from pypdf import PdfReader, PdfWriter
+
         writer = PdfWriter()
         total_pages = 0
 
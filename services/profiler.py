@@ -0,0 +1,104 @@
+"""
+Profiler Service
+Çalışan worker içinde düşük maliyetli, örnekleme (sampling) tabanlı profil
+çıkarır. Sadece standart kütüphane kullanır.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_DEFAULT_INTERVAL_MS = 10
+
+# Leaf frames that mean "thread is parked, not working"
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),  # concurrent.futures worker blocked on its queue
+}
+
+
+class ProfilerBusyError(Exception):
+    """Aynı anda ikinci bir profil isteği."""
+    pass
+
+
+class SamplingProfiler:
+    """
+    Thread tabanlı stack örnekleyici.
+
+    Ayrı bir thread ``sys._current_frames()`` ile belirli aralıklarla tüm
+    thread'lerin stack'lerini okur: event loop thread'i, FastAPI'nin senkron
+    endpoint'leri (``analyze_text``, exporter'lar) için kullandığı AnyIO
+    thread pool'u ve PDF işlerinin çalıştığı asyncio executor'ı aynı profilde
+    görünür. Çıktı flame graph araçlarının beklediği "collapsed stack"
+    formatındadır (``thread;frame;frame count``).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def profile(
+        self,
+        seconds: float,
+        interval_ms: int = PROFILE_DEFAULT_INTERVAL_MS,
+        include_idle: bool = False,
+    ) -> str:
+        """
+        ``seconds`` boyunca örnekle ve collapsed stack metnini döndür.
+
+        Blocking çalışır; event loop'tan bir thread pool üzerinden çağrılmalı.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("Profiler is already running")
+        try:
+            stacks = self._sample(seconds, interval_ms / 1000, include_idle)
+        finally:
+            self._lock.release()
+
+        lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def _sample(self, seconds: float, interval: float, include_idle: bool) -> Counter:
+        own_ident = threading.get_ident()
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if not include_idle and self._is_idle(frame):
+                    continue
+                thread_name = names.get(ident, f"thread-{ident}")
+                stacks[self._collapse(thread_name, frame)] += 1
+            time.sleep(interval)
+        return stacks
+
+    @staticmethod
+    def _is_idle(frame: FrameType) -> bool:
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES
+
+    @staticmethod
+    def _collapse(thread_name: str, frame: FrameType | None) -> str:
+        frames: list[str] = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(
+                f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            )
+            frame = frame.f_back
+        frames.append(thread_name.replace(" ", "_"))
+        frames.reverse()
+        return ";".join(part.replace(";", ":") for part in frames)
+
+
+# Global profiler instance
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,204 @@
+"""
+Response Encoding
+Önceden serileştirilmiş JSON yanıtları, sıkıştırılmış (gzip / brotli) varyantları
+ve koşullu GET doğrulayıcıları (ETag / Last-Modified).
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+from services.metrics import stage
+
+IDENTITY = "identity"
+# Smaller bodies are sent uncompressed (same threshold as Starlette's GZipMiddleware)
+MIN_COMPRESS_BYTES = 500
+GZIP_LEVEL = 6
+# Quality 11 is ~20x slower for a few percent; 5 is close to gzip speed with smaller output
+BROTLI_QUALITY = 5
+
+# Server preference, best first
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def encode_json(data: Any) -> bytes:
+    """FastAPI/Starlette JSONResponse ile aynı baytlar."""
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str:
+    """
+    ``Accept-Encoding`` başlığına göre ENCODINGS içinden en uygun kodlamayı seçer.
+
+    q-değerleri dikkate alınır (``q=0`` reddeder, ``*`` diğerlerini kapsar);
+    eşitlikte sunucu tercihi (br, sonra gzip) geçerlidir. Uygun kodlama
+    yoksa ``identity`` döner.
+    """
+    if not accept_encoding:
+        return IDENTITY
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip().lower()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = IDENTITY, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def format_http_date(timestamp_ms: int) -> str:
+    return formatdate(timestamp_ms / 1000, usegmt=True)
+
+
+def is_not_modified(
+    if_none_match: str | None,
+    if_modified_since: str | None,
+    etag: str,
+    last_modified_ms: int | None,
+) -> bool:
+    """
+    İstemcinin elindeki kopya hâlâ geçerli mi (304 dönülebilir mi)?
+
+    RFC 9110'daki gibi ``If-None-Match`` varsa yalnızca o değerlendirilir
+    (zayıf karşılaştırma: ``W/`` öneki yok sayılır); yoksa
+    ``If-Modified-Since`` saniye hassasiyetinde karşılaştırılır.
+    """
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if if_modified_since and last_modified_ms is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified_ms // 1000 <= since.timestamp()
+    return False
+
+
+class EncodedPayload:
+    """
+    Bir yanıtın JSON baytları ve istendikçe üretilen sıkıştırılmış varyantları.
+
+    Gövde ilk istekte ``render()`` ile bir kez serileştirilir; her kodlama
+    da ilk istendiğinde bir kez (thread pool'da) sıkıştırılır ve saklanır. Sonraki istekler
+    hazır baytları döner.
+
+    ``validator`` verilmişse gerçekte gönderilen her kodlama için ayrı bir
+    strong ETag üretilir (farklı baytlar, farklı ETag; sıkıştırılmayan küçük
+    gövdeler tek ETag taşır); ``last_modified`` milisaniye cinsindendir.
+    ``revalidate_only`` gövdesi doğrulayıcının temsil ettiği yanıttan farklı
+    olan (ör. bayat işaretli) yanıtlar içindir: 304 kararı verilir ama
+    doğrulayıcılar 200 yanıtında gönderilmez.
+    """
+
+    __slots__ = ("_render", "_variants", "validator", "last_modified", "revalidate_only")
+
+    def __init__(
+        self,
+        render: Callable[[], Any],
+        validator: str | None = None,
+        last_modified: int | None = None,
+        revalidate_only: bool = False,
+    ):
+        self._render = render
+        self._variants: dict[str, bytes] = {}
+        self.validator = validator
+        self.last_modified = last_modified
+        self.revalidate_only = revalidate_only
+
+    def etag(self, encoding: str = IDENTITY) -> str | None:
+        if self.validator is None:
+            return None
+        if encoding == IDENTITY:
+            return f'"{self.validator}"'
+        return f'"{self.validator}-{encoding}"'
+
+    def etags(self, encoding: str = IDENTITY) -> tuple[str, ...]:
+        """
+        İstenen kodlamayla gönderilebilecek temsillerin ETag'leri.
+
+        Gövde henüz üretilmeden 304 kararı için kullanılır: istemcide
+        bunlardan biri varsa aynı event'lere sahiptir.
+        """
+        if self.validator is None:
+            return ()
+        if encoding == IDENTITY:
+            return (self.etag(),)
+        return self.etag(encoding), self.etag()
+
+    def content_encoding(self, encoding: str = IDENTITY) -> str:
+        """
+        İstenen kodlama için gerçekte gönderilecek kodlama.
+
+        Küçük gövdeler sıkıştırılmaz; ETag de bu kodlamaya göre seçilmelidir
+        ki aynı baytlar her istemciye aynı ETag ile gitsin. Gövdeyi (bir kez)
+        serileştirir.
+        """
+        if encoding == IDENTITY or len(self._raw()) < MIN_COMPRESS_BYTES:
+            return IDENTITY
+        return encoding
+
+    async def body(self, encoding: str = IDENTITY) -> tuple[bytes, str]:
+        """
+        Kodlanmış gövdeyi döner.
+
+        Sıkıştırma (MB'lık gövdelerde onlarca ms) bir worker thread'de
+        yapılır; event loop bu sürede diğer istekleri karşılar.
+
+        Returns:
+            (gövde, gerçekte kullanılan kodlama); küçük gövdeler sıkıştırılmaz
+        """
+        raw = self._raw()
+        encoding = self.content_encoding(encoding)
+        if encoding == IDENTITY:
+            return raw, IDENTITY
+
+        compressed = self._variants.get(encoding)
+        if compressed is None:
+            with stage(f"compress_{encoding}"):
+                compressed = await asyncio.to_thread(self._compress, raw, encoding)
+            self._variants[encoding] = compressed
+        return compressed, encoding
+
+    def _raw(self) -> bytes:
+        raw = self._variants.get(IDENTITY)
+        if raw is None:
+            with stage("serialize"):
+                raw = self._variants[IDENTITY] = encode_json(self._render())
+            self._render = None
+        return raw
+
+    @staticmethod
+    def _compress(raw: bytes, encoding: str) -> bytes:
+        if encoding == "br" and brotli is not None:
+            return brotli.compress(raw, quality=BROTLI_QUALITY)
+        if encoding == "gzip":
+            return gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+        raise ValueError(f"Unsupported content encoding: {encoding}")
@@ -0,0 +1,47 @@
+"""
+Warmup Service
+Ağır, opsiyonel kütüphaneleri ilk istekten önce yükler.
+
+``main`` bu modülleri import etmez; ilk kullanımda yüklenirler. Worker'ın
+ilk PDF / deprem isteğinde bu gecikmeyi ödememesi için lifespan sırasında
+arka planda, gunicorn preload modunda ise fork'tan önce master süreçte
+yüklenebilirler.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import os
+
+HEAVY_MODULES = (
+    "httpx",
+    "pypdf",
+    "pdf2docx",
+    "reportlab.pdfgen.canvas",
+)
+
+# "background" (default): import in a thread after startup, "off": first use only
+WARMUP_MODE = os.getenv("WARMUP_MODE", "background")
+
+
+def preload_heavy_modules() -> list[str]:
+    """HEAVY_MODULES içindeki kurulu modülleri import eder; yüklenenleri döner."""
+    loaded: list[str] = []
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        loaded.append(name)
+    return loaded
+
+
+def start_background_warmup() -> asyncio.Task | None:
+    """
+    WARMUP_MODE'a göre ağır modülleri arka plan thread'inde yükler.
+
+    Çalışan event loop içinden çağrılmalıdır; startup'ı bekletmez.
+    """
+    if WARMUP_MODE != "background":
+        return None
+    return asyncio.create_task(asyncio.to_thread(preload_heavy_modules))
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker tests
+CircuitBreaker moves closed -> open -> half-open -> closed/open, rejects
+calls while open, lets a single probe through, and adapts its timeout to
+recent latencies.
+
+Run with: python test_circuit_breaker.py  (or pytest test_circuit_breaker.py)
+"""
+import asyncio
+import sys
+import time
+
+from services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+)
+
+RESET_SECONDS = 0.05
+
+
+async def ok() -> str:
+    return "ok"
+
+
+async def fail() -> str:
+    raise ValueError("upstream error")
+
+
+def breaker(**kwargs) -> CircuitBreaker:
+    return CircuitBreaker("test", failure_threshold=3, reset_timeout=RESET_SECONDS, **kwargs)
+
+
+async def call(circuit: CircuitBreaker, func) -> str:
+    try:
+        return await circuit.call(func)
+    except CircuitOpenError:
+        return "rejected"
+    except (ValueError, RuntimeError):
+        return "failed"
+
+
+def open_circuit(circuit: CircuitBreaker) -> None:
+    for _ in range(circuit.failure_threshold):
+        assert asyncio.run(call(circuit, fail)) == "failed"
+
+
+def test_opens_after_consecutive_failures():
+    """failure_threshold consecutive failures open it; a success in between resets the count."""
+    circuit = breaker()
+    asyncio.run(call(circuit, fail))
+    asyncio.run(call(circuit, fail))
+    asyncio.run(call(circuit, ok))
+    asyncio.run(call(circuit, fail))
+    asyncio.run(call(circuit, fail))
+    assert circuit.state == CLOSED
+    asyncio.run(call(circuit, fail))
+    assert circuit.state == OPEN
+
+
+def test_open_rejects_without_calling():
+    """An open circuit raises CircuitOpenError and never runs the call."""
+    circuit = breaker()
+    open_circuit(circuit)
+    calls = []
+
+    async def tracked() -> str:
+        calls.append(1)
+        return "ok"
+
+    assert asyncio.run(call(circuit, tracked)) == "rejected"
+    assert calls == []
+
+
+def test_half_open_probe_success_closes():
+    """After reset_timeout the circuit is half-open and a successful probe closes it."""
+    circuit = breaker()
+    open_circuit(circuit)
+    time.sleep(RESET_SECONDS * 1.5)
+    assert circuit.state == HALF_OPEN
+    assert asyncio.run(call(circuit, ok)) == "ok"
+    assert circuit.state == CLOSED
+
+
+def test_half_open_probe_failure_reopens():
+    """A single failed probe reopens the circuit for another reset_timeout."""
+    circuit = breaker()
+    open_circuit(circuit)
+    time.sleep(RESET_SECONDS * 1.5)
+    assert asyncio.run(call(circuit, fail)) == "failed"
+    assert circuit.state == OPEN
+    assert asyncio.run(call(circuit, ok)) == "rejected"
+
+
+def test_half_open_allows_one_probe():
+    """While the probe is running, concurrent calls are rejected."""
+    circuit = breaker()
+    open_circuit(circuit)
+    time.sleep(RESET_SECONDS * 1.5)
+
+    async def slow() -> str:
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def race() -> list[str]:
+        return await asyncio.gather(call(circuit, slow), call(circuit, ok), call(circuit, ok))
+
+    assert asyncio.run(race()) == ["ok", "rejected", "rejected"]
+    assert circuit.state == CLOSED
+
+
+def test_timeout_counts_as_failure():
+    """A call slower than the timeout fails and counts toward opening."""
+    circuit = breaker(min_timeout=0.01, max_timeout=0.02)
+
+    async def hang() -> str:
+        await asyncio.sleep(1)
+        return "late"
+
+    for _ in range(3):
+        assert asyncio.run(call(circuit, hang)) == "failed"
+    assert circuit.state == OPEN
+
+
+def test_adaptive_timeout():
+    """max_timeout until MIN_SAMPLES successes, then percentile x multiplier within bounds."""
+    circuit = breaker(min_timeout=0.5, max_timeout=3.0, timeout_multiplier=2.0)
+    assert circuit.timeout() == 3.0
+    for seconds in (0.4, 0.5, 0.6, 0.7, 0.8):
+        circuit.latency.record(seconds)
+    assert circuit.timeout() == 1.6
+    for _ in range(50):
+        circuit.latency.record(0.01)
+    assert circuit.timeout() == 0.5
+
+
+def test_slow_large_call_after_fast_small_calls():
+    """Timeouts learned on small queries do not cut off a slow query of another size class."""
+    circuit = breaker(min_timeout=0.01, max_timeout=0.5)
+
+    async def fast() -> str:
+        await asyncio.sleep(0.001)
+        return "small"
+
+    async def slow() -> str:
+        await asyncio.sleep(0.1)
+        return "large"
+
+    async def run() -> str:
+        for _ in range(20):
+            await circuit.call(fast, size_class="1h")
+        assert circuit.timeout("1h") < 0.1
+        return await circuit.call(slow, size_class="30d")
+
+    assert asyncio.run(run()) == "large"
+    assert circuit.timeout("1h") < 0.1, "small class keeps its own timeout"
+    assert circuit.state == CLOSED
+
+
+def test_size_classes_of_windows():
+    """The cache puts windows of different length, magnitude floor or area in different classes."""
+    from datetime import datetime, timedelta, timezone
+
+    from services.earthquake_cache import EarthquakeCache
+    from services.earthquake_region import parse_region
+
+    end = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    day = EarthquakeCache._size_class(end - timedelta(days=1), end, 2.5, None)
+    assert day == EarthquakeCache._size_class(end - timedelta(hours=20), end, 2.9, None)
+    assert day != EarthquakeCache._size_class(end - timedelta(days=30), end, 2.5, None)
+    assert day != EarthquakeCache._size_class(end - timedelta(days=1), end, 0.0, None)
+    region = parse_region(bbox=[26, 36, 45, 42])
+    assert day != EarthquakeCache._size_class(end - timedelta(days=1), end, 2.5, region)
+
+
+def test_latency_tracker_percentile():
+    """percentile is None without samples and only the last ``size`` samples count."""
+    tracker = LatencyTracker(size=4)
+    assert tracker.percentile(0.9) is None
+    for seconds in (9.0, 1.0, 2.0, 3.0, 4.0):
+        tracker.record(seconds)
+    assert len(tracker) == 4
+    assert tracker.percentile(0.0) == 1.0
+    assert tracker.percentile(0.99) == 4.0
+
+
+if __name__ == "__main__":
+    print("\n⚡ Circuit Breaker Tests")
+    print("=" * 60)
+    failed = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {name} - {e}")
+        else:
+            print(f"✅ {name}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Earthquake cache tests against a fake upstream
+Cursor pages are keyset-stable across refreshes, windows truncated at
+MAX_UPSTREAM_LIMIT are completed with aligned time shards, queries inside a
+fresh complete entry are answered without upstream calls, a slow Kandilli
+primary is hedged with the fallback address, the poller's live window follows
+upstream deltas, and invalid
+cursors are rejected with 400 before any upstream call.
+
+Run with: python test_earthquake_cache.py  (or pytest test_earthquake_cache.py)
+"""
+import asyncio
+import base64
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers.earthquake import router
+from services.earthquake_cache import EarthquakeCache
+
+START = datetime(2026, 9, 1)
+MINUTE_MS = 60 * 1000
+
+
+def to_ms(value: datetime) -> int:
+    return int(value.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def parse_time(value: str) -> int:
+    return to_ms(datetime.fromisoformat(value))
+
+
+class FakeUpstream:
+    """
+    In-memory USGS and EMSC catalogs and a Kandilli page behind an
+    ``httpx.MockTransport``.
+
+    Answers FDSN queries like the real services (time window, magnitude,
+    ``updatedafter``, newest first, cut at ``limit``) and records every
+    request. ``delays`` holds the response time of an address; requests
+    cancelled while waiting are recorded in ``cancelled``.
+    """
+
+    def __init__(self):
+        self.events: dict[str, dict[str, dict]] = {"USGS": {}, "EMSC": {}}
+        self.kandilli: list[str] = []
+        self.delays: dict[str, float] = {}
+        self.requests: list[httpx.URL] = []
+        self.cancelled: list[httpx.URL] = []
+
+    def add(self, source: str, event_id: str, time_ms: int, mag: float = 3.0,
+            lat: float = 38.4, lon: float = 26.7, updated: int | None = None, status: str = "reviewed") -> None:
+        self.events[source][event_id] = {
+            "id": event_id, "time": time_ms, "updated": updated or time_ms,
+            "mag": mag, "lat": lat, "lon": lon, "status": status,
+        }
+
+    def calls(self, source: str | None = None) -> list[httpx.URL]:
+        hosts = {"USGS": "earthquake.usgs.gov", "EMSC": "www.seismicportal.eu"}
+        return [url for url in self.requests if source is None or url.host == hosts[source]]
+
+    def cache(self, poll_seconds: int = 0) -> EarthquakeCache:
+        # The poller loop is never started; tests call _poll_source themselves
+        cache = EarthquakeCache(store_path="", poll_seconds=poll_seconds)
+        cache._client = httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+        return cache
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request.url)
+        address = f"{request.url.scheme}://{request.url.host}{request.url.path}"
+        try:
+            await asyncio.sleep(self.delays.get(address, 0))
+        except asyncio.CancelledError:
+            self.cancelled.append(request.url)
+            raise
+        if request.url.host == "www.koeri.boun.edu.tr":
+            page = "<html><pre>\n" + "\n".join(self.kandilli) + "\n</pre></html>"
+            return httpx.Response(200, text=page)
+        params = request.url.params
+        source = "USGS" if request.url.host == "earthquake.usgs.gov" else "EMSC"
+        start = parse_time(params["starttime"]) if "starttime" in params else None
+        end = parse_time(params["endtime"]) if "endtime" in params else None
+        updated_after = parse_time(params["updatedafter"]) if "updatedafter" in params else None
+        min_mag = float(params.get("minmagnitude", "-10"))
+        matched = [
+            record for record in self.events[source].values()
+            if (start is None or record["time"] >= start)
+            and (end is None or record["time"] <= end)
+            and record["mag"] >= min_mag
+            and (updated_after is None or record["updated"] > updated_after)
+            and (record["status"] != "deleted" or params.get("includedeleted") == "true")
+        ]
+        matched.sort(key=lambda record: record["time"], reverse=True)
+        matched = matched[:int(params.get("limit", "20000"))]
+        render = self.usgs_feature if source == "USGS" else self.emsc_feature
+        return httpx.Response(200, json={"type": "FeatureCollection", "features": [render(r) for r in matched]})
+
+    @staticmethod
+    def usgs_feature(record: dict) -> dict:
+        return {
+            "type": "Feature",
+            "id": record["id"],
+            "properties": {
+                "mag": record["mag"], "place": "Aegean Sea", "time": record["time"],
+                "updated": record["updated"], "status": record["status"], "magType": "ml",
+            },
+            "geometry": {"type": "Point", "coordinates": [record["lon"], record["lat"], 10.0]},
+        }
+
+    @staticmethod
+    def emsc_feature(record: dict) -> dict:
+        def iso(ms: int) -> str:
+            return datetime.fromtimestamp(ms / 1000, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+        return {
+            "type": "Feature",
+            "id": record["id"],
+            "properties": {
+                "unid": record["id"], "time": iso(record["time"]), "lastupdate": iso(record["updated"]),
+                "mag": record["mag"], "magtype": "ml", "flynn_region": "AEGEAN SEA",
+            },
+            "geometry": {"type": "Point", "coordinates": [record["lon"], record["lat"], 10.0]},
+        }
+
+
+def catalog(count: int = 150) -> FakeUpstream:
+    """One day of events; every third one also reported by EMSC, some at the same instant."""
+    upstream = FakeUpstream()
+    for i in range(count):
+        time_ms = to_ms(START) + (i // 2) * 5 * MINUTE_MS  # pairs share a timestamp
+        lat, mag = 36 + (i % 40) * 0.15, 2.5 + (i % 5) * 0.5
+        upstream.add("USGS", f"us{i:04d}", time_ms, mag=mag, lat=lat)
+        if i % 3 == 0:
+            upstream.add("EMSC", f"{i:04d}", time_ms + 20 * 1000, mag=mag, lat=lat + 0.01)
+    return upstream
+
+
+QUERY = {"start_time": START, "end_time": START + timedelta(days=1), "min_magnitude": 2.5, "sources": ["usgs", "emsc"]}
+
+
+async def all_pages(cache: EarthquakeCache, limit: int, cursor: str | None = None, **options) -> list[list[str]]:
+    pages = []
+    while True:
+        page = await cache.get_earthquakes(**QUERY, limit=limit, cursor=cursor, **options)
+        pages.append([feature["id"] for feature in page["features"]])
+        cursor = page["metadata"].get("next_cursor")
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    """Following next_cursor yields every event exactly once, in the same order as one big page."""
+    upstream = catalog()
+
+    async def run():
+        cache = upstream.cache()
+        for deduplicate in (False, True):
+            everything = await cache.get_earthquakes(**QUERY, limit=5000, deduplicate=deduplicate)
+            expected = [feature["id"] for feature in everything["features"]]
+            assert "next_cursor" not in everything["metadata"]
+
+            pages = await all_pages(cache, 40, deduplicate=deduplicate)
+            paged = [event_id for page in pages for event_id in page]
+            assert paged == expected, f"deduplicate={deduplicate}"
+            assert all(len(page) == 40 for page in pages[:-1])
+            times = [feature["properties"]["time"] for feature in everything["features"]]
+            assert times == sorted(times, reverse=True)
+        assert len(upstream.requests) == 2, "pages are cut from the cached entry"
+
+    asyncio.run(run())
+
+
+def test_cursor_stable_across_refresh():
+    """Newer events arriving between pages do not shift the pages after the cursor."""
+    upstream = catalog()
+
+    async def run():
+        cache = upstream.cache()
+        before = await all_pages(cache, 40)
+        first = await cache.get_earthquakes(**QUERY, limit=40)
+        cursor = first["metadata"]["next_cursor"]
+
+        for i in range(5):
+            upstream.add("USGS", f"new{i}", to_ms(START + timedelta(hours=23, minutes=59)) - i * MINUTE_MS)
+        # Expire both cache layers so the next request refetches from upstream
+        for layer in (cache._cache, cache._source_cache):
+            for entry in layer.values():
+                entry.created_at -= 10 ** 6
+        refreshed = await all_pages(cache, 40, cursor=cursor)
+        assert len(upstream.requests) == 4, "the entry was refetched"
+
+        assert [event_id for page in refreshed for event_id in page] == [
+            event_id for page in before[1:] for event_id in page
+        ]
+        head = await cache.get_earthquakes(**QUERY, limit=40)
+        assert [feature["id"] for feature in head["features"][:5]] == [f"new{i}" for i in range(5)]
+        assert head["metadata"]["total"] == sum(len(page) for page in before) + 5
+
+    asyncio.run(run())
+
+
+def test_truncated_window_sharded():
+    """A window over MAX_UPSTREAM_LIMIT is completed with day-aligned shards and nothing is lost."""
+    upstream = FakeUpstream()
+    for i in range(1000):  # 100 events per day over ten days
+        upstream.add("USGS", f"us{i:04d}", to_ms(START) + i * 864 * 1000 + 432 * 1000)
+
+    async def run():
+        cache = upstream.cache()
+        cache.MAX_UPSTREAM_LIMIT = 200
+        return await cache.get_earthquakes(
+            start_time=START, end_time=START + timedelta(days=10), sources=["usgs"], limit=5000,
+        )
+
+    data = asyncio.run(run())
+    ids = [feature["id"] for feature in data["features"]]
+    assert len(ids) == len(set(ids)) == 1000
+    status = data["metadata"]["sources"]["USGS"]
+    assert status["ok"] and not status.get("truncated") and not status.get("partial"), status
+    assert status["shards"] > 1
+    assert data["metadata"]["partial"] is False
+
+    calls = upstream.calls("USGS")
+    assert 2 < len(calls) <= 1 + EarthquakeCache.MAX_SHARDS
+    for url in calls[1:]:
+        assert url.params["starttime"].endswith("T00:00:00"), url
+        assert url.params["endtime"].endswith("T00:00:00"), url
+
+
+def test_contained_query_served_locally():
+    """Narrower windows, higher magnitude floors and sub-areas of a fresh complete entry skip upstream."""
+    upstream = catalog()
+    usgs = upstream.events["USGS"].values()
+    narrower = [
+        ({"start_time": START + timedelta(hours=2), "end_time": START + timedelta(hours=6)},
+         lambda r: to_ms(START + timedelta(hours=2)) <= r["time"] <= to_ms(START + timedelta(hours=6))),
+        ({"min_magnitude": 4.0}, lambda r: r["mag"] >= 4.0),
+        ({"min_magnitude": 3.0, "max_magnitude": 3.5}, lambda r: 3.0 <= r["mag"] <= 3.5),
+        ({"bbox": [26, 37, 27, 39]}, lambda r: 37 <= r["lat"] <= 39),
+    ]
+
+    async def run():
+        cache = upstream.cache()
+        await cache.get_earthquakes(**QUERY, limit=5000)
+        assert len(upstream.requests) == 2
+        for override, matches in narrower:
+            data = await cache.get_earthquakes(**{**QUERY, "sources": ["usgs"], **override}, limit=5000)
+            expected = sorted(r["id"] for r in usgs if matches(r))
+            assert sorted(f["id"] for f in data["features"]) == expected, override
+            assert data["metadata"]["count"] == len(expected)
+        assert len(upstream.requests) == 2, "contained queries were answered from the cache"
+
+    asyncio.run(run())
+
+
+def test_uncovered_query_fetched():
+    """Wider windows, lower floors, larger areas and truncated entries go upstream."""
+    upstream = catalog()
+    wider = [
+        {"end_time": START + timedelta(days=2)},
+        {"min_magnitude": 2.0},
+        {"max_magnitude": None, "bbox": [20, 30, 40, 45]},
+    ]
+
+    async def run():
+        cache = upstream.cache()
+        await cache.get_earthquakes(**{**QUERY, "max_magnitude": 4.0, "bbox": [26, 37, 27, 39]}, limit=5000)
+        for override in wider:
+            calls = len(upstream.requests)
+            await cache.get_earthquakes(**{**QUERY, "max_magnitude": 4.0, "bbox": [26, 37, 27, 39], **override})
+            assert len(upstream.requests) > calls, override
+
+        # A window cut at MAX_UPSTREAM_LIMIT (sharding off) is not complete for anything inside it
+        cache = upstream.cache()
+        cache.MAX_UPSTREAM_LIMIT, cache.SHARD_HOURS = 50, 0
+        data = await cache.get_earthquakes(**QUERY, limit=5000)
+        assert data["metadata"]["sources"]["USGS"]["truncated"]
+        calls = len(upstream.requests)
+        await cache.get_earthquakes(**{**QUERY, "sources": ["usgs"], "min_magnitude": 4.0})
+        assert len(upstream.requests) == calls + 1
+
+    asyncio.run(run())
+
+
+def test_live_window_delta_polls():
+    """Full poll, then deltas: updates and new events merged, deleted ones dropped, stale window not trusted."""
+    upstream = FakeUpstream()
+    now = to_ms(datetime.utcnow())
+    hour = 60 * MINUTE_MS
+    for i in range(3):
+        upstream.add("USGS", f"us{i}", now - (i + 1) * hour, mag=3.0 + i)
+    recent = {"window": timedelta(hours=24), "sources": ["usgs"], "min_magnitude": 2.5}
+
+    async def served(cache: EarthquakeCache) -> tuple[dict[str, float], dict]:
+        cache._cache.clear()
+        data = await cache.get_earthquakes(**recent)
+        return {f["id"]: f["properties"]["mag"] for f in data["features"]}, data["metadata"]["sources"]["USGS"]
+
+    async def run():
+        cache = upstream.cache(poll_seconds=30)
+        window = cache._live["USGS"]
+        await cache._poll_source(window)
+        assert "updatedafter" not in upstream.requests[-1].params
+        events, status = await served(cache)
+        assert events == {"us0": 3.0, "us1": 4.0, "us2": 5.0} and status.get("live")
+        assert len(upstream.requests) == 1, "answered from the live window"
+
+        upstream.add("USGS", "us3", now - 10 * MINUTE_MS, mag=2.8, updated=now + 1000)
+        upstream.add("USGS", "us1", now - 2 * hour, mag=4.2, updated=now + 2000)
+        upstream.add("USGS", "us2", now - 3 * hour, mag=5.0, updated=now + 3000, status="deleted")
+        await cache._poll_source(window)
+        delta = upstream.requests[-1].params
+        assert "updatedafter" in delta and delta["includedeleted"] == "true"
+        events, status = await served(cache)
+        assert events == {"us3": 2.8, "us0": 3.0, "us1": 4.2} and status.get("live")
+        assert len(upstream.requests) == 2
+
+        # Trusted for three missed polls (3 * poll_seconds), then the query goes upstream
+        window.synced_at -= 3 * 30 - 5
+        _, status = await served(cache)
+        assert status.get("live") and len(upstream.requests) == 2
+        window.synced_at -= 10
+        events, status = await served(cache)
+        assert not status.get("live")
+        assert len(upstream.requests) == 3 and "endtime" in upstream.requests[-1].params
+        assert events == {"us3": 2.8, "us0": 3.0, "us1": 4.2}
+
+    asyncio.run(run())
+
+
+def test_live_window_truncation():
+    """A live result cut at the query limit is flagged truncated like an upstream response."""
+    upstream = FakeUpstream()
+    now = to_ms(datetime.utcnow())
+    for i in range(5):
+        upstream.add("USGS", f"us{i}", now - (i + 1) * 10 * MINUTE_MS)
+
+    async def run():
+        cache = upstream.cache(poll_seconds=30)
+        await cache._poll_source(cache._live["USGS"])
+        cache.MAX_UPSTREAM_LIMIT, cache.SHARD_HOURS = 3, 0
+        return await cache.get_earthquakes(window=timedelta(hours=24), sources=["usgs"])
+
+    data = asyncio.run(run())
+    status = data["metadata"]["sources"]["USGS"]
+    assert status.get("live") and status.get("truncated")
+    assert [f["id"] for f in data["features"]] == ["us0", "us1", "us2"]
+
+
+def test_kandilli_hedge():
+    """A slow primary is hedged: the fallback answers, the primary is cancelled and its wait sampled."""
+    upstream = FakeUpstream()
+    # Local time (UTC+3), unused Md/Mw columns as on the real page
+    upstream.kandilli = [
+        f"2026.09.01 0{hour}:00:00  38.4000   26.7000   10.0  -.-  3.{hour}  -.-  EGE DENIZI"
+        for hour in range(5, 9)
+    ]
+    upstream.delays[EarthquakeCache.KANDILLI_URL] = 2.0
+    hedge_after = 0.05
+
+    async def run():
+        cache = upstream.cache()
+        cache.KANDILLI_HEDGE_DEFAULT_SECONDS = hedge_after
+        started = time.perf_counter()
+        data = await cache.get_earthquakes(**{**QUERY, "sources": ["kandilli"]})
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.01)  # let the cancellation reach the transport
+        # Before asyncio.run cancels whatever is left over
+        return cache, data, elapsed, list(upstream.cancelled)
+
+    cache, data, elapsed, cancelled = asyncio.run(run())
+    assert [url.host + url.path for url in upstream.requests] == [
+        "www.koeri.boun.edu.tr/scripts/lst9.asp", "www.koeri.boun.edu.tr/scripts/sondepremler.asp",
+    ]
+    assert len(data["features"]) == 4 and data["metadata"]["sources"]["Kandilli"]["ok"]
+    assert elapsed < 1.0, f"waited {elapsed:.2f}s for the primary"
+    assert [url.path for url in cancelled] == ["/scripts/lst9.asp"]
+
+    # Only the censored wait was recorded: a lower bound at least as long as the hedge delay
+    assert len(cache._kandilli_latency) == 1
+    assert hedge_after <= cache._kandilli_latency.percentile(0.0) < 1.0
+
+
+def encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def test_invalid_cursor_rejected():
+    """Malformed cursors get a 400 without touching upstream; a valid one pages normally."""
+    upstream = catalog()
+    app = FastAPI()
+    app.include_router(router)
+    params = {"start_time": "2026-09-01T00:00:00", "end_time": "2026-09-02T00:00:00", "sources": "usgs"}
+
+    with mock.patch("routers.earthquake.earthquake_cache", upstream.cache()):
+        client = TestClient(app)
+        for cursor in ("not*base64", encode(b"[1,2]"), encode(b'["1",0,"x"]'), encode(b"{}")):
+            response = client.get("/earthquakes", params={**params, "cursor": cursor})
+            assert response.status_code == 400, (cursor, response.status_code)
+            assert response.json()["detail"] == "Invalid cursor"
+        assert upstream.requests == []
+
+        first = client.get("/earthquakes", params={**params, "limit": 10}).json()
+        response = client.get("/earthquakes", params={**params, "limit": 10, "cursor": first["metadata"]["next_cursor"]})
+        assert response.status_code == 200
+        assert response.json()["features"][0]["id"] != first["features"][0]["id"]
+
+
+if __name__ == "__main__":
+    print("\n🧭 Earthquake Cache Tests")
+    print("=" * 60)
+    failed = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {name} - {e}")
+        else:
+            print(f"✅ {name}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Cross-source deduplication tests
+cluster_events groups copies of one earthquake transitively with union-find,
+never merges two events of the same source, and gives the same grouping
+whatever order the sources arrive in.
+
+Run with: python test_earthquake_dedup.py  (or pytest test_earthquake_dedup.py)
+"""
+import random
+import sys
+
+from services.earthquake_cache import EarthquakeCache
+from services.earthquake_event import Event
+from services.earthquake_index import DisjointSet, cluster_events
+
+MINUTE_MS = 60 * 1000
+T0 = 1759316400000
+TOLERANCES = {
+    "time_tolerance_ms": EarthquakeCache.TIME_TOLERANCE_MS,
+    "coord_tolerance_deg": EarthquakeCache.COORD_TOLERANCE_DEG,
+    "mag_tolerance": EarthquakeCache.MAG_TOLERANCE,
+}
+
+
+def event(event_id: str, source: str, minutes: float, lat: float = 38.4, lon: float = 26.7, mag: float = 4.0) -> Event:
+    return Event(event_id, source, T0 + round(minutes * MINUTE_MS), lat, lon, 10.0, mag)
+
+
+def partition(events: list[Event]) -> set[frozenset[str]]:
+    """Groups as sets of event ids, independent of root numbering and input order."""
+    roots = cluster_events(events, **TOLERANCES)
+    groups: dict[int, set[str]] = {}
+    for item, root in zip(events, roots):
+        groups.setdefault(root, set()).add(item.id)
+    return {frozenset(group) for group in groups.values()}
+
+
+def test_disjoint_set():
+    """union joins sets transitively; find returns one root per set."""
+    sets = DisjointSet(5)
+    sets.union(0, 1)
+    sets.union(3, 4)
+    sets.union(1, 4)
+    assert len({sets.find(i) for i in (0, 1, 3, 4)}) == 1
+    assert sets.find(2) == 2
+    assert sets.add() == 5 and sets.find(5) == 5
+
+
+def test_transitive_grouping():
+    """A~B and B~C put A, B, C in one group even though A and C are beyond tolerance."""
+    chain = [event("us1", "USGS", 0), event("ko1", "Kandilli", 4), event("em1", "EMSC", 8)]
+    assert EarthquakeCache.TIME_TOLERANCE_MS < 8 * MINUTE_MS
+    assert partition(chain) == {frozenset({"us1", "ko1", "em1"})}
+
+
+def test_same_source_never_merged():
+    """Two events of one source are separate earthquakes, even when a third source matches both."""
+    events = [event("us1", "USGS", 0), event("us2", "USGS", 1), event("ko1", "Kandilli", 0.5)]
+    groups = partition(events)
+    assert not any({"us1", "us2"} <= group for group in groups)
+    assert len(groups) == 2
+
+
+def test_grouping_independent_of_order():
+    """Shuffling the input yields the same groups."""
+    events = [
+        event("us1", "USGS", 0), event("ko1", "Kandilli", 2), event("em1", "EMSC", 4),
+        event("us2", "USGS", 60, lat=39.1, lon=28.1), event("em2", "EMSC", 61, lat=39.15, lon=28.1),
+        event("ko2", "Kandilli", 120, lat=40.0, lon=30.0, mag=2.0),
+        event("em3", "EMSC", 121, lat=40.0, lon=30.0, mag=3.0),  # magnitude too far off
+    ]
+    expected = {
+        frozenset({"us1", "ko1", "em1"}), frozenset({"us2", "em2"}), frozenset({"ko2"}), frozenset({"em3"}),
+    }
+    rng = random.Random(7)
+    for _ in range(20):
+        rng.shuffle(events)
+        assert partition(events) == expected
+
+
+def test_match_group_ids_unique_per_result():
+    """_merge_sources numbers multi-source groups match-1, match-2, ... with no reuse."""
+    cache = EarthquakeCache(store_path="", poll_seconds=0)
+    merged, groups = cache._merge_sources(
+        [event("us1", "USGS", 0), event("us2", "USGS", 60, lat=39.1, lon=28.1)],
+        [event("ko1", "Kandilli", 2)],
+        [event("em1", "EMSC", 4), event("em2", "EMSC", 61, lat=39.15, lon=28.1), event("em3", "EMSC", 200)],
+    )
+    by_id = dict(zip((item.id for item in merged), groups))
+    assert by_id["us1"] == by_id["ko1"] == by_id["em1"]
+    assert by_id["us2"] == by_id["em2"] != by_id["us1"]
+    assert by_id["em3"] is None
+    assert sorted(set(groups) - {None}) == ["match-1", "match-2"]
+
+
+if __name__ == "__main__":
+    print("\n🔗 Earthquake Deduplication Tests")
+    print("=" * 60)
+    failed = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {name} - {e}")
+        else:
+            print(f"✅ {name}")
+    sys.exit(1 if failed else 0)
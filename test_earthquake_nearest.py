@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Nearest-event index tests
+NearestIndex must return the same events and distances as a brute-force
+haversine scan, including across the antimeridian and near the poles, and
+after reusing a previous generation's tree.
+
+Run with: python test_earthquake_nearest.py  (or pytest test_earthquake_nearest.py)
+"""
+import math
+import random
+import sys
+
+from services.earthquake_nearest import NearestIndex
+from services.earthquake_region import haversine_km
+
+SEED = 20261001
+# Query points: ordinary, both sides of the antimeridian, both poles
+QUERIES = [(38.4, 26.7), (0.0, 179.9), (-10.0, -179.95), (89.99, 0.0), (-89.9, 123.0), (0.0, 0.0)]
+
+
+def random_items(rng: random.Random, count: int) -> list[tuple[str, str, float, float]]:
+    items = []
+    for i in range(count):
+        # Uniform on the sphere so the polar caps are populated too
+        lat = math.degrees(math.asin(rng.uniform(-1, 1)))
+        lon = rng.uniform(-180, 180)
+        items.append((f"ev{i}", f"item{i}", lat, lon))
+    return items
+
+
+def brute_force(items, lat: float, lon: float, k: int) -> list[tuple[float, str]]:
+    distances = sorted((haversine_km(lat, lon, item_lat, item_lon), item) for _, item, item_lat, item_lon in items)
+    return distances[:k]
+
+
+def assert_same(index: NearestIndex, items, lat: float, lon: float, k: int) -> None:
+    result = index.query(lat, lon, k)
+    expected = brute_force(items, lat, lon, k)
+    assert len(result) == len(expected), f"({lat}, {lon}) k={k}: {len(result)} != {len(expected)}"
+    for (distance, item), (expected_distance, _) in zip(result, expected):
+        # Ties may come out in either order, so compare distances, not items
+        assert math.isclose(distance, expected_distance, abs_tol=1e-6), (
+            f"({lat}, {lon}) k={k}: {item} at {distance:.6f} km, expected {expected_distance:.6f} km"
+        )
+
+
+def test_matches_brute_force():
+    """k nearest agree with haversine for random points, at the antimeridian and the poles."""
+    rng = random.Random(SEED)
+    items = random_items(rng, 2000)
+    index = NearestIndex.build(items)
+    for lat, lon in QUERIES + [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(20)]:
+        for k in (1, 5, 50):
+            assert_same(index, items, lat, lon, k)
+
+
+def test_antimeridian_and_pole_neighbours():
+    """Neighbours across lon ±180 and around a pole are found by true distance."""
+    items = [
+        ("east", "east", 0.0, 179.9),
+        ("west", "west", 0.0, -179.9),
+        ("far", "far", 0.0, 170.0),
+        ("pole_a", "pole_a", 89.9, 0.0),
+        ("pole_b", "pole_b", 89.9, 180.0),
+    ]
+    index = NearestIndex.build(items)
+    assert [item for _, item in index.query(0.0, -179.95, 2)] == ["west", "east"]
+    assert {item for _, item in index.query(89.95, 90.0, 2)} == {"pole_a", "pole_b"}
+
+
+def test_updated_reuses_tree():
+    """A new generation with a few added, moved and removed events still matches brute force."""
+    rng = random.Random(SEED + 1)
+    items = random_items(rng, 1000)
+    index = NearestIndex.build(items)
+
+    changed = items[10:]  # removed
+    changed[0] = (changed[0][0], "moved", changed[0][2] + 1.0, changed[0][3])
+    changed += [("new0", "new0", 0.0, 179.99), ("new1", "new1", 89.99, -45.0)]
+    updated = index.updated(changed)
+    assert updated._tree is index._tree, "small change should reuse the tree"
+    for lat, lon in QUERIES:
+        assert_same(updated, changed, lat, lon, 10)
+
+
+def test_skips_events_without_location():
+    """Events without coordinates are not indexed; k larger than the set returns all."""
+    index = NearestIndex.build([("a", "a", 1.0, 1.0), ("b", "b", None, 2.0), ("c", "c", 3.0, None)])
+    assert len(index) == 1
+    assert [item for _, item in index.query(0.0, 0.0, 10)] == ["a"]
+    assert index.query(0.0, 0.0, 0) == []
+
+
+if __name__ == "__main__":
+    print("\n📍 Nearest-Event Index Tests")
+    print("=" * 60)
+    failed = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {name} - {e}")
+        else:
+            print(f"✅ {name}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Event store tests
+EarthquakeStore merges overlapping and adjacent coverage ranges, answers
+only queries its coverage fully contains, and removes retracted events.
+
+Run with: python test_earthquake_store.py  (or pytest test_earthquake_store.py)
+"""
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from services.earthquake_event import Event
+from services.earthquake_store import EarthquakeStore
+
+HOUR_MS = 3600 * 1000
+
+
+@contextmanager
+def temp_store():
+    with tempfile.TemporaryDirectory() as directory:
+        store = EarthquakeStore(str(Path(directory) / "events.sqlite3"))
+        try:
+            yield store
+        finally:
+            store.close()
+
+
+def coverage(store: EarthquakeStore, source: str = "EMSC") -> list[tuple[float, int, int]]:
+    return store._connect().execute(
+        "SELECT min_mag, start, end FROM coverage WHERE source = ? ORDER BY min_mag, start", (source,),
+    ).fetchall()
+
+
+def event(event_id: str, hour: float, mag: float = 3.0) -> Event:
+    return Event(event_id, "EMSC", round(hour * HOUR_MS), 38.4, 26.7, 10.0, mag)
+
+
+def test_coverage_ranges_merge():
+    """Overlapping and touching ranges of one min_mag collapse into one row; gaps stay separate."""
+    with temp_store() as store:
+        store.save("EMSC", [], covered=(0, 2 * HOUR_MS, 2.5))
+        store.save("EMSC", [], covered=(5 * HOUR_MS, 6 * HOUR_MS, 2.5))
+        assert coverage(store) == [(2.5, 0, 2 * HOUR_MS), (2.5, 5 * HOUR_MS, 6 * HOUR_MS)]
+
+        store.save("EMSC", [], covered=(HOUR_MS, 3 * HOUR_MS, 2.5))  # overlaps the first
+        store.save("EMSC", [], covered=(3 * HOUR_MS, 5 * HOUR_MS, 2.5))  # touches both
+        assert coverage(store) == [(2.5, 0, 6 * HOUR_MS)]
+
+        store.save("EMSC", [], covered=(HOUR_MS, 2 * HOUR_MS, 4.0))  # other min_mag: own row
+        store.save("USGS", [], covered=(0, HOUR_MS, 2.5))  # other source: own row
+        assert coverage(store) == [(2.5, 0, 6 * HOUR_MS), (4.0, HOUR_MS, 2 * HOUR_MS)]
+
+
+def test_read_requires_full_coverage():
+    """read returns None unless recorded ranges (with min_mag <= query) span the whole window."""
+    with temp_store() as store:
+        store.save("EMSC", [event("a", 1), event("b", 3, mag=5.0)], covered=(0, 2 * HOUR_MS, 2.5))
+        store.save("EMSC", [], covered=(2 * HOUR_MS, 4 * HOUR_MS, 4.0))
+
+        assert [e.id for e in store.read("EMSC", 0, 2 * HOUR_MS, 2.5)] == ["a"]
+        # 2-4 h is only covered from magnitude 4.0 upward
+        assert store.read("EMSC", 0, 4 * HOUR_MS, 2.5) is None
+        assert [e.id for e in store.read("EMSC", 0, 4 * HOUR_MS, 4.0)] == ["b"]
+        assert store.read("EMSC", 0, 5 * HOUR_MS, 4.0) is None
+        assert store.read("USGS", 0, HOUR_MS, 2.5) is None
+
+
+def test_deleted_events_removed():
+    """Event ids passed as ``deleted`` are removed in the same write."""
+    with temp_store() as store:
+        store.save("EMSC", [event("a", 1), event("b", 1.5)], covered=(0, 2 * HOUR_MS, 2.5))
+        store.save("EMSC", [event("c", 1.2)], deleted=["a"])
+        assert [e.id for e in store.read("EMSC", 0, 2 * HOUR_MS, 2.5)] == ["b", "c"]
+
+
+if __name__ == "__main__":
+    print("\n🗄️  Earthquake Store Tests")
+    print("=" * 60)
+    failed = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {name} - {e}")
+        else:
+            print(f"✅ {name}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Streaming parser tests
+FeatureStream and PreBlockLines must give the same result however the body
+is split into chunks, and reject truncated or invalid documents.
+
+Run with: python test_earthquake_stream.py  (or pytest test_earthquake_stream.py)
+"""
+import json
+import sys
+
+from services.earthquake_stream import FeatureStream, PreBlockLines
+
+DOCUMENT = {
+    "type": "FeatureCollection",
+    "metadata": {"generated": 1759316400000, "count": 3, "title": "Deprem — İzmir"},
+    "features": [
+        {
+            "type": "Feature",
+            "id": f"ev{i}",
+            "properties": {"mag": 2.5 + i / 10, "place": "Ege Denizi, Türkiye", "time": 1759316400000 - i},
+            "geometry": {"type": "Point", "coordinates": [26.7, 38.4, 10.0 + i]},
+        }
+        for i in range(3)
+    ],
+    "bbox": [26.7, 38.4, 10.0, 26.7, 38.4, 12.0],
+}
+
+PRE_PAGE = (
+    "<html><body><h1>Son Depremler</h1><pre>\r\n"
+    "Tarih      Saat      Enlem(N)  Boylam(E) Derinlik(km)  MD   ML   Mw    Yer\n"
+    "2026.10.01 11:00:00  38.4000   26.7000        7.0      -.-  2.8  -.-   İZMİR (EGE)\n"
+    "2026.10.01 10:30:00  39.1000   28.1000        5.2      -.-  3.1  -.-   SINDIRGI (BALIKESIR)\n"
+    "</pre><p>footer</p></body></html>"
+)
+
+
+def parse(body: bytes, chunk_size: int) -> tuple[list, dict]:
+    stream = FeatureStream()
+    features = []
+    for i in range(0, len(body), chunk_size):
+        features += stream.feed(body[i:i + chunk_size])
+    features += stream.close()
+    return features, stream.members
+
+
+def test_feature_stream_chunk_boundaries():
+    """Every chunk size (down to one byte, splitting UTF-8 sequences) gives the same result."""
+    body = json.dumps(DOCUMENT, ensure_ascii=False, indent=1).encode("utf-8")
+    for chunk_size in (1, 2, 3, 7, 64, len(body)):
+        features, members = parse(body, chunk_size)
+        assert features == DOCUMENT["features"], f"chunk_size={chunk_size}"
+        assert members == {key: DOCUMENT[key] for key in ("type", "metadata", "bbox")}
+
+
+def test_feature_stream_number_at_chunk_end():
+    """A number cut at a chunk boundary is not decoded until it is complete."""
+    stream = FeatureStream()
+    assert stream.feed(b'{"count": 12') == []
+    assert stream.feed(b'34, "features": []}') == []
+    assert stream.close() == []
+    assert stream.members == {"count": 1234}
+
+
+def test_feature_stream_empty_body():
+    """FDSN services answer queries without results with an empty 204 body."""
+    assert FeatureStream().close() == []
+    assert parse(b"  \r\n", 1) == ([], {})
+
+
+def test_feature_stream_rejects_bad_documents():
+    """Truncated or non-object documents raise ValueError."""
+    body = json.dumps(DOCUMENT).encode("utf-8")
+    for bad in (body[:len(body) // 2], b"[]", b'{"features": [{"id": 1}', b'{"a" 1}'):
+        try:
+            parse(bad, 5)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted invalid document: {bad[:40]!r}")
+
+
+def test_pre_block_lines_chunk_boundaries():
+    """Only lines inside the first <pre> block are returned, complete, for any chunk size."""
+    expected = PRE_PAGE.split("<pre>")[1].split("</pre>")[0].splitlines()
+    for chunk_size in (1, 5, 40, len(PRE_PAGE)):
+        lines = PreBlockLines()
+        result = []
+        for i in range(0, len(PRE_PAGE), chunk_size):
+            result += lines.feed(PRE_PAGE[i:i + chunk_size])
+        result += lines.close()
+        assert result == expected, f"chunk_size={chunk_size}"
+
+
+def test_pre_block_lines_plain_text():
+    """A response without <pre> is read as plain text on close."""
+    lines = PreBlockLines()
+    assert lines.feed("a\nb\n") == []
+    assert lines.close() == ["a", "b"]
+
+
+if __name__ == "__main__":
+    print("\n🌊 Earthquake Stream Parser Tests")
+    print("=" * 60)
+    failed = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {name} - {e}")
+        else:
+            print(f"✅ {name}")
+    sys.exit(1 if failed else 0)
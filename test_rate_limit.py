@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Rate limiter tests
+TokenBucketLimiter refills continuously up to its capacity, weights requests
+by body size and handler time, and reports Retry-After from the deficit.
+SecurityMiddleware charges CPU time up to the response start, not upstream
+waits or slow clients. ConcurrencyLimiter picks the longest matching path
+prefix.
+
+Run with: python test_rate_limit.py  (or pytest test_rate_limit.py)
+"""
+import asyncio
+import sys
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from security_middleware import ConcurrencyLimiter, SecurityMiddleware, TokenBucketLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@contextmanager
+def fake_clock():
+    clock = FakeClock()
+    with mock.patch("security_middleware.time.monotonic", clock):
+        yield clock
+
+
+def test_bucket_starts_full_and_empties():
+    """A new client may spend the whole minute's budget at once, then waits."""
+    with fake_clock():
+        limiter = TokenBucketLimiter(requests_per_minute=60)
+        for _ in range(60):
+            assert limiter.acquire("1.2.3.4", 1.0) is None
+        assert limiter.acquire("1.2.3.4", 1.0) == 1
+        assert limiter.acquire("5.6.7.8", 1.0) is None, "buckets are per client"
+
+
+def test_refill_rate_and_cap():
+    """Tokens come back at requests_per_minute / 60 per second, never above capacity."""
+    with fake_clock() as clock:
+        limiter = TokenBucketLimiter(requests_per_minute=60)
+        for _ in range(60):
+            limiter.acquire("client", 1.0)
+        clock.now += 10
+        for _ in range(10):
+            assert limiter.acquire("client", 1.0) is None
+        assert limiter.acquire("client", 1.0) is not None
+
+        clock.now += 3600
+        limiter.acquire("client", 0.0)
+        assert limiter.buckets["client"][0] == 60.0
+
+
+def test_retry_after_from_deficit():
+    """Retry-After is the time to refill the missing tokens, rounded up, at least 1 s."""
+    with fake_clock() as clock:
+        limiter = TokenBucketLimiter(requests_per_minute=30)  # 0.5 tokens/s
+        assert limiter.acquire("client", 30.0) is None
+        assert limiter.acquire("client", 2.5) == 5
+        clock.now += 4
+        assert limiter.acquire("client", 2.5) == 1
+        clock.now += 1
+        assert limiter.acquire("client", 2.5) is None
+
+
+def test_request_cost_by_body_size():
+    """One token plus one per bytes_per_token of body, capped at the bucket size."""
+    limiter = TokenBucketLimiter(requests_per_minute=60, bytes_per_token=64 * 1024)
+    assert limiter.request_cost(None) == 1.0
+    assert limiter.request_cost(0) == 1.0
+    assert limiter.request_cost(1024 * 1024) == 17.0
+    assert limiter.request_cost(100 * 1024 * 1024) == 60.0
+
+
+def test_charge_handler_time():
+    """Handler time is charged afterwards and may push the bucket negative."""
+    with fake_clock() as clock:
+        limiter = TokenBucketLimiter(requests_per_minute=60, seconds_per_token=0.25, max_charge_seconds=60)
+        assert limiter.acquire("client", 1.0) is None
+        limiter.charge("client", 20.0)  # 80 tokens
+        assert limiter.buckets["client"][0] == -21.0
+        assert limiter.acquire("client", 1.0) == 22
+        clock.now += 22
+        assert limiter.acquire("client", 1.0) is None
+        limiter.charge("unknown", 5.0)
+        assert "unknown" not in limiter.buckets
+
+
+def test_charge_capped():
+    """A single request is charged at most max_charge_seconds."""
+    with fake_clock():
+        limiter = TokenBucketLimiter(requests_per_minute=60, seconds_per_token=0.25, max_charge_seconds=2.0)
+        limiter.acquire("client", 1.0)
+        limiter.charge("client", 600.0)
+        assert limiter.buckets["client"][0] == 59.0 - 8.0
+
+
+async def request(middleware: SecurityMiddleware, client_ip: str = "10.0.0.1") -> list[dict]:
+    scope = {"type": "http", "method": "GET", "path": "/earthquakes", "headers": [], "client": (client_ip, 1234)}
+    sent: list[dict] = []
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    return sent
+
+
+async def respond(send, body: bytes = b"{}") -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": body})
+
+
+def tokens_left(middleware: SecurityMiddleware, client_ip: str = "10.0.0.1") -> float:
+    return middleware.rate_limiter.buckets[client_ip][0]
+
+
+def test_upstream_wait_not_charged():
+    """Awaiting a slow upstream costs no CPU and does not drain the bucket."""
+    async def app(scope, receive, send):
+        await asyncio.sleep(0.3)  # upstream fetch
+        await respond(send)
+
+    # 0.3 s of wall time would be 30 tokens at this rate
+    middleware = SecurityMiddleware(app, requests_per_minute=60, seconds_per_token=0.01, max_size=None)
+    asyncio.run(request(middleware))
+    assert tokens_left(middleware) > 58, tokens_left(middleware)
+
+
+def test_slow_client_not_charged():
+    """Time spent streaming the body after http.response.start is not charged."""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for _ in range(3):
+            await send({"type": "http.response.body", "body": b"x" * 1024, "more_body": True})
+            await asyncio.sleep(0.1)  # slow reader
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = SecurityMiddleware(app, requests_per_minute=60, seconds_per_token=0.01, max_size=None)
+    asyncio.run(request(middleware))
+    assert tokens_left(middleware) > 58, tokens_left(middleware)
+
+
+def test_cpu_time_charged():
+    """CPU spent in the handler before the response starts is charged."""
+    async def app(scope, receive, send):
+        deadline = time.process_time() + 0.2
+        while time.process_time() < deadline:
+            pass
+        await respond(send)
+
+    middleware = SecurityMiddleware(app, requests_per_minute=60, seconds_per_token=0.01, max_size=None)
+    asyncio.run(request(middleware))
+    assert tokens_left(middleware) < 59 - 15, tokens_left(middleware)
+
+
+def test_idle_buckets_pruned():
+    """Buckets that have refilled completely are dropped on the next prune."""
+    with fake_clock() as clock:
+        limiter = TokenBucketLimiter(requests_per_minute=60)
+        limiter.acquire("idle", 1.0)
+        limiter.acquire("busy", 60.0)
+        clock.now += 30
+        limiter.acquire("busy", 30.0)
+        clock.now += 31
+        limiter.acquire("other", 1.0)
+        assert "idle" not in limiter.buckets
+        assert "busy" in limiter.buckets
+
+
+def test_concurrency_limiter_longest_prefix():
+    """The most specific prefix wins; unrelated paths are not limited."""
+    limiter = ConcurrencyLimiter({"/pdf": 4, "/pdf/merge": 1})
+    assert limiter.semaphore_for("/pdf/merge") is limiter.semaphore_for("/pdf/merge/")
+    assert limiter.semaphore_for("/pdf/merge") is not limiter.semaphore_for("/pdf/split")
+    assert limiter.semaphore_for("/pdf/split") is limiter.semaphore_for("/pdf")
+    assert limiter.semaphore_for("/pdfx") is None
+    assert limiter.semaphore_for("/health") is None
+
+
+if __name__ == "__main__":
+    print("\n🪣 Rate Limiter Tests")
+    print("=" * 60)
+    failed = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {name} - {e}")
+        else:
+            print(f"✅ {name}")
+    sys.exit(1 if failed else 0)
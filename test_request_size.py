@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Request size limit tests
+SecurityMiddleware rejects a declared oversize Content-Length up front and
+cuts off chunked bodies without Content-Length with 413 as soon as they
+cross max_size, both for routes parsing JSON and routes reading the raw
+stream, without reading the rest of the body.
+
+Run with: python test_request_size.py  (or pytest test_request_size.py)
+"""
+import asyncio
+import json
+import sys
+
+from fastapi import FastAPI, Request
+
+from security_middleware import SecurityMiddleware
+
+MAX_SIZE = 4 * 1024
+CHUNK = b"x" * 512
+CHUNKS = 256  # 128 KiB in total
+
+app = FastAPI()
+
+
+@app.post("/json")
+async def json_route(payload: dict) -> dict:
+    return {"keys": len(payload)}
+
+
+@app.post("/raw")
+async def raw_route(request: Request) -> dict:
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+    return {"size": size}
+
+
+def middleware() -> SecurityMiddleware:
+    return SecurityMiddleware(app, security_headers=None, requests_per_minute=None, max_size=MAX_SIZE)
+
+
+async def post(path: str, chunks: list[bytes], headers: list | None = None) -> tuple[int, dict, int]:
+    """Sends the body chunk by chunk; returns (status, body, chunks read by the app)."""
+    scope = {
+        "type": "http", "method": "POST", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), *(headers or [])],
+        "client": ("10.0.0.1", 1234), "server": ("testserver", 80), "scheme": "http", "http_version": "1.1",
+        "root_path": "",
+    }
+    read = 0
+    sent: list[dict] = []
+
+    async def receive() -> dict:
+        nonlocal read
+        if read < len(chunks):
+            read += 1
+            return {"type": "http.request", "body": chunks[read - 1], "more_body": read < len(chunks)}
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    await middleware()(scope, receive, send)
+    status = next(message["status"] for message in sent if message["type"] == "http.response.start")
+    body = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+    return status, json.loads(body), read
+
+
+def oversize_json() -> list[bytes]:
+    return [b'{"data": "'] + [CHUNK] * CHUNKS + [b'"}']
+
+
+def test_chunked_json_body_cut_off():
+    """A JSON route gets 413 after about max_size bytes, not after the whole body."""
+    status, body, read = asyncio.run(post("/json", oversize_json()))
+    assert status == 413, status
+    assert "too large" in body["detail"]
+    assert read <= MAX_SIZE // len(CHUNK) + 2, f"{read} chunks read"
+
+
+def test_chunked_raw_body_cut_off():
+    """A route streaming request.stream() itself is cut off the same way."""
+    status, body, read = asyncio.run(post("/raw", [CHUNK] * CHUNKS))
+    assert status == 413, status
+    assert "too large" in body["detail"]
+    assert read <= MAX_SIZE // len(CHUNK) + 1, f"{read} chunks read"
+
+
+def test_declared_length_rejected_before_reading():
+    """An oversize Content-Length is rejected without reading any of the body."""
+    headers = [(b"content-length", str(len(CHUNK) * CHUNKS).encode())]
+    status, _, read = asyncio.run(post("/raw", [CHUNK] * CHUNKS, headers))
+    assert status == 413 and read == 0
+
+
+def test_small_chunked_body_passes():
+    """Bodies under the limit reach the route intact."""
+    status, body, _ = asyncio.run(post("/raw", [CHUNK] * 4))
+    assert status == 200 and body == {"size": 4 * len(CHUNK)}
+    status, body, _ = asyncio.run(post("/json", [b'{"a": 1,', b' "b": 2}']))
+    assert status == 200 and body == {"keys": 2}
+
+
+if __name__ == "__main__":
+    print("\n📏 Request Size Limit Tests")
+    print("=" * 60)
+    failed = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {name} - {e}")
+        else:
+            print(f"✅ {name}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Conditional response tests
+A matching If-None-Match is answered with 304 before the body is rendered,
+only compressed bodies carry an encoding-suffixed ETag, and stale payloads
+are reused instead of rendered per request.
+
+Run with: python test_response_encoding.py  (or pytest test_response_encoding.py)
+"""
+import asyncio
+import gzip
+import sys
+
+from starlette.requests import Request
+
+from routers.earthquake import _payload_response
+from services.earthquake_cache import CacheEntry, EarthquakeCache
+from services.earthquake_event import Event, EventCollection
+from services.response_encoding import EncodedPayload
+
+LARGE = {"features": ["x" * 100] * 20}
+SMALL = {"features": []}
+
+
+def request(**headers: str) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/earthquakes", "query_string": b"", "headers": raw})
+
+
+def counting_payload(data: dict, renders: list) -> EncodedPayload:
+    def render() -> dict:
+        renders.append(1)
+        return data
+
+    return EncodedPayload(render, validator="v1", last_modified=1759316400000)
+
+
+def test_not_modified_without_render():
+    """A tag of either representation is answered with 304 and nothing is rendered."""
+    for tag in ('"v1"', '"v1-gzip"', 'W/"v1-gzip"'):
+        renders: list = []
+        payload = counting_payload(LARGE, renders)
+        response = asyncio.run(_payload_response(request(accept_encoding="gzip", if_none_match=tag), payload))
+        assert response.status_code == 304, tag
+        assert response.headers["etag"] == tag.removeprefix("W/")
+        assert renders == [], f"{tag} rendered the body"
+
+
+def test_etag_suffix_only_when_compressed():
+    """Large bodies get the encoding suffix; small ones go out uncompressed under the plain tag."""
+    response = asyncio.run(_payload_response(request(accept_encoding="gzip"), counting_payload(LARGE, [])))
+    assert response.headers["etag"] == '"v1-gzip"'
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body).startswith(b'{"features"')
+
+    response = asyncio.run(_payload_response(request(accept_encoding="gzip"), counting_payload(SMALL, [])))
+    assert response.headers["etag"] == '"v1"'
+    assert "content-encoding" not in response.headers
+
+
+def test_mismatch_renders_once():
+    """An outdated tag gets a 200; the body is rendered once and reused."""
+    renders: list = []
+    payload = counting_payload(LARGE, renders)
+    for _ in range(3):
+        response = asyncio.run(_payload_response(request(accept_encoding="gzip", if_none_match='"old"'), payload))
+        assert response.status_code == 200
+    assert renders == [1]
+
+
+class StaleCache(EarthquakeCache):
+    """Serves one stale entry (as during an upstream outage) and counts renders."""
+
+    def __init__(self, entry: CacheEntry):
+        super().__init__(store_path="", poll_seconds=0)
+        self.entry = entry
+        self.views = 0
+
+    async def _lookup(self, **query):
+        return self.entry, True, "USGS API timeout"
+
+    def _view(self, *args, **kwargs):
+        self.views += 1
+        return super()._view(*args, **kwargs)
+
+
+def test_stale_payload_cached_and_lazy():
+    """Stale payloads are not rendered for 304s and are shared between requests."""
+    event = Event("us1", "EMSC", 1759316400000, 38.4, 26.7, 10.0, 4.0)
+    cache = StaleCache(CacheEntry(EventCollection({"sources": {}}, [event]), fresh_for=60))
+
+    async def run():
+        first = await cache.get_earthquakes_payload()
+        second = await cache.get_earthquakes_payload()
+        response = await _payload_response(request(if_none_match=first.etag()), second)
+        return first, second, response
+
+    first, second, response = asyncio.run(run())
+    assert first is second
+    assert response.status_code == 304
+    assert cache.views == 0
+
+    response = asyncio.run(_payload_response(request(), first))
+    assert response.status_code == 200 and b'"stale":true' in response.body
+    assert "etag" not in response.headers
+    assert cache.views == 1
+
+
+if __name__ == "__main__":
+    print("\n🏷️  Conditional Response Tests")
+    print("=" * 60)
+    failed = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {name} - {e}")
+        else:
+            print(f"✅ {name}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Startup time budget test
+Fails if `python -X importtime -c "import main"` exceeds the budget or if
+importing main eagerly pulls in heavy optional libraries.
+
+Run with: python test_startup.py  (or pytest test_startup.py)
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+# Cumulative import time budget for `import main` (milliseconds)
+IMPORT_TIME_BUDGET_MS = int(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+RUNS = 3
+
+# Must only be loaded on first use or by services.warmup
+LAZY_MODULES = {"httpx", "pypdf", "pdf2docx", "fitz", "reportlab"}
+
+
+def measure_import() -> tuple[float, set]:
+    """Return (cumulative ms for `import main`, top-level packages imported)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    main_us = None
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        name = parts[2].strip()
+        packages.add(name.split(".")[0])
+        if name == "main":
+            main_us = int(parts[1].strip())
+    if main_us is None:
+        raise RuntimeError("Could not find `main` in -X importtime output")
+    return main_us / 1000, packages
+
+
+def test_import_time_budget():
+    """Importing main stays within budget and leaves heavy libraries lazy."""
+    timings = []
+    packages = set()
+    for _ in range(RUNS):
+        elapsed_ms, packages = measure_import()
+        timings.append(elapsed_ms)
+    best = min(timings)
+
+    print(f"import main: {best:.0f} ms (budget {IMPORT_TIME_BUDGET_MS} ms)")
+
+    eager = sorted(LAZY_MODULES & packages)
+    assert not eager, f"import main eagerly imports: {', '.join(eager)}"
+    assert best <= IMPORT_TIME_BUDGET_MS, (
+        f"import main took {best:.0f} ms, budget is {IMPORT_TIME_BUDGET_MS} ms"
+    )
+
+
+if __name__ == "__main__":
+    print("\n⏱️  MetinAnaliz Startup Budget Test")
+    print("=" * 60)
+    try:
+        test_import_time_budget()
+    except AssertionError as e:
+        print(f"❌ FAIL - {e}")
+        sys.exit(1)
+    print("✅ PASS")